@@ -0,0 +1,201 @@
+'''
+Dts_ConvexHull.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+from math import sqrt
+
+#############################
+# Torque Game Engine
+# -------------------------------
+# Convex Hulls for Python
+#############################
+
+'''
+- Quickhull convex hull construction, used for generated collision meshes
+
+Points are added farthest first, so stopping at a vertex limit gives the
+best hull of that size the greedy order can find. Points left outside a
+limited hull are usually close to its surface.
+'''
+
+def sub(a, b):
+	return (a[0]-b[0], a[1]-b[1], a[2]-b[2])
+
+def cross(a, b):
+	return (a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0])
+
+def dot(a, b):
+	return a[0]*b[0] + a[1]*b[1] + a[2]*b[2]
+
+class HullFace:
+	def __init__(self, pts, a, b, c):
+		self.verts = (a, b, c)
+		n = cross(sub(pts[b], pts[a]), sub(pts[c], pts[a]))
+		length = sqrt(dot(n, n))
+		if length > 0.0: n = (n[0]/length, n[1]/length, n[2]/length)
+		self.normal = n
+		self.offset = dot(n, pts[a])
+		self.outside = []	# points above the face
+		self.farthest = -1
+		self.farthestDist = 0.0
+
+	def distance(self, p):
+		return dot(self.normal, p) - self.offset
+
+	def addOutside(self, i, d):
+		self.outside.append(i)
+		if d > self.farthestDist:
+			self.farthest, self.farthestDist = i, d
+
+def convexHull(points, maxVerts=0):
+	'''
+	Builds the convex hull of points (sequences of 3 floats).
+	Returns (hull points, faces), with faces as counter clockwise index
+	triples into the hull points, or None if the points are flat.
+	maxVerts limits the number of hull vertices, 0 for no limit.
+	'''
+	lookup = {}
+	pts = []
+	for p in points:
+		key = (float(p[0]), float(p[1]), float(p[2]))
+		if key in lookup: continue
+		lookup[key] = True
+		pts.append(key)
+	if len(pts) < 4: return None
+
+	# Tolerance relative to the size of the point cloud
+	extent = 0.0
+	for axis in range(0, 3):
+		lo = min([p[axis] for p in pts])
+		hi = max([p[axis] for p in pts])
+		extent = max(extent, hi - lo)
+	eps = extent * 1e-7
+
+	# Initial tetrahedron from the extreme points
+	extremes = []
+	for axis in range(0, 3):
+		lo = hi = 0
+		for i in range(1, len(pts)):
+			if pts[i][axis] < pts[lo][axis]: lo = i
+			if pts[i][axis] > pts[hi][axis]: hi = i
+		extremes += [lo, hi]
+	a, b, best = 0, 0, -1.0
+	for i in extremes:
+		for j in extremes:
+			d = sub(pts[i], pts[j])
+			if dot(d, d) > best: a, b, best = i, j, dot(d, d)
+	ab = sub(pts[b], pts[a])
+	c, best = -1, eps * eps
+	for i in range(0, len(pts)):
+		n = cross(ab, sub(pts[i], pts[a]))
+		if dot(n, n) > best: c, best = i, dot(n, n)
+	if c < 0: return None
+	n = cross(ab, sub(pts[c], pts[a]))
+	length = sqrt(dot(n, n))
+	d, best = -1, eps
+	for i in range(0, len(pts)):
+		dist = abs(dot(n, sub(pts[i], pts[a]))) / length
+		if dist > best: d, best = i, dist
+	if d < 0: return None
+	if dot(n, sub(pts[d], pts[a])) > 0.0: b, c = c, b
+
+	faces = {}
+	edges = {}	# directed edge -> face id
+	nextId = [0]
+	def addFace(a, b, c):
+		f = HullFace(pts, a, b, c)
+		fid = nextId[0]
+		nextId[0] += 1
+		faces[fid] = f
+		edges[(a, b)] = edges[(b, c)] = edges[(c, a)] = fid
+		return fid
+	def removeFace(fid):
+		a, b, c = faces[fid].verts
+		for e in ((a, b), (b, c), (c, a)):
+			if edges.get(e) == fid: del edges[e]
+		del faces[fid]
+
+	newFaces = [addFace(a, b, c), addFace(a, c, d), addFace(a, d, b), addFace(b, d, c)]
+	hullVerts = {a: True, b: True, c: True, d: True}
+	for i in range(0, len(pts)):
+		if i in hullVerts: continue
+		for fid in newFaces:
+			dist = faces[fid].distance(pts[i])
+			if dist > eps:
+				faces[fid].addOutside(i, dist)
+				break
+
+	while maxVerts <= 0 or len(hullVerts) < maxVerts:
+		# Take the point farthest outside the current hull
+		fid, best = None, 0.0
+		for f in faces.keys():
+			if faces[f].farthestDist > best: fid, best = f, faces[f].farthestDist
+		if fid == None: break
+		p = faces[fid].farthest
+		eye = pts[p]
+
+		# Find the faces p can see, and the horizon around them
+		visible = {fid: True}
+		stack = [fid]
+		horizon = []
+		while len(stack) > 0:
+			f = stack.pop()
+			a, b, c = faces[f].verts
+			for e in ((a, b), (b, c), (c, a)):
+				other = edges[(e[1], e[0])]
+				if other in visible: continue
+				if faces[other].distance(eye) > eps:
+					visible[other] = True
+					stack.append(other)
+				else:
+					horizon.append(e)
+
+		orphans = []
+		for f in visible.keys():
+			orphans += faces[f].outside
+			removeFace(f)
+		newFaces = []
+		for e in horizon:
+			newFaces.append(addFace(e[0], e[1], p))
+		hullVerts[p] = True
+		for i in orphans:
+			if i == p: continue
+			for f in newFaces:
+				dist = faces[f].distance(pts[i])
+				if dist > eps:
+					faces[f].addOutside(i, dist)
+					break
+
+	# Compact to just the hull vertices
+	remap = {}
+	hullPts = []
+	hullFaces = []
+	for f in faces.values():
+		tri = []
+		for v in f.verts:
+			if not (v in remap):
+				remap[v] = len(hullPts)
+				hullPts.append(pts[v])
+			tri.append(remap[v])
+		hullFaces.append(tuple(tri))
+	return hullPts, hullFaces
@@ -0,0 +1,196 @@
+'''
+Dts_Curves.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+from math import floor
+from bisect import bisect_right
+
+try: import numpy
+except ImportError: numpy = None
+
+#############################
+# Torque Game Engine
+# -------------------------------
+# IPO Curves for Python
+#############################
+
+'''
+- Evaluates Blender IPO curves at many frames at once
+
+Follows what Blender does when it evaluates a curve: Bezier segments get
+their handles shortened so the curve never runs backwards in time, and
+the frame is found on the segment before the value is read off it.
+'''
+
+# interpolation types, same values as Blender's IpoCurve.InterpTypes
+CONST = 0
+LINEAR = 1
+BEZIER = 2
+
+# extend modes, same values as Blender's IpoCurve.ExtendTypes
+EXTEND_CONST = 0
+EXTEND_EXTRAP = 1
+EXTEND_CYCLIC = 2
+EXTEND_CYCLIC_EXTRAP = 3
+
+class Curve:
+	'''
+	One IPO curve. points are (left handle, knot, right handle) triples of
+	(frame, value) pairs, in the order of their knots.
+	'''
+	def __init__(self, points, interpolation=BEZIER, extend=EXTEND_CONST):
+		self.points = points
+		self.interpolation = interpolation
+		self.extend = extend
+		self.knotX = [p[1][0] for p in points]
+		self.knotY = [p[1][1] for p in points]
+		# cubic coefficients (a, b, c, d) of x and y on each segment
+		self.segX = []
+		self.segY = []
+		for i in range(0, len(points) - 1):
+			p0, p1, p2, p3 = self.correctHandles(points[i][1], points[i][2], points[i+1][0], points[i+1][1])
+			self.segX.append(self.coefficients(p0[0], p1[0], p2[0], p3[0]))
+			self.segY.append(self.coefficients(p0[1], p1[1], p2[1], p3[1]))
+
+	def correctHandles(self, v1, v2, v3, v4):
+		# Shorten the handles of a segment so its frame always increases
+		h1 = (v1[0] - v2[0], v1[1] - v2[1])
+		h2 = (v4[0] - v3[0], v4[1] - v3[1])
+		length = v4[0] - v1[0]
+		len1, len2 = abs(h1[0]), abs(h2[0])
+		if len1 + len2 == 0.0 or len1 + len2 <= length: return v1, v2, v3, v4
+		fac = length / (len1 + len2)
+		return v1, (v1[0] - fac*h1[0], v1[1] - fac*h1[1]), (v4[0] - fac*h2[0], v4[1] - fac*h2[1]), v4
+
+	def coefficients(self, p0, p1, p2, p3):
+		return (p3 - p0 + 3.0*(p1 - p2), 3.0*(p0 - 2.0*p1 + p2), 3.0*(p1 - p0), p0)
+
+	def sample(self, times):
+		'''
+		Values of the curve at every frame in times, as a list.
+		'''
+		if len(self.points) == 0: return [0.0] * len(times)
+		if len(self.points) == 1 and self.extend != EXTEND_EXTRAP: return [self.knotY[0]] * len(times)
+		if numpy != None: return self.sampleArray(numpy.array(times, numpy.float64)).tolist()
+		return [self.sampleAt(t) for t in times]
+
+	def slopes(self):
+		# Slopes used to extrapolate before the first and after the last knot
+		first, last = self.points[0], self.points[-1]
+		before, after = 0.0, 0.0
+		if self.interpolation == BEZIER:
+			dx = first[1][0] - first[0][0]
+			if dx != 0.0: before = (first[1][1] - first[0][1]) / dx
+			dx = last[2][0] - last[1][0]
+			if dx != 0.0: after = (last[2][1] - last[1][1]) / dx
+		elif self.interpolation == LINEAR and len(self.points) > 1:
+			dx = self.knotX[1] - self.knotX[0]
+			if dx != 0.0: before = (self.knotY[1] - self.knotY[0]) / dx
+			dx = self.knotX[-1] - self.knotX[-2]
+			if dx != 0.0: after = (self.knotY[-1] - self.knotY[-2]) / dx
+		return before, after
+
+	def sampleAt(self, t):
+		x, y = self.knotX, self.knotY
+		offset = 0.0
+		if self.extend >= EXTEND_CYCLIC and x[-1] > x[0] and (t < x[0] or t > x[-1]):
+			# wrap the frame back into the curve, cyclic extrapolation adds
+			# on the change in value over each cycle
+			cycles = floor((t - x[0]) / (x[-1] - x[0]))
+			t -= cycles * (x[-1] - x[0])
+			if self.extend == EXTEND_CYCLIC_EXTRAP: offset = cycles * (y[-1] - y[0])
+		if t <= x[0]:
+			if self.extend == EXTEND_EXTRAP: return y[0] + self.slopes()[0] * (t - x[0])
+			return y[0] + offset
+		if t >= x[-1]:
+			if self.extend == EXTEND_EXTRAP: return y[-1] + self.slopes()[1] * (t - x[-1])
+			return y[-1] + offset
+		i = bisect_right(x, t) - 1
+		if self.interpolation == CONST: return y[i] + offset
+		if self.interpolation == LINEAR or x[i+1] == x[i]:
+			return y[i] + (y[i+1] - y[i]) * (t - x[i]) / (x[i+1] - x[i]) + offset
+		ax, bx, cx, dx = self.segX[i]
+		ay, by, cy, dy = self.segY[i]
+		# Find the curve parameter at t with Newton's method, falling back to
+		# bisection whenever a step leaves the bracket
+		lo, hi = 0.0, 1.0
+		u = (t - x[i]) / (x[i+1] - x[i])
+		tolerance = (x[i+1] - x[i]) * 1e-9
+		for k in range(0, 32):
+			f = ((ax*u + bx)*u + cx)*u + dx - t
+			if abs(f) <= tolerance: break
+			if f < 0.0: lo = u
+			else: hi = u
+			df = (3.0*ax*u + 2.0*bx)*u + cx
+			if df != 0.0: u = u - f / df
+			if df == 0.0 or u <= lo or u >= hi: u = 0.5 * (lo + hi)
+		return ((ay*u + by)*u + cy)*u + dy + offset
+
+	def sampleArray(self, t):
+		# sampleAt for a whole array of frames
+		x = numpy.array(self.knotX, numpy.float64)
+		y = numpy.array(self.knotY, numpy.float64)
+		offset = numpy.zeros(len(t), numpy.float64)
+		if self.extend >= EXTEND_CYCLIC and x[-1] > x[0]:
+			outside = (t < x[0]) | (t > x[-1])
+			cycles = numpy.where(outside, numpy.floor((t - x[0]) / (x[-1] - x[0])), 0.0)
+			t = t - cycles * (x[-1] - x[0])
+			if self.extend == EXTEND_CYCLIC_EXTRAP: offset = cycles * (y[-1] - y[0])
+		result = numpy.zeros(len(t), numpy.float64)
+		if len(x) > 1:
+			i = numpy.clip(numpy.searchsorted(x, t, 'right') - 1, 0, len(x) - 2)
+			x0, x1, y0, y1 = x[i], x[i+1], y[i], y[i+1]
+			if self.interpolation == CONST:
+				result = y0.copy()
+			else:
+				span = numpy.where(x1 > x0, x1 - x0, 1.0)
+				result = y0 + (y1 - y0) * (t - x0) / span
+			if self.interpolation == BEZIER:
+				segX = numpy.array(self.segX, numpy.float64)[i]
+				segY = numpy.array(self.segY, numpy.float64)[i]
+				ax, bx, cx, dx = segX[:,0], segX[:,1], segX[:,2], segX[:,3]
+				lo = numpy.zeros(len(t), numpy.float64)
+				hi = numpy.ones(len(t), numpy.float64)
+				u = numpy.clip((t - x0) / span, 0.0, 1.0)
+				for k in range(0, 32):
+					f = ((ax*u + bx)*u + cx)*u + dx - t
+					lo = numpy.where(f < 0.0, u, lo)
+					hi = numpy.where(f < 0.0, hi, u)
+					df = (3.0*ax*u + 2.0*bx)*u + cx
+					safe = numpy.where(df != 0.0, df, 1.0)
+					step = u - f / safe
+					bad = (df == 0.0) | (step <= lo) | (step >= hi)
+					u = numpy.where(bad, 0.5 * (lo + hi), step)
+					if numpy.all(abs(f) <= span * 1e-9): break
+				bez = ((segY[:,0]*u + segY[:,1])*u + segY[:,2])*u + segY[:,3]
+				result = numpy.where(x1 > x0, bez, result)
+		# before the first knot and after the last one
+		before, after = t <= x[0], t >= x[-1]
+		if self.extend == EXTEND_EXTRAP:
+			slopeBefore, slopeAfter = self.slopes()
+			result = numpy.where(before, y[0] + slopeBefore * (t - x[0]), result)
+			result = numpy.where(after, y[-1] + slopeAfter * (t - x[-1]), result)
+		else:
+			result = numpy.where(before, y[0], result)
+			result = numpy.where(after, y[-1], result)
+		return result + offset
@@ -0,0 +1,238 @@
+'''
+Dts_Decimate.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+import heapq
+from math import sqrt
+
+#############################
+# Torque Game Engine
+# -------------------------------
+# Mesh Decimation for Python
+#############################
+
+'''
+- Quadric error (Garland-Heckbert) simplification using half edge collapses
+
+Vertices are only ever removed, never moved, so the UVs, normals and
+skin weights of the remaining vertices are untouched. Dts vertices that
+share a position (UV seams, hard edges, material borders) are collapsed
+together; a collapse is refused if any of them has no matching vertex on
+the same side of the seam at the destination, which keeps seams intact.
+'''
+
+# Weight of the planes added along open mesh borders
+BorderWeight = 100.0
+
+def addQuadric(q, o):
+	for i in range(0, 10):
+		q[i] += o[i]
+
+def planeQuadric(nx, ny, nz, d, w):
+	return [w*nx*nx, w*nx*ny, w*nx*nz, w*nx*d,
+			w*ny*ny, w*ny*nz, w*ny*d,
+			w*nz*nz, w*nz*d,
+			w*d*d]
+
+def quadricError(q, p):
+	x, y, z = p
+	return (q[0]*x*x + 2*q[1]*x*y + 2*q[2]*x*z + 2*q[3]*x
+		+ q[4]*y*y + 2*q[5]*y*z + 2*q[6]*y
+		+ q[7]*z*z + 2*q[8]*z
+		+ q[9])
+
+def faceNormal(a, b, c):
+	ux, uy, uz = b[0]-a[0], b[1]-a[1], b[2]-a[2]
+	vx, vy, vz = c[0]-a[0], c[1]-a[1], c[2]-a[2]
+	return (uy*vz - uz*vy, uz*vx - ux*vz, ux*vy - uy*vx)
+
+class Decimator:
+	def __init__(self, mesh):
+		# Weld dts vertices by position
+		self.pos = []			# position of each welded vertex (pid)
+		self.vertPid = []		# dts vertex -> pid
+		posLookup = {}
+		for v in mesh.verts:
+			key = (v[0], v[1], v[2])
+			try: pid = posLookup[key]
+			except KeyError:
+				pid = posLookup[key] = len(self.pos)
+				self.pos.append(key)
+			self.vertPid.append(pid)
+
+		self.tris = mesh.getTriangles()
+		self.alive = [True] * len(self.tris)
+		self.numAlive = len(self.tris)
+		self.pidFaces = [{} for p in self.pos]
+		self.quadrics = [[0.0] * 10 for p in self.pos]
+		self.version = [0] * len(self.pos)
+		self.dead = [False] * len(self.pos)
+
+		edgeCount = {}
+		for f in range(0, len(self.tris)):
+			tri = self.tris[f]
+			pa, pb, pc = self.vertPid[tri[0]], self.vertPid[tri[1]], self.vertPid[tri[2]]
+			if pa == pb or pb == pc or pa == pc:
+				# Already degenerate in position space
+				self.alive[f] = False
+				self.numAlive -= 1
+				continue
+			for p in (pa, pb, pc): self.pidFaces[p][f] = True
+			n = faceNormal(self.pos[pa], self.pos[pb], self.pos[pc])
+			length = sqrt(n[0]*n[0] + n[1]*n[1] + n[2]*n[2])
+			if length > 0.0:
+				nx, ny, nz = n[0]/length, n[1]/length, n[2]/length
+				a = self.pos[pa]
+				q = planeQuadric(nx, ny, nz, -(nx*a[0] + ny*a[1] + nz*a[2]), length * 0.5)
+				for p in (pa, pb, pc): addQuadric(self.quadrics[p], q)
+			for e in ((pa, pb), (pb, pc), (pc, pa)):
+				key = (min(e), max(e))
+				edgeCount[key] = edgeCount.get(key, 0) + 1
+
+		# Open borders get extra planes at right angles to their face, so
+		# silhouettes are kept in place
+		self.border = {}
+		self.borderPids = {}
+		for f in range(0, len(self.tris)):
+			if not self.alive[f]: continue
+			tri = self.tris[f]
+			pids = (self.vertPid[tri[0]], self.vertPid[tri[1]], self.vertPid[tri[2]])
+			n = faceNormal(self.pos[pids[0]], self.pos[pids[1]], self.pos[pids[2]])
+			for i in range(0, 3):
+				pa, pb = pids[i], pids[(i+1)%3]
+				if edgeCount[(min(pa, pb), max(pa, pb))] != 1: continue
+				self.border[(min(pa, pb), max(pa, pb))] = True
+				self.borderPids[pa] = self.borderPids[pb] = True
+				a, b = self.pos[pa], self.pos[pb]
+				ex, ey, ez = b[0]-a[0], b[1]-a[1], b[2]-a[2]
+				px, py, pz = ey*n[2] - ez*n[1], ez*n[0] - ex*n[2], ex*n[1] - ey*n[0]
+				length = sqrt(px*px + py*py + pz*pz)
+				if length <= 0.0: continue
+				px, py, pz = px/length, py/length, pz/length
+				q = planeQuadric(px, py, pz, -(px*a[0] + py*a[1] + pz*a[2]), BorderWeight * (ex*ex + ey*ey + ez*ez))
+				addQuadric(self.quadrics[pa], q)
+				addQuadric(self.quadrics[pb], q)
+
+		self.heap = []
+		for (pa, pb) in edgeCount.keys():
+			self.pushEdge(pa, pb)
+			self.pushEdge(pb, pa)
+
+	def neighbours(self, pid):
+		nb = {}
+		for f in self.pidFaces[pid].keys():
+			tri = self.tris[f]
+			for i in range(0, 3):
+				nb[self.vertPid[tri[i]]] = True
+		try: del nb[pid]
+		except KeyError: pass
+		return nb
+
+	def pushEdge(self, pu, pv):
+		q = self.quadrics[pu][:]
+		addQuadric(q, self.quadrics[pv])
+		heapq.heappush(self.heap, (quadricError(q, self.pos[pv]), pu, pv, self.version[pu], self.version[pv]))
+
+	def getWedgeMap(self, pu, pv):
+		# For every dts vertex at pu, find one at pv sharing a face with it
+		wedgeMap = {}
+		for f in self.pidFaces[pu].keys():
+			tri = self.tris[f]
+			for i in range(0, 3):
+				if self.vertPid[tri[i]] == pu: wu = tri[i]
+			wedgeMap.setdefault(wu, None)
+			for i in range(0, 3):
+				if self.vertPid[tri[i]] == pv: wedgeMap[wu] = tri[i]
+		for w in wedgeMap.values():
+			if w == None: return None
+		return wedgeMap
+
+	def canCollapse(self, pu, pv):
+		# Border vertices may only slide along the border
+		if pu in self.borderPids and not ((min(pu, pv), max(pu, pv)) in self.border):
+			return None
+		# Link condition: the only shared neighbours are across the shared faces
+		shared = 0
+		for f in self.pidFaces[pu].keys():
+			if f in self.pidFaces[pv]: shared += 1
+		nu = self.neighbours(pu)
+		common = 0
+		for p in self.neighbours(pv).keys():
+			if p in nu: common += 1
+		if shared == 0 or common != shared: return None
+		wedgeMap = self.getWedgeMap(pu, pv)
+		if wedgeMap == None: return None
+		# Don't let any face flip over
+		dest = self.pos[pv]
+		for f in self.pidFaces[pu].keys():
+			if f in self.pidFaces[pv]: continue
+			tri = self.tris[f]
+			before = [self.pos[self.vertPid[tri[i]]] for i in range(0, 3)]
+			after = [before[i] for i in range(0, 3)]
+			for i in range(0, 3):
+				if self.vertPid[tri[i]] == pu: after[i] = dest
+			n0 = faceNormal(before[0], before[1], before[2])
+			n1 = faceNormal(after[0], after[1], after[2])
+			if n0[0]*n1[0] + n0[1]*n1[1] + n0[2]*n1[2] <= 0.0: return None
+		return wedgeMap
+
+	def collapse(self, pu, pv, wedgeMap):
+		for f in self.pidFaces[pu].keys():
+			tri = self.tris[f]
+			if f in self.pidFaces[pv]:
+				# Face lies on the collapsed edge, remove it
+				self.alive[f] = False
+				self.numAlive -= 1
+				for i in range(0, 3):
+					try: del self.pidFaces[self.vertPid[tri[i]]][f]
+					except KeyError: pass
+				continue
+			for i in range(0, 3):
+				if self.vertPid[tri[i]] == pu: tri[i] = wedgeMap[tri[i]]
+			self.pidFaces[pv][f] = True
+		self.pidFaces[pu] = {}
+		addQuadric(self.quadrics[pv], self.quadrics[pu])
+		if pu in self.borderPids:
+			for p in self.neighbours(pv).keys():
+				if (min(pu, p), max(pu, p)) in self.border:
+					self.border[(min(pv, p), max(pv, p))] = True
+		self.dead[pu] = True
+		self.version[pv] += 1
+		for p in self.neighbours(pv).keys():
+			self.pushEdge(p, pv)
+			self.pushEdge(pv, p)
+
+	def run(self, targetFaces):
+		while self.numAlive > targetFaces and len(self.heap) > 0:
+			cost, pu, pv, vu, vv = heapq.heappop(self.heap)
+			if self.dead[pu] or self.dead[pv]: continue
+			if vu != self.version[pu] or vv != self.version[pv]: continue
+			wedgeMap = self.canCollapse(pu, pv)
+			if wedgeMap == None: continue
+			self.collapse(pu, pv, wedgeMap)
+		return [self.tris[f] for f in range(0, len(self.tris)) if self.alive[f]]
+
+# Returns the faces of mesh (in DtsMesh.getTriangles form, on the original
+# vertex indices) after simplifying it down to about targetFaces triangles
+def decimate(mesh, targetFaces):
+	return Decimator(mesh).run(targetFaces)
@@ -0,0 +1,433 @@
+'''
+Dts_Kinematics.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+import os
+from math import sqrt
+from Torque_Math import Vector, Quaternion
+
+try: import multiprocessing
+except ImportError: multiprocessing = None
+
+#############################
+# Torque Game Engine
+# -------------------------------
+# Forward Kinematics for Python
+#############################
+
+'''
+- Evaluates armature poses without Blender
+
+Matrices are 4x4 nested lists laid out the way Blender stores them: rows
+are the axes, the translation is in the last row, and points are
+multiplied on the left. Blender quaternions are (w, x, y, z).
+
+A pose channel is the (loc, quat, size) a bone's action curves give it.
+The pose matrix of a bone is its channel matrix, then its rest offset
+from its parent, then the parent's pose matrix, which is what Blender
+does for bones without constraints, IK, hinges or scale inheritance
+turned off.  Like Blender, the loc of a connected bone is left out, so
+it stays on the end of its parent.
+'''
+
+# channel values of a bone that is not animated
+IDENTITY = ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0, 0.0), (1.0, 1.0, 1.0))
+
+def matMul(a, b):
+	return [[a[i][0]*b[0][j] + a[i][1]*b[1][j] + a[i][2]*b[2][j] + a[i][3]*b[3][j] for j in range(0, 4)] for i in range(0, 4)]
+
+def rigidInverse(m):
+	# Inverse of a rotation and translation, rest matrices carry no scale
+	r = [[m[j][i] for j in range(0, 3)] for i in range(0, 3)]
+	t = [-(m[3][0]*r[0][j] + m[3][1]*r[1][j] + m[3][2]*r[2][j]) for j in range(0, 3)]
+	return [r[0] + [0.0], r[1] + [0.0], r[2] + [0.0], t + [1.0]]
+
+def affineInverse(m):
+	# Inverse of any invertible transform
+	a = [row[0:3] for row in m[0:3]]
+	c = [[a[1][1]*a[2][2] - a[1][2]*a[2][1], a[0][2]*a[2][1] - a[0][1]*a[2][2], a[0][1]*a[1][2] - a[0][2]*a[1][1]],
+		[a[1][2]*a[2][0] - a[1][0]*a[2][2], a[0][0]*a[2][2] - a[0][2]*a[2][0], a[0][2]*a[1][0] - a[0][0]*a[1][2]],
+		[a[1][0]*a[2][1] - a[1][1]*a[2][0], a[0][1]*a[2][0] - a[0][0]*a[2][1], a[0][0]*a[1][1] - a[0][1]*a[1][0]]]
+	det = a[0][0]*c[0][0] + a[0][1]*c[1][0] + a[0][2]*c[2][0]
+	r = [[c[i][j] / det for j in range(0, 3)] for i in range(0, 3)]
+	t = [-(m[3][0]*r[0][j] + m[3][1]*r[1][j] + m[3][2]*r[2][j]) for j in range(0, 3)]
+	return [r[0] + [0.0], r[1] + [0.0], r[2] + [0.0], t + [1.0]]
+
+def determinant(a):
+	return a[0][0]*(a[1][1]*a[2][2] - a[1][2]*a[2][1]) - a[0][1]*(a[1][0]*a[2][2] - a[1][2]*a[2][0]) + a[0][2]*(a[1][0]*a[2][1] - a[1][1]*a[2][0])
+
+def polarDecompose(m):
+	'''
+	Splits the upper 3x3 of m into a symmetric stretch and a rotation,
+	m = stretch * rotation, so the stretch is applied first.
+	Negative scale ends up in the stretch.
+	'''
+	q = [[m[i][j] for j in range(0, 3)] for i in range(0, 3)]
+	if determinant(q) < 0.0: q = [[-v for v in row] for row in q]
+	# Average the matrix with its inverse transpose until it is orthogonal
+	for k in range(0, 32):
+		inv = affineInverse([q[0] + [0.0], q[1] + [0.0], q[2] + [0.0], [0.0, 0.0, 0.0, 1.0]])
+		nq = [[0.5 * (q[i][j] + inv[j][i]) for j in range(0, 3)] for i in range(0, 3)]
+		change = max([abs(nq[i][j] - q[i][j]) for i in range(0, 3) for j in range(0, 3)])
+		q = nq
+		if change < 1e-12: break
+	stretch = [[m[i][0]*q[j][0] + m[i][1]*q[j][1] + m[i][2]*q[j][2] for j in range(0, 3)] for i in range(0, 3)]
+	return q, stretch
+
+def symmetricEigen(s):
+	'''
+	Eigenvalues and eigenvectors of a symmetric 3x3 matrix, by Jacobi
+	rotations. Returns (values, axes) with s = axes^T * diag(values) * axes,
+	where the axes are the rows of a rotation matrix matched up with the
+	x, y and z axes as closely as possible.
+	'''
+	a = [[s[i][j] for j in range(0, 3)] for i in range(0, 3)]
+	v = [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+	for sweep in range(0, 50):
+		done = True
+		for p, r in ((0, 1), (0, 2), (1, 2)):
+			# leave out rounding noise, it would turn the axes for nothing
+			if abs(a[p][r]) <= 1e-12 * (abs(a[p][p]) + abs(a[r][r])): continue
+			done = False
+			theta = (a[r][r] - a[p][p]) / (2.0 * a[p][r])
+			t = 1.0 / (abs(theta) + sqrt(theta*theta + 1.0))
+			if theta < 0.0: t = -t
+			c = 1.0 / sqrt(t*t + 1.0)
+			sn = t * c
+			for k in range(0, 3):
+				akp, akr = a[k][p], a[k][r]
+				a[k][p], a[k][r] = c*akp - sn*akr, sn*akp + c*akr
+			for k in range(0, 3):
+				apk, ark = a[p][k], a[r][k]
+				a[p][k], a[r][k] = c*apk - sn*ark, sn*apk + c*ark
+			for k in range(0, 3):
+				vkp, vkr = v[k][p], v[k][r]
+				v[k][p], v[k][r] = c*vkp - sn*vkr, sn*vkp + c*vkr
+		if done: break
+	# eigenvectors are the columns of v, match each to the closest axis
+	vectors = [[v[0][i], v[1][i], v[2][i]] for i in range(0, 3)]
+	values = [a[0][0], a[1][1], a[2][2]]
+	axes, order = [None, None, None], [None, None, None]
+	pairs = [(abs(vectors[i][j]), i, j) for i in range(0, 3) for j in range(0, 3)]
+	pairs.sort()
+	pairs.reverse()
+	for weight, i, j in pairs:
+		if axes[j] != None or i in order: continue
+		axes[j], order[j] = vectors[i], i
+		if axes[j][j] < 0.0: axes[j] = [-x for x in axes[j]]
+	if determinant(axes) < 0.0: axes[2] = [-x for x in axes[2]]
+	return [values[order[j]] for j in range(0, 3)], axes
+
+def quatToMat(q):
+	length = sqrt(q[0]*q[0] + q[1]*q[1] + q[2]*q[2] + q[3]*q[3])
+	if length == 0.0: return [[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]
+	s = sqrt(2.0) / length
+	q0, q1, q2, q3 = q[0]*s, q[1]*s, q[2]*s, q[3]*s
+	return [[1.0 - q2*q2 - q3*q3, q0*q3 + q1*q2, -q0*q2 + q1*q3],
+		[-q0*q3 + q1*q2, 1.0 - q1*q1 - q3*q3, q0*q1 + q2*q3],
+		[q0*q2 + q1*q3, -q0*q1 + q2*q3, 1.0 - q1*q1 - q2*q2]]
+
+def matToQuat(m):
+	'''
+	Rotation of the upper 3x3 of m as a Blender quaternion. Like Blender,
+	the axes are normalized first so scale does not leak into the result.
+	'''
+	rows = []
+	for i in range(0, 3):
+		length = sqrt(m[i][0]*m[i][0] + m[i][1]*m[i][1] + m[i][2]*m[i][2])
+		if length == 0.0: length = 1.0
+		rows.append((m[i][0]/length, m[i][1]/length, m[i][2]/length))
+	tr = 0.25 * (1.0 + rows[0][0] + rows[1][1] + rows[2][2])
+	if tr > 1e-7:
+		s = sqrt(tr)
+		w = s
+		s = 1.0 / (4.0 * s)
+		x = (rows[1][2] - rows[2][1]) * s
+		y = (rows[2][0] - rows[0][2]) * s
+		z = (rows[0][1] - rows[1][0]) * s
+	elif rows[0][0] > rows[1][1] and rows[0][0] > rows[2][2]:
+		s = 2.0 * sqrt(1.0 + rows[0][0] - rows[1][1] - rows[2][2])
+		x = 0.25 * s
+		s = 1.0 / s
+		w = (rows[1][2] - rows[2][1]) * s
+		y = (rows[1][0] + rows[0][1]) * s
+		z = (rows[2][0] + rows[0][2]) * s
+	elif rows[1][1] > rows[2][2]:
+		s = 2.0 * sqrt(1.0 + rows[1][1] - rows[0][0] - rows[2][2])
+		y = 0.25 * s
+		s = 1.0 / s
+		w = (rows[2][0] - rows[0][2]) * s
+		x = (rows[1][0] + rows[0][1]) * s
+		z = (rows[2][1] + rows[1][2]) * s
+	else:
+		s = 2.0 * sqrt(1.0 + rows[2][2] - rows[0][0] - rows[1][1])
+		z = 0.25 * s
+		s = 1.0 / s
+		w = (rows[0][1] - rows[1][0]) * s
+		x = (rows[2][0] + rows[0][2]) * s
+		y = (rows[2][1] + rows[1][2]) * s
+	length = sqrt(w*w + x*x + y*y + z*z)
+	return (w/length, x/length, y/length, z/length)
+
+def toTorqueQuat(q):
+	# Same as DtsPoseUtilClass.toTorqueQuat, for unit quaternions
+	return Quaternion(-q[1], -q[2], -q[3], q[0])
+
+def channelMatrix(loc, quat, size):
+	# Scale, then rotate, then move, as Blender builds a pose channel
+	r = quatToMat(quat)
+	return [[r[0][0]*size[0], r[0][1]*size[0], r[0][2]*size[0], 0.0],
+		[r[1][0]*size[1], r[1][1]*size[1], r[1][2]*size[1], 0.0],
+		[r[2][0]*size[2], r[2][1]*size[2], r[2][2]*size[2], 0.0],
+		[loc[0], loc[1], loc[2], 1.0]]
+
+class FKRig:
+	'''
+	The static data of one armature, with the same rest values
+	DtsPoseUtilClass keeps in armInfo and armBones, and methods that turn
+	a dictionary of bone name -> (loc, quat, size) channel values into the
+	local space values DtsPoseUtilClass reads back from Blender's pose.
+	Bones missing from the channels are at rest.
+	'''
+	def __init__(self, armRot, armLoc, armSize):
+		self.armRot = armRot
+		self.armLoc = armLoc
+		self.armSize = armSize
+		self.bones = []		# bone names, parents before children
+		self.parents = {}
+		self.connected = {}	# bones joined to their parent, their loc is ignored
+		self.restMats = {}
+		self.offsets = {}	# rest matrix in the space of the parent's
+		self.restPosWS = {}
+		self.restRotWS = {}
+		self.defPosPS = {}
+		self.defRotPS = {}
+
+	def addBone(self, name, parentName, restMat, restPosWS, restRotWS, defPosPS, defRotPS, connected=False):
+		# Bones have to be added after their parents
+		self.bones.append(name)
+		self.parents[name] = parentName
+		self.connected[name] = connected and parentName != None
+		self.restMats[name] = restMat
+		if parentName != None:
+			self.offsets[name] = matMul(restMat, rigidInverse(self.restMats[parentName]))
+		self.restPosWS[name] = restPosWS
+		self.restRotWS[name] = restRotWS
+		self.defPosPS[name] = defPosPS
+		self.defRotPS[name] = defRotPS
+
+	def getPoseMatrices(self, channels):
+		# Armature space pose matrix of every bone
+		poseMats = {}
+		for name in self.bones:
+			try: loc, quat, size = channels[name]
+			except KeyError: loc, quat, size = IDENTITY
+			if self.connected[name]: loc = IDENTITY[0]
+			chanMat = channelMatrix(loc, quat, size)
+			parentName = self.parents[name]
+			if parentName == None: poseMats[name] = matMul(chanMat, self.restMats[name])
+			else: poseMats[name] = matMul(matMul(chanMat, self.offsets[name]), poseMats[parentName])
+		return poseMats
+
+	def getAllBoneLocRotLS(self, channels):
+		'''
+		Same as DtsPoseUtilClass.getAllBoneLocRotLS for a pose with the
+		given channel values: a dictionary of bone name -> (loc, rot).
+		'''
+		poseMats = self.getPoseMatrices(channels)
+		armRotInv = self.armRot.inverse()
+		armSize = self.armSize
+		locWS, rotWS, scaleChain = {}, {}, {}
+		result = {}
+		for name in self.bones:
+			m = poseMats[name]
+			trans = self.armRot.apply(Vector(m[3][0], m[3][1], m[3][2]))
+			locWS[name] = Vector(trans[0]*armSize[0], trans[1]*armSize[1], trans[2]*armSize[2]) + self.armLoc
+			rotWS[name] = armRotInv * toTorqueQuat(matToQuat(m)).inverse()
+			parentName = self.parents[name]
+			if parentName == None:
+				scaleChain[name] = []
+				loc = locWS[name] - self.restPosWS[name]
+				rot = (rotWS[name].inverse() * self.restRotWS[name].inverse()).inverse()
+			else:
+				# parent scales to take out of the offset, root first
+				chain = scaleChain[parentName]
+				try: size = channels[parentName][2]
+				except KeyError: size = IDENTITY[2]
+				scaleRaw = Vector(size[0], size[1], size[2])
+				if not scaleRaw.eqDelta(Vector(1.0,1.0,1.0), 0.008):
+					chain = chain + [(rotWS[parentName], Vector(1.0/scaleRaw[0], 1.0/scaleRaw[1], 1.0/scaleRaw[2]))]
+				scaleChain[name] = chain
+				offset = removeScales(locWS[name] - locWS[parentName], chain)
+				loc = rotWS[parentName].apply(offset) - self.defPosPS[name]
+				rotPS = rotWS[parentName].inverse() * rotWS[name]
+				rot = (rotPS.inverse() * self.defRotPS[name].inverse()).inverse()
+			result[name] = (loc, rot)
+		return result
+
+	def getArmaturePose(self, channels):
+		# bone name -> (loc, rot, scale), like DtsPoseUtilClass.getArmaturePose
+		bonePoses = {}
+		for name, locRot in self.getAllBoneLocRotLS(channels).items():
+			try: size = channels[name][2]
+			except KeyError: size = IDENTITY[2]
+			bonePoses[name] = (locRot[0], locRot[1], Vector(size[0], size[1], size[2]))
+		return bonePoses
+
+	def decomposePose(self, poseMats):
+		'''
+		bone name -> (loc, rot, scale factors, scale rotation) from armature
+		space pose matrices. Each bone's transform is taken relative to its
+		parent's full matrix, so unlike getAllBoneLocRotLS it stays exact
+		under parents that are scaled unevenly. The scale factors apply
+		along the axes of the scale rotation, which is the identity unless
+		something like a constraint shears the bone.
+		'''
+		armRotInv = self.armRot.inverse()
+		armSize = self.armSize
+		result = {}
+		for name in self.bones:
+			m = poseMats[name]
+			parentName = self.parents[name]
+			if parentName == None: chanMat = matMul(m, rigidInverse(self.restMats[name]))
+			else: chanMat = matMul(matMul(m, affineInverse(poseMats[parentName])), rigidInverse(self.offsets[name]))
+			rotMat, stretch = polarDecompose(chanMat)
+			factors, axes = symmetricEigen(stretch)
+			q = matToQuat(axes)
+			scaleRot = Quaternion(q[1], q[2], q[3], q[0])
+			if parentName == None:
+				# same as getAllBoneLocRotLS, the bone's own scale does not upset it
+				trans = self.armRot.apply(Vector(m[3][0], m[3][1], m[3][2]))
+				loc = Vector(trans[0]*armSize[0], trans[1]*armSize[1], trans[2]*armSize[2]) + self.armLoc - self.restPosWS[name]
+				rotWS = armRotInv * toTorqueQuat(matToQuat(m)).inverse()
+				rot = (rotWS.inverse() * self.restRotWS[name].inverse()).inverse()
+			else:
+				# the channel's location, in the parent's space
+				offset = self.offsets[name]
+				t = [chanMat[3][0]*offset[0][j] + chanMat[3][1]*offset[1][j] + chanMat[3][2]*offset[2][j] for j in range(0, 3)]
+				loc = Vector(t[0]*armSize[0], t[1]*armSize[1], t[2]*armSize[2])
+				q = matToQuat(rotMat)
+				rot = Quaternion(q[1], q[2], q[3], q[0])
+			result[name] = (loc, rot, Vector(factors[0], factors[1], factors[2]), scaleRot)
+		return result
+
+def removeScales(offsetIn, chain):
+	# Same as DtsPoseUtilClass.removeScales
+	offsetAccum = offsetIn
+	for rot, scaleInv in chain:
+		offsetAccum = rot.apply(offsetAccum)
+		offsetAccum = Vector(offsetAccum[0] * scaleInv[0], offsetAccum[1] * scaleInv[1], offsetAccum[2] * scaleInv[2])
+		offsetAccum = rot.inverse().apply(offsetAccum)
+	return offsetAccum
+
+# rough memory used by one bone's cached pose (loc, rot, scale and the dictionary entry)
+POSE_BYTES_PER_BONE = 600
+
+class PoseCache:
+	'''
+	Holds the local space pose of every bone of an armature, keyed by
+	(armature, action, frame), so frames used by more than one sequence are
+	only evaluated once per export.  The least recently used poses are dropped
+	once the cache grows past maxMB.
+	'''
+	def __init__(self, maxMB):
+		self.maxBytes = int(maxMB * 1048576)
+		self.entries = {}	# key -> [bone poses, last use]
+		self.size = 0
+		self.clock = 0
+		self.hits = 0
+		self.misses = 0
+
+	def has(self, armName, actionKey, frame):
+		return (armName, actionKey, frame) in self.entries
+
+	def get(self, armName, actionKey, frame):
+		try: entry = self.entries[(armName, actionKey, frame)]
+		except KeyError:
+			self.misses += 1
+			return None
+		self.hits += 1
+		self.clock += 1
+		entry[1] = self.clock
+		return entry[0]
+
+	def put(self, armName, actionKey, frame, bonePoses):
+		if self.maxBytes <= 0: return
+		key = (armName, actionKey, frame)
+		if key in self.entries: self.size -= len(self.entries[key][0]) * POSE_BYTES_PER_BONE
+		self.clock += 1
+		self.entries[key] = [bonePoses, self.clock]
+		self.size += len(bonePoses) * POSE_BYTES_PER_BONE
+		if self.size > self.maxBytes: self.evict()
+
+	def evict(self):
+		# drop the oldest poses until there is some room again
+		order = [(entry[1], key) for key, entry in self.entries.items()]
+		order.sort()
+		target = self.maxBytes * 0.9
+		for stamp, key in order:
+			if self.size <= target: break
+			self.size -= len(self.entries[key][0]) * POSE_BYTES_PER_BONE
+			del self.entries[key]
+
+def evaluatePoses(job):
+	'''
+	The poses of a rig for a list of channel dictionaries, job being
+	(rig, channels of each frame, decompose).  With decompose set the pose
+	matrices are taken apart as FKRig.decomposePose does.
+	'''
+	rig, frameChannels, decompose = job
+	poses = []
+	for channels in frameChannels:
+		if decompose: poses.append(rig.decomposePose(rig.getPoseMatrices(channels)))
+		else: poses.append(rig.getArmaturePose(channels))
+	return poses
+
+def canForkWorkers():
+	# Workers that aren't forked start a fresh sys.executable, which
+	# inside Blender is Blender itself rather than a Python interpreter
+	if not hasattr(os, 'fork'): return False
+	try: return multiprocessing.get_start_method() == 'fork'
+	except AttributeError: return True
+
+def evaluatePosesParallel(jobs, numWorkers):
+	'''
+	Runs evaluatePoses on every job, spread over numWorkers worker
+	processes, and returns the results in the order of the jobs.  Everything
+	is evaluated in this process instead if there is only one worker, no
+	multiprocessing module, no way to fork the workers, or the workers fail.
+	'''
+	if multiprocessing != None and numWorkers > 1 and len(jobs) > 1 and canForkWorkers():
+		try: pool = multiprocessing.Pool(min(numWorkers, len(jobs)))
+		except: pool = None
+		if pool != None:
+			try:
+				try:
+					results = pool.map(evaluatePoses, jobs)
+					pool.close()
+					return results
+				except:
+					pool.terminate()
+			finally:
+				pool.join()
+	return [evaluatePoses(job) for job in jobs]
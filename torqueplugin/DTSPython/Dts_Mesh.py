@@ -25,6 +25,8 @@ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 from Dts_Stream import *
 from Torque_Util import *
 import Dts_Stripper
+import Dts_Decimate
+import Dts_ConvexHull
 import math
 import copy
 
@@ -70,6 +72,7 @@ class DtsMesh:
 	smUseTriangles = False
 	smUseOneStrip = False
 	smMaxStripSize = 7
+	smMaxIndices = 32748		# Primitives store their first element and size as signed 16 bit values
 
 	# Mesh types
 	T_Standard  = 0			# Standard meshes can be moved by bones, but not be deformed by them
@@ -106,6 +109,7 @@ class DtsMesh:
 		self.vweight = array('f')	# Vertex weights
 		self.nodeIndex = array('i')	# Node indexes for node transforms (skin mesh)
 		self.nodeTransforms = []	# Node transforms
+		self.nodeLookup = {}		# Node -> index into nodeIndex, see getVertexBone
 		self.texgenS = []		# TexGen (U)  (decals)
 		self.texgenT = [] 		# TexGen (V)  (decals)
 		self.materialIndex = 0		# Material index (decals)
@@ -137,6 +141,7 @@ class DtsMesh:
 		del self.vweight
 		del self.nodeIndex
 		del self.nodeTransforms
+		del self.nodeLookup
 		del self.texgenS
 		del self.texgenT
 		del self.clusters
@@ -259,7 +264,44 @@ class DtsMesh:
 		self.calculateBounds()
 		self.calculateCenter()
 		self.calculateRadius()
-	
+
+	def transform(self, trans, rot=None):
+		# Applies a rigid transform to the mesh in a single pass.
+		# Either pass a MatrixF as trans, or a translation Vector and a
+		# Quaternion; in the latter case verts become rot(v + trans),
+		# which is the same as calling translate() and then rotate().
+		if rot is None:
+			m = trans.members
+			r0, r1, r2 = m[0], m[1], m[2]
+			r3, r4, r5 = m[4], m[5], m[6]
+			r6, r7, r8 = m[8], m[9], m[10]
+			t0, t1, t2 = m[12], m[13], m[14]
+		else:
+			# Build the rotation basis once rather than per vertex
+			ex = rot.apply(Vector(1.0, 0.0, 0.0)).members
+			ey = rot.apply(Vector(0.0, 1.0, 0.0)).members
+			ez = rot.apply(Vector(0.0, 0.0, 1.0)).members
+			r0, r1, r2 = ex[0], ex[1], ex[2]
+			r3, r4, r5 = ey[0], ey[1], ey[2]
+			r6, r7, r8 = ez[0], ez[1], ez[2]
+			tx, ty, tz = trans.members[0], trans.members[1], trans.members[2]
+			t0 = tx*r0 + ty*r3 + tz*r6
+			t1 = tx*r1 + ty*r4 + tz*r7
+			t2 = tx*r2 + ty*r5 + tz*r8
+
+		verts = self.verts
+		normals = self.normals
+		numNormals = len(normals)
+		for v in range(0, len(verts)):
+			x, y, z = verts[v].members
+			verts[v] = Vector(x*r0 + y*r3 + z*r6 + t0, x*r1 + y*r4 + z*r7 + t1, x*r2 + y*r5 + z*r8 + t2)
+			if v < numNormals:
+				x, y, z = normals[v].members
+				normals[v] = Vector(x*r0 + y*r3 + z*r6, x*r1 + y*r4 + z*r7, x*r2 + y*r5 + z*r8)
+		self.calculateBounds()
+		self.calculateCenter()
+		self.calculateRadius()
+
 	def setCenter(self, c):
 		self.center = c
 	
@@ -312,17 +354,29 @@ class DtsMesh:
 			if distance > self.radius:
 				self.radius = distance
 
+	def calculateBoundingSphere(self):
+		# Replaces the box centered sphere with the minimal enclosing one.
+		# Bounds are left alone, they are still the axis aligned box.
+		if len(self.verts) == 0: return
+		self.center, self.radius = calcBoundingSphere(self.verts)
+
 	def getVertexBone(self, node):
 		# Finds the bone index in the table, or adds it if it's
 		# not there.  The vertex bone & nodeIndex list are here to
 		# track which bones are used by this mesh.
-		b = 0
-		while b < len(self.nodeIndex):
-			if self.nodeIndex[b] == node:
-				return b
-			b += 1
+		try: return self.nodeLookup[node]
+		except KeyError: pass
+		# The lookup is rebuilt if nodeIndex was filled in some other way
+		if len(self.nodeLookup) != len(self.nodeIndex):
+			self.nodeLookup = {}
+			for b in range(len(self.nodeIndex)-1, -1, -1):
+				self.nodeLookup[self.nodeIndex[b]] = b
+			try: return self.nodeLookup[node]
+			except KeyError: pass
+		b = len(self.nodeIndex)
 		self.nodeIndex.append(node)
 		self.nodeTransforms.append(MatrixF().identity())
+		self.nodeLookup[node] = b
 		return b
 	
 	def encodeNormal(self, p):
@@ -767,6 +821,442 @@ class DtsMesh:
 
 		return newinds, newprims
 
+	def getTriangles(self):
+		# Returns every face as [a, b, c, matindex, primitive index], unwinding strips
+		tris = []
+		for p in range(0, len(self.primitives)):
+			prim = self.primitives[p]
+			start, end = prim.firstElement, prim.firstElement + prim.numElements
+			if (prim.matindex & prim.Strip) and prim.numElements > 3:
+				front = True
+				for i in range(start+2, end):
+					if front: tris.append([self.indices[i-2], self.indices[i-1], self.indices[i], prim.matindex, p])
+					else: tris.append([self.indices[i], self.indices[i-1], self.indices[i-2], prim.matindex, p])
+					front = not front
+			else:
+				for i in range(start, end - 2, 3):
+					tris.append([self.indices[i], self.indices[i+1], self.indices[i+2], prim.matindex, p])
+		return tris
+
+	def removeDegenerates(self):
+		'''
+		Removes faces with no area (repeated vertices, vertices welded to
+		the same position, or all on one line) and faces repeating another
+		face of the same material with the same winding, then drops the
+		vertices no longer used. Strips come back as triangle lists, so
+		call this before stripping or sorting.
+		Returns (number of degenerate faces, number of duplicate faces).
+		'''
+		if self.numFrames > 1 or len(self.primitives) == 0: return 0, 0
+		tris = self.getTriangles()
+		keep = []
+		seen = {}
+		numDegenerate, numDuplicate = 0, 0
+		for t in range(0, len(tris)):
+			a, b, c, matindex = tris[t][0:4]
+			if a == b or b == c or a == c:
+				numDegenerate += 1
+				continue
+			pa, pb, pc = self.verts[a].members, self.verts[b].members, self.verts[c].members
+			ux, uy, uz = pb[0]-pa[0], pb[1]-pa[1], pb[2]-pa[2]
+			vx, vy, vz = pc[0]-pa[0], pc[1]-pa[1], pc[2]-pa[2]
+			nx, ny, nz = uy*vz - uz*vy, uz*vx - ux*vz, ux*vy - uy*vx
+			# Compared to the edge lengths, so thin faces on large meshes and
+			# small faces on tiny meshes are treated alike
+			if (nx*nx + ny*ny + nz*nz) <= 1e-12 * (ux*ux + uy*uy + uz*uz) * (vx*vx + vy*vy + vz*vz):
+				numDegenerate += 1
+				continue
+			# Rotate so the smallest index is first, keeping the winding
+			if b < a and b < c: a, b, c = b, c, a
+			elif c < a and c < b: a, b, c = c, a, b
+			key = (matindex & (Primitive.MaterialMask | Primitive.NoMaterial), a, b, c)
+			if key in seen:
+				numDuplicate += 1
+				continue
+			seen[key] = True
+			keep.append(t)
+		if numDegenerate + numDuplicate == 0: return 0, 0
+
+		# Compact the vertices, keeping them in order of first use
+		influences = self.getInfluenceLists()
+		remap = {}
+		verts, tverts, normals, enormals = [], [], [], array(self.enormals.typecode)
+		vindex, bindex, vweight = array('i'), array('i'), array('f')
+		indices = array(self.indices.typecode)
+		primitives = []
+		lastPrim = None
+		for t in keep:
+			tri = tris[t]
+			for v in tri[0:3]:
+				try: nv = remap[v]
+				except KeyError:
+					nv = remap[v] = len(verts)
+					verts.append(self.verts[v])
+					if v < len(self.tverts): tverts.append(self.tverts[v])
+					if v < len(self.normals): normals.append(self.normals[v])
+					if v < len(self.enormals): enormals.append(self.enormals[v])
+					for b, w in influences.get(v, []):
+						vindex.append(nv)
+						bindex.append(b)
+						vweight.append(w)
+				indices.append(nv)
+			# Remaining faces of the same source primitive share one primitive
+			if lastPrim == tri[4]:
+				primitives[-1].numElements += 3
+			else:
+				matindex = (tri[3] & ~Primitive.TypeMask) | Primitive.Triangles | Primitive.Indexed
+				primitives.append(Primitive(len(indices)-3, 3, matindex))
+				lastPrim = tri[4]
+		self.verts, self.tverts, self.normals, self.enormals = verts, tverts, normals, enormals
+		self.vindex, self.bindex, self.vweight = vindex, bindex, vweight
+		self.indices, self.primitives = indices, primitives
+		self.vertsPerFrame = len(self.verts)
+		self.calculateBounds()
+		self.calculateCenter()
+		self.calculateRadius()
+		return numDegenerate, numDuplicate
+
+	def batchPrimitives(self):
+		'''
+		Reorders the faces by material, keeping their order within each
+		material, and puts all faces of a material in one triangle list
+		primitive. Returns the number of primitives before and after.
+		'''
+		before = len(self.primitives)
+		if before < 2 or self.mtype == self.T_Sorted: return before, before
+		groups = {}
+		order = []
+		for tri in self.getTriangles():
+			key = tri[3] & ~Primitive.TypeMask
+			try: groups[key].append(tri)
+			except KeyError:
+				groups[key] = [tri]
+				order.append(key)
+		indices = array(self.indices.typecode)
+		primitives = []
+		for key in order:
+			primitives.append(Primitive(len(indices), len(groups[key]) * 3, key | Primitive.Triangles | Primitive.Indexed))
+			for tri in groups[key]:
+				indices.append(tri[0])
+				indices.append(tri[1])
+				indices.append(tri[2])
+		self.indices, self.primitives = indices, primitives
+		return before, len(primitives)
+
+	def splitMesh(self, maxIndices=None):
+		'''
+		Splits the mesh into parts that fit the 16 bit index and primitive
+		limits of the format. Faces are grouped by material and walked in
+		connected order, so each part is a contiguous patch of surface.
+		Every part keeps the full node palette and its vertices' influences.
+		Parts come back with 16 bit indices. Returns [self] if no split is
+		needed.
+		'''
+		if maxIndices == None: maxIndices = self.smMaxIndices
+		if (len(self.indices) <= maxIndices and len(self.verts) <= 0xFFFF) or self.numFrames > 1:
+			self.narrowIndices()
+			return [self]
+
+		tris = self.getTriangles()
+		# Bucket faces by material, in order of first appearance
+		matOrder = []
+		matTris = {}
+		for t in range(0, len(tris)):
+			mat = tris[t][3] & (Primitive.MaterialMask | Primitive.NoMaterial)
+			try: matTris[mat].append(t)
+			except KeyError:
+				matTris[mat] = [t]
+				matOrder.append(mat)
+
+		# Walk each material's faces across shared vertices
+		order = []
+		for mat in matOrder:
+			vertTris = {}
+			for t in matTris[mat]:
+				for v in tris[t][0:3]:
+					try: vertTris[v].append(t)
+					except KeyError: vertTris[v] = [t]
+			visited = {}
+			for seed in matTris[mat]:
+				if seed in visited: continue
+				visited[seed] = True
+				queue = [seed]
+				q = 0
+				while q < len(queue):
+					t = queue[q]
+					q += 1
+					order.append(t)
+					for v in tris[t][0:3]:
+						for n in vertTris[v]:
+							if n in visited: continue
+							visited[n] = True
+							queue.append(n)
+
+		# Greedily fill parts
+		chunks = []
+		chunk = None
+		for t in order:
+			if chunk != None:
+				newVerts = 0
+				for v in tris[t][0:3]:
+					if not (v in used): newVerts += 1
+				if (len(chunk)+1) * 3 > maxIndices or len(used) + newVerts > 0xFFFF:
+					chunk = None
+			if chunk == None:
+				chunk = []
+				used = {}
+				chunks.append(chunk)
+			chunk.append(t)
+			for v in tris[t][0:3]: used[v] = True
+
+		influences = self.getInfluenceLists()
+		parts = []
+		for chunk in chunks:
+			part = self.makePart(tris, chunk, influences)
+			part.narrowIndices()
+			parts.append(part)
+		return parts
+
+	def narrowIndices(self):
+		# Switches 32 bit indices back to 16 bit, if they fit
+		if self.indices.typecode == 'H': return
+		if len(self.indices) == 0 or max(self.indices) <= 0xFFFF:
+			self.indices = array('H', self.indices)
+
+	def splitBonePalette(self, maxBones):
+		'''
+		Splits a skin mesh into parts that use at most maxBones nodes each,
+		for engines with a fixed skinning palette. Faces are bucketed by the
+		set of bones their vertices use and greedily clustered, starting new
+		parts only when no remaining bucket fits. Each part carries just its
+		own nodes. Returns [self] if no split is needed.
+		'''
+		if self.mtype != self.T_Skin or maxBones < 1 or len(self.nodeIndex) <= maxBones or self.numFrames > 1:
+			return [self]
+
+		influences = self.getInfluenceLists()
+		tris = self.getTriangles()
+		# Bucket faces by the bones they need
+		buckets = {}
+		bucketOrder = []
+		for t in range(0, len(tris)):
+			bones = {}
+			for v in tris[t][0:3]:
+				for b, w in influences.get(v, []): bones[b] = True
+			key = bones.keys()
+			key.sort()
+			key = tuple(key)
+			try: buckets[key].append(t)
+			except KeyError:
+				buckets[key] = [t]
+				bucketOrder.append(key)
+
+		numOverLimit = 0
+		chunks = []
+		while len(bucketOrder) > 0:
+			# Seed with the biggest remaining bucket
+			seed = bucketOrder[0]
+			for key in bucketOrder:
+				if len(buckets[key]) > len(buckets[seed]): seed = key
+			bones = {}
+			for b in seed: bones[b] = True
+			if len(seed) > maxBones: numOverLimit += len(buckets[seed])
+			chunk = buckets[seed]
+			bucketOrder.remove(seed)
+			# Keep adding the bucket that needs the fewest extra bones
+			while len(bucketOrder) > 0:
+				best = None
+				for key in bucketOrder:
+					extra = 0
+					for b in key:
+						if not (b in bones): extra += 1
+					if len(bones) + extra > maxBones: continue
+					if best == None or extra < bestExtra or (extra == bestExtra and len(buckets[key]) > len(buckets[best])):
+						best, bestExtra = key, extra
+				if best == None: break
+				for b in best: bones[b] = True
+				chunk = chunk + buckets[best]
+				bucketOrder.remove(best)
+			chunk.sort()
+			nodes = bones.keys()
+			nodes.sort()
+			chunks.append((chunk, nodes))
+
+		if numOverLimit > 0:
+			Torque_Util.dump_writeWarning("Warning: %d face(s) use more than %d bones and could not be split to fit the bone palette!" % (numOverLimit, maxBones))
+		parts = []
+		for chunk, nodes in chunks:
+			parts.append(self.makePart(tris, chunk, influences, nodes))
+		return parts
+
+	def limitInfluences(self, maxInfluences=4, minWeight=0.0, quantize=False):
+		'''
+		Cleans up skin weights: drops influences below minWeight, keeps
+		at most maxInfluences per vertex (0 for no limit), renormalizes,
+		and sorts each vertex's influences by descending weight. With
+		quantize set, weights are snapped to multiples of 1/255 which still
+		sum to one. Returns histograms {influence count: vertices} from
+		before and after.
+		'''
+		before = {}
+		after = {}
+		if self.mtype != self.T_Skin: return before, after
+		influences = self.getInfluenceLists()
+		vindex, bindex, vweight = array('i'), array('i'), array('f')
+		verts = influences.keys()
+		verts.sort()
+		for v in verts:
+			infs = influences[v]
+			before[len(infs)] = before.get(len(infs), 0) + 1
+			# Merge duplicate bones, then sort by weight, biggest first
+			merged = {}
+			for b, w in infs: merged[b] = merged.get(b, 0.0) + w
+			infs = [(w, b) for b, w in merged.items()]
+			infs.sort()
+			infs.reverse()
+			# Always keep the biggest influence
+			kept = infs[0:1]
+			for w, b in infs[1:]:
+				if w >= minWeight: kept.append((w, b))
+			if maxInfluences > 0: kept = kept[0:maxInfluences]
+			total = 0.0
+			for w, b in kept: total += w
+			if total <= 0.000001:
+				kept = [(1.0, kept[0][1])]
+				total = 1.0
+			weights = [w / total for w, b in kept]
+			if quantize:
+				# Round to 8 bits, then hand any rounding error to the biggest weight
+				steps = [int(w * 255.0 + 0.5) for w in weights]
+				steps[0] += 255 - sum(steps)
+				weights = [st / 255.0 for st in steps]
+				# Zeroed out influences are dropped entirely
+				kept = [kept[i] for i in range(0, len(kept)) if steps[i] > 0]
+				weights = [weights[i] for i in range(0, len(weights)) if steps[i] > 0]
+			after[len(kept)] = after.get(len(kept), 0) + 1
+			for i in range(0, len(kept)):
+				vindex.append(v)
+				bindex.append(kept[i][1])
+				vweight.append(weights[i])
+		self.vindex, self.bindex, self.vweight = vindex, bindex, vweight
+
+		# Drop nodes that no longer influence anything
+		used = {}
+		for b in bindex: used[b] = True
+		if len(used) < len(self.nodeIndex):
+			remap = {}
+			nodeIndex, nodeTransforms = array('i'), []
+			for b in range(0, len(self.nodeIndex)):
+				if not (b in used): continue
+				remap[b] = len(nodeIndex)
+				nodeIndex.append(self.nodeIndex[b])
+				nodeTransforms.append(self.nodeTransforms[b])
+			for i in range(0, len(bindex)):
+				bindex[i] = remap[bindex[i]]
+			self.nodeIndex, self.nodeTransforms = nodeIndex, nodeTransforms
+			self.nodeLookup = {}
+		return before, after
+
+	def decimate(self, targetFaces):
+		# Returns a simplified copy of the mesh with about targetFaces
+		# triangles, see Dts_Decimate. Strips come back as triangle lists.
+		tris = Dts_Decimate.decimate(self, targetFaces)
+		return self.makePart(tris, range(0, len(tris)), self.getInfluenceLists())
+
+	def getInfluenceLists(self):
+		# Map of vertex index -> [(bone index, weight), ...]
+		influences = {}
+		for i in range(0, len(self.vindex)):
+			try: influences[self.vindex[i]].append((self.bindex[i], self.vweight[i]))
+			except KeyError: influences[self.vindex[i]] = [(self.bindex[i], self.vweight[i])]
+		return influences
+
+	def buildHull(self, points, maxVerts=0):
+		'''
+		Fills this mesh with the convex hull of points, for use as a
+		collision mesh. maxVerts limits the number of hull vertices, see
+		Dts_ConvexHull. Returns False if the points don't enclose a volume.
+		'''
+		hull = Dts_ConvexHull.convexHull(points, maxVerts)
+		if hull == None: return False
+		hullPts, hullFaces = hull
+		cx, cy, cz = 0.0, 0.0, 0.0
+		for p in hullPts:
+			cx, cy, cz = cx + p[0], cy + p[1], cz + p[2]
+		centroid = Vector(cx / len(hullPts), cy / len(hullPts), cz / len(hullPts))
+		for p in hullPts:
+			vert = Vector(p[0], p[1], p[2])
+			normal = vert - centroid
+			if normal.length() > 0.0: normal = normal.normalize()
+			self.verts.append(vert)
+			self.tverts.append(Vector2(0.0, 0.0))
+			self.normals.append(normal)
+			self.enormals.append(self.encodeNormal(normal))
+		# Hull faces are counter clockwise, dts faces are clockwise
+		self.primitives.append(Primitive(len(self.indices), len(hullFaces) * 3, Primitive.Triangles | Primitive.Indexed | Primitive.NoMaterial))
+		for a, b, c in hullFaces:
+			self.indices.append(c)
+			self.indices.append(b)
+			self.indices.append(a)
+		self.vertsPerFrame = len(self.verts)
+		self.calculateBounds()
+		self.calculateCenter()
+		self.calculateRadius()
+		return True
+
+	def makePart(self, tris, chunk, influences, nodes=None):
+		'''
+		Builds a new mesh from the faces in chunk (indices into tris, as
+		returned by getTriangles), with the same settings as this one.
+		If nodes is given, only those entries of the node palette are kept
+		and the bone indices are remapped to match. Parts get 32 bit
+		indices, so they may go through splitMesh afterwards.
+		'''
+		part = DtsMesh(self.mtype)
+		part.indices = array('i')
+		part.flags = self.flags
+		part.matFrames = self.matFrames
+		part.alwaysWriteDepth = self.alwaysWriteDepth
+		try: part.mainMaterial = self.mainMaterial
+		except AttributeError: pass
+		if nodes == None: nodes = range(0, len(self.nodeIndex))
+		boneRemap = {}
+		for b in nodes:
+			boneRemap[b] = len(part.nodeIndex)
+			part.nodeIndex.append(self.nodeIndex[b])
+			part.nodeTransforms.append(self.nodeTransforms[b].copy())
+
+		remap = {}
+		lastPrim = None
+		for t in chunk:
+			tri = tris[t]
+			for v in tri[0:3]:
+				try: nv = remap[v]
+				except KeyError:
+					nv = remap[v] = len(part.verts)
+					part.verts.append(self.verts[v])
+					if v < len(self.tverts): part.tverts.append(self.tverts[v])
+					if v < len(self.normals): part.normals.append(self.normals[v])
+					if v < len(self.enormals): part.enormals.append(self.enormals[v])
+					for b, w in influences.get(v, []):
+						part.vindex.append(nv)
+						part.bindex.append(boneRemap[b])
+						part.vweight.append(w)
+				part.indices.append(nv)
+			# Consecutive faces from the same source primitive share one primitive
+			if lastPrim == tri[4]:
+				part.primitives[-1].numElements += 3
+			else:
+				matindex = (tri[3] & ~Primitive.TypeMask) | Primitive.Triangles | Primitive.Indexed
+				part.primitives.append(Primitive(len(part.indices)-3, 3, matindex))
+				lastPrim = tri[4]
+
+		part.vertsPerFrame = len(part.verts)
+		part.calculateBounds()
+		part.calculateCenter()
+		part.calculateRadius()
+		return part
+
 	'''
 	Triangle Strip Code
 	'''
@@ -0,0 +1,141 @@
+'''
+Dts_Sampling.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+from math import sqrt, acos, sin, degrees
+
+#############################
+# Torque Game Engine
+# -------------------------------
+# Keyframe Sampling for Python
+#############################
+
+'''
+- Picks how many evenly spaced keyframes a sampled animation needs
+
+Tracks are lists of tuples, one per densely sampled frame: (x, y, z) for
+translations and scales, (x, y, z, w) for rotations. Keys are spread evenly
+from the first to the last sample, and between keys the engine lerps
+translations and scales and slerps rotations, which is what the error is
+measured against.
+'''
+
+def lerp(a, b, t):
+	return tuple([a[i] + (b[i] - a[i]) * t for i in range(0, len(a))])
+
+def slerp(a, b, t):
+	cosOmega = a[0]*b[0] + a[1]*b[1] + a[2]*b[2] + a[3]*b[3]
+	if cosOmega < 0.0:
+		b = (-b[0], -b[1], -b[2], -b[3])
+		cosOmega = -cosOmega
+	if cosOmega > 0.9999:
+		# Close enough for a normalized lerp
+		q = lerp(a, b, t)
+	else:
+		omega = acos(cosOmega)
+		sa, sb = sin((1.0 - t) * omega), sin(t * omega)
+		q = tuple([a[i]*sa + b[i]*sb for i in range(0, 4)])
+	length = sqrt(q[0]*q[0] + q[1]*q[1] + q[2]*q[2] + q[3]*q[3])
+	return (q[0]/length, q[1]/length, q[2]/length, q[3]/length)
+
+def sampleTrack(track, pos, isRotation):
+	# Value of the track at a fractional sample position
+	i = int(pos)
+	if i >= len(track) - 1: return track[-1]
+	t = pos - i
+	if t <= 0.0: return track[i]
+	if isRotation: return slerp(track[i], track[i+1], t)
+	return lerp(track[i], track[i+1], t)
+
+def resampleTrack(track, numKeys):
+	# Evenly spaced keys from the first sample to the last
+	if numKeys < 2: return [track[0]]
+	step = float(len(track) - 1) / (numKeys - 1)
+	isRotation = len(track[0]) == 4
+	return [sampleTrack(track, k * step, isRotation) for k in range(0, numKeys)]
+
+def valueError(a, b):
+	# Angle in degrees between rotations, distance between vectors
+	if len(a) == 4:
+		d = abs(a[0]*b[0] + a[1]*b[1] + a[2]*b[2] + a[3]*b[3])
+		if d >= 1.0: return 0.0
+		return degrees(2.0 * acos(d))
+	return sqrt((a[0]-b[0])**2 + (a[1]-b[1])**2 + (a[2]-b[2])**2)
+
+def trackError(track, keys, limit=None):
+	'''
+	Largest error between the samples of track and the curve through keys.
+	Stops early once the error passes limit.
+	'''
+	if len(keys) < 2:
+		worst = 0.0
+		for value in track:
+			worst = max(worst, valueError(value, keys[0]))
+			if limit != None and worst > limit: break
+		return worst
+	isRotation = len(track[0]) == 4
+	scale = float(len(keys) - 1) / (len(track) - 1)
+	worst = 0.0
+	for j in range(0, len(track)):
+		worst = max(worst, valueError(track[j], sampleTrack(keys, j * scale, isRotation)))
+		if limit != None and worst > limit: break
+	return worst
+
+def tracksFit(tracks, limits, numKeys, order):
+	# Whether numKeys keys reproduce every track within its limit. order is
+	# the order to try the tracks in; the track that fails is moved to the
+	# front, so the next count tried fails fast if it is also too few.
+	for i in range(0, len(order)):
+		t = order[i]
+		if trackError(tracks[t], resampleTrack(tracks[t], numKeys), limits[t]) > limits[t]:
+			order.insert(0, order.pop(i))
+			return False
+	return True
+
+def chooseKeyCount(tracks, limits):
+	'''
+	Finds the smallest number of evenly spaced keys that reproduces every
+	track within its error limit; limits[i] is the limit for tracks[i], in
+	degrees for rotations and in the track's own units otherwise. tracks
+	are all sampled on the same frames. More keys can make the error worse
+	when the motion lines up with the key spacing, so a bisection only gives
+	a count that is known to fit, and the counts below it are tried in turn.
+	Returns (number of keys, [largest error of each track]).
+	'''
+	numSamples = 0
+	for track in tracks: numSamples = max(numSamples, len(track))
+	if numSamples < 3: return numSamples, [0.0] * len(tracks)
+	order = range(0, len(tracks))
+	# Every sample as a key is exact, so the search starts with that as the bound
+	low, high = 2, numSamples
+	while low < high:
+		mid = (low + high) / 2
+		if tracksFit(tracks, limits, mid, order): high = mid
+		else: low = mid + 1
+	numKeys = high
+	for count in range(2, high):
+		if tracksFit(tracks, limits, count, order):
+			numKeys = count
+			break
+	if numKeys == numSamples: return numSamples, [0.0] * len(tracks)
+	return numKeys, [trackError(track, resampleTrack(track, numKeys)) for track in tracks]
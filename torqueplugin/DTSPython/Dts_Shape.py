@@ -624,7 +624,22 @@ class DtsShape:
 				# advance decal, try again
 				return self.checkSkip(meshNum, curObject, curDecal+1, skipDL)
 		return False
-	
+
+	def getQuatTracks(self):
+		# Returns the (first key, number of keys) runs of the node rotation,
+		# arbitrary scale rotation and ground rotation keys, for quantizeQuats
+		rotationTracks, scaleRotTracks, groundTracks = [], [], []
+		for seq in self.sequences:
+			if seq.baseRotation >= 0:
+				for r in range(0, seq.countNodes(0)):
+					rotationTracks.append((seq.baseRotation + r*seq.numKeyFrames, seq.numKeyFrames))
+			if seq.baseScale >= 0 and (seq.flags & Sequence.ArbitraryScale):
+				for r in range(0, seq.countNodes(2)):
+					scaleRotTracks.append((seq.baseScale + r*seq.numKeyFrames, seq.numKeyFrames))
+			if seq.firstGroundFrame >= 0:
+				groundTracks.append((seq.firstGroundFrame, seq.numGroundFrames))
+		return rotationTracks, scaleRotTracks, groundTracks
+
 	def write(self, dstream):
 		# In this function, we write to the dstream, flush it, then write_end
 		# Write Counts...
@@ -721,8 +736,8 @@ class DtsShape:
 		# Get any node sequence data stored in shape
 		for cnt in self.nodeTranslations:
 			dstream.writePoint3F(cnt)
-		for cnt in self.nodeRotations:
-			dstream.writeQuat16(cnt)
+		rotationTracks, scaleRotTracks, groundTracks = self.getQuatTracks()
+		dstream.writeQuat16Array(self.nodeRotations, rotationTracks)
 			
 		dstream.storeCheck()
 		
@@ -733,21 +748,17 @@ class DtsShape:
 			dstream.writePoint3F(cnt)
 		for cnt in self.nodeAbitraryScaleFactors:
 			dstream.writePoint3F(cnt)
-		for cnt in self.nodeAbitraryScaleRots:
-			dstream.writeQuat16(cnt)
+		dstream.writeQuat16Array(self.nodeAbitraryScaleRots, scaleRotTracks)
 			
 		dstream.storeCheck()
 		
-		for cnt in self.groundTranslations:
-			dstream.writePoint3F(cnt)
-		for cnt in self.groundRotations:
-			dstream.writeQuat16(cnt)
+		dstream.writePoint3FArray(self.groundTranslations)
+		dstream.writeQuat16Array(self.groundRotations, groundTracks)
 			
 		dstream.storeCheck()
 		
 		# Object States
-		for cnt in self.objectstates:
-			dstream.writeObjectState(cnt)
+		dstream.writeObjectStateArray(self.objectstates)
 			
 		dstream.storeCheck()
 		
@@ -1095,6 +1106,18 @@ class DtsShape:
 			
 		self.radius = maxRadius
 	
+	def calculateBoundingSphere(self):
+		# Minimal sphere around every mesh in shape space. Sets both
+		# the center and radius, so call calculateTubeRadius afterwards.
+		points = []
+		for ob in self.objects:
+			trans, rot = self.getNodeWorldPosRot(ob.node)
+			for j in range(0, ob.numMeshes):
+				for vert in self.meshes[ob.firstMesh + j].verts:
+					points.append(rot.apply(vert) + trans)
+		if len(points) == 0: return
+		self.center, self.radius = calcBoundingSphere(points)
+	
 	def calculateTubeRadius(self):
 		maxRadius = float(0.0)
 		for ob in self.objects:
@@ -1158,6 +1181,55 @@ class DtsShape:
 			rot = self.defaultRotations[nod] * rot
 		return trans, rot
 	
+	def shareMeshData(self):
+		'''
+		Points meshes whose vertex data is identical to, or a prefix of,
+		an earlier mesh at that mesh via DtsMesh.parent, so the data is
+		only written once. Skin meshes must match their parent exactly,
+		since the weights and node transforms are shared as well.
+		Returns (number of meshes sharing, approximate bytes saved).
+		'''
+		numShared = 0
+		bytesSaved = 0
+		# Candidate parents, bucketed by mesh type and first vertex
+		buckets = {}
+		for i in range(0, len(self.meshes)):
+			mesh = self.meshes[i]
+			if mesh.mtype == mesh.T_Null or mesh.mtype == mesh.T_Decal: continue
+			if mesh.parent >= 0 or len(mesh.verts) == 0: continue
+			verts = [tuple(v.members) for v in mesh.verts]
+			tverts = [tuple(v.members) for v in mesh.tverts]
+			normals = [tuple(v.members) for v in mesh.normals]
+			if mesh.mtype == mesh.T_Skin:
+				skin = (mesh.vindex.tolist(), mesh.bindex.tolist(), mesh.vweight.tolist(), mesh.nodeIndex.tolist(),
+					[tuple(m.members) for m in mesh.nodeTransforms])
+			else: skin = None
+			key = (mesh.mtype == mesh.T_Skin, verts[0])
+			found = None
+			try: candidates = buckets[key]
+			except KeyError: candidates = buckets[key] = []
+			for cand in candidates:
+				pverts, ptverts, pnormals, pskin = cand[1:]
+				if skin != None:
+					if len(pverts) != len(verts) or skin != pskin: continue
+				elif len(pverts) < len(verts) or len(ptverts) < len(tverts) or len(pnormals) < len(normals):
+					continue
+				if pverts[:len(verts)] != verts: continue
+				if ptverts[:len(tverts)] != tverts: continue
+				if pnormals[:len(normals)] != normals: continue
+				found = cand[0]
+				break
+			if found == None:
+				candidates.append((i, verts, tverts, normals, skin))
+				continue
+			mesh.parent = found
+			numShared += 1
+			# points and normals are 12 bytes, uvs 8, plus the encoded normal byte
+			bytesSaved += len(verts) * 12 + len(tverts) * 8 + len(normals) * 13
+			if skin != None:
+				bytesSaved += len(mesh.nodeTransforms) * 64 + len(mesh.vindex) * 12 + len(mesh.nodeIndex) * 4
+		return numShared, bytesSaved
+
 	def materialExists(self, name):
 		return self.materials.materialExists(name)
 	
@@ -1396,21 +1468,10 @@ class DtsShape:
 		
 		# Write node states -- skip default node states
 		fs.write(struct.pack('<i', node_rots*sequence.numKeyFrames)) # S32
-		for n in self.nodeRotations[baseRotation:baseRotation+(node_rots*sequence.numKeyFrames)]:
-			q16 = n.toQuat16() # << Remember its Quat16's!
-			# Check if we are out of bounds
-			if q16.x > 32767: q16.x = 32767
-			elif q16.x < -32768: q16.x = -32768
-			elif q16.y > 32767: q16.y = 32767
-			elif q16.y < -32768: q16.y = -32768
-			elif q16.z > 32767: q16.z = 32767
-			elif q16.z < -32768: q16.z = -32768
-			elif q16.w > 32767: q16.w = 32767
-			elif q16.w < -32768: q16.w = -32768
-			fs.write(struct.pack('<h', q16[0])) # F32 x
-			fs.write(struct.pack('<h', q16[1])) # F32 y
-			fs.write(struct.pack('<h', q16[2])) # F32 z
-			fs.write(struct.pack('<h', q16[3])) # F32 w
+		# Each node has a track of numKeyFrames rotations
+		tracks = [(r*sequence.numKeyFrames, sequence.numKeyFrames) for r in range(0, node_rots)]
+		q16 = quantizeQuats(self.nodeRotations[baseRotation:baseRotation+(node_rots*sequence.numKeyFrames)], tracks)
+		fs.write(struct.pack('<%dh' % len(q16), *q16)) # S16 x, y, z, w
 		
 		fs.write(struct.pack('<i', node_locs*sequence.numKeyFrames)) # S32
 		for n in self.nodeTranslations[baseTranslation:baseTranslation+(node_locs*sequence.numKeyFrames)]:
@@ -1434,12 +1495,9 @@ class DtsShape:
 		
 		if sequence.flags & Sequence.ArbitraryScale:
 			fs.write(struct.pack('<i', node_scales*sequence.numKeyFrames)) # S32
-			for n in self.nodeAbitraryScaleRots[baseScale:baseScale+(node_scales*sequence.numKeyFrames)]:
-				q16 = Quat16(n)
-				fs.write(struct.pack('<h', q16[0])) # X
-				fs.write(struct.pack('<h', q16[1])) # Y
-				fs.write(struct.pack('<h', q16[2])) # Z
-				fs.write(struct.pack('<h', q16[3])) # W
+			tracks = [(r*sequence.numKeyFrames, sequence.numKeyFrames) for r in range(0, node_scales)]
+			q16 = quantizeQuats(self.nodeAbitraryScaleRots[baseScale:baseScale+(node_scales*sequence.numKeyFrames)], tracks)
+			fs.write(struct.pack('<%dh' % len(q16), *q16)) # X, Y, Z, W
 			for n in self.nodeAbitraryScaleFactors[baseScale:baseScale+(node_scales*sequence.numKeyFrames)]:
 				fs.write(struct.pack('<f', n[0])) # X
 				fs.write(struct.pack('<f', n[1])) # Y
@@ -1447,16 +1505,12 @@ class DtsShape:
 		else: fs.write(struct.pack('<i',0))
 		
 		fs.write(struct.pack('<i', sequence.numGroundFrames)) # S32
+		floats = []
 		for n in self.groundTranslations[baseGround:baseGround+sequence.numGroundFrames]:
-			fs.write(struct.pack('<f', n[0])) # X
-			fs.write(struct.pack('<f', n[1])) # Y
-			fs.write(struct.pack('<f', n[2])) # Z
-		for n in self.groundRotations[baseGround:baseGround+sequence.numGroundFrames]:
-			q16 = Quat16(n)
-			fs.write(struct.pack('<h', q16[0])) # X
-			fs.write(struct.pack('<h', q16[1])) # Y
-			fs.write(struct.pack('<h', q16[2])) # Z
-			fs.write(struct.pack('<h', q16[3])) # W
+			floats.extend((n[0], n[1], n[2])) # X, Y, Z
+		fs.write(struct.pack('<%df' % len(floats), *floats))
+		q16 = quantizeQuats(self.groundRotations[baseGround:baseGround+sequence.numGroundFrames], [(0, sequence.numGroundFrames)])
+		fs.write(struct.pack('<%dh' % len(q16), *q16)) # X, Y, Z, W
 
 		# write object states -- legacy..no object states
 		fs.write(struct.pack('<i', 0))
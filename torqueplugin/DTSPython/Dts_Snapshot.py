@@ -0,0 +1,202 @@
+'''
+Dts_Snapshot.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+import cPickle, zlib, copy
+
+import Torque_Util
+from Torque_Util import *
+# Dts_Stream first, it has to be loaded before Dts_Shape and Dts_Mesh can be
+from Dts_Stream import DtsStream
+from Dts_Shape import DtsShape
+from Dts_Mesh import DtsMesh
+
+#############################
+# Torque Game Engine
+# -------------------------------
+# Shape Snapshots for Python
+#############################
+
+'''
+- Saves a shape once everything has been pulled out of Blender
+
+A snapshot holds the shape's own data (nodes, meshes with their uvs and
+weights, materials, sampled node tracks, visibility states and ground
+frames), the exporter prefs, and the dsq files of sequences that were
+split out of the shape. The .dts, .dsq, .cs and .ifl files can then be
+written from it without Blender.
+
+The file is a one line header followed by the snapshot, pickled and
+compressed with zlib.
+'''
+
+SNAPSHOT_MAGIC = "DTSSNAP"
+SNAPSHOT_VERSION = 1
+
+class ShapeSnapshot:
+	'''
+	shapeData maps each DtsShape attribute to its value, prefs are the
+	exporter prefs the shape was exported with.
+	'''
+	def __init__(self, shapeData, prefs, version=24):
+		self.shapeData = shapeData
+		self.prefs = prefs
+		self.version = version		# DTS version to write
+		self.externalSequences = []	# names of the sequences written as dsq files
+		self.scriptMaterials = []	# material definitions for materials.cs
+		self.dsqFiles = []		# (sequence name, dsq file data)
+
+	def getShape(self):
+		shape = DtsShape()
+		for key in self.shapeData.keys():
+			setattr(shape, key, copyList(self.shapeData[key]))
+		return shape
+
+# DtsShape.__del__ empties the meshes and sequences lists, so shapes and
+# snapshots each get lists of their own
+def copyList(value):
+	if type(value) == list: return value[:]
+	return value
+
+# Copies the DtsMesh part of a mesh, leaving behind anything a subclass added
+def plainMesh(mesh):
+	if mesh == None: return None
+	plain = DtsMesh()
+	for key in plain.__dict__.keys():
+		try: plain.__dict__[key] = mesh.__dict__[key]
+		except KeyError: pass
+	return plain
+
+# Takes a snapshot of a shape, which may be a subclass of DtsShape holding on
+# to Blender data of its own.  The shape's lists are copied, what is in them
+# is shared.
+def snapshotShape(shape, prefs, version=24):
+	shapeData = {}
+	# hold on to the blank shape, its __del__ empties its attributes
+	blank = DtsShape()
+	for key in blank.__dict__.keys():
+		try: shapeData[key] = copyList(shape.__dict__[key])
+		except KeyError: pass
+	shapeData['meshes'] = [plainMesh(mesh) for mesh in shape.meshes]
+	return ShapeSnapshot(shapeData, prefs, version)
+
+def saveSnapshot(snapshot, filename):
+	data = zlib.compress(cPickle.dumps(snapshot, 2), 6)
+	fs = open(filename, "wb")
+	fs.write("%s %d\n" % (SNAPSHOT_MAGIC, SNAPSHOT_VERSION))
+	fs.write(data)
+	fs.close()
+
+def loadSnapshot(filename):
+	fs = open(filename, "rb")
+	header = fs.readline().split()
+	if len(header) != 2 or header[0] != SNAPSHOT_MAGIC:
+		fs.close()
+		raise ValueError("%s is not a shape snapshot" % filename)
+	if int(header[1]) > SNAPSHOT_VERSION:
+		fs.close()
+		raise ValueError("%s is a newer snapshot (version %s) than this exporter can read" % (filename, header[1]))
+	snapshot = cPickle.loads(zlib.decompress(fs.read()))
+	fs.close()
+	return snapshot
+
+def getPathSeparator(path):
+	if "\\" in path: return "\\"
+	return "/"
+
+# Writes the shape script, material script and IFL files the prefs ask for.
+# Returns the names of the files written.
+def writeShapeScripts(prefs, externalSequences, scriptMaterials, writeShapeScript=False):
+	pathSep = getPathSeparator(prefs['exportBasepath'])
+	written = []
+
+	# Write out shape script
+	if writeShapeScript:
+		filename = "%s%s%s.cs" % (prefs['exportBasepath'], pathSep, prefs['exportBasename'])
+		Torque_Util.dump_writeln("   Writing script%s" % filename)
+		shapeScript = open(filename, "w")
+		shapeScript.write("datablock TSShapeConstructor(%sDts)\n" % prefs['exportBasename'])
+		shapeScript.write("{\n")
+		# don't need to write out the full path, in fact, it causes problems to do so.  We'll just assume
+		# that the player is putting their shape script in the same folder as the .dts.
+		shapeScript.write("   baseShape = \"./%s\";\n" % (prefs['exportBasename'] + ".dts"))
+		count = 0
+		for sequence in externalSequences:
+			shapeScript.write("   sequence%d = \"./%s.dsq %s\";\n" % (count,sequence,sequence))
+			count += 1
+		shapeScript.write("};")
+		shapeScript.close()
+		written.append(filename)
+
+	# Write out TGEA Material Script
+	if prefs['TSEMaterial']:
+		filename = "%s%smaterials.cs" % (prefs['exportBasepath'], pathSep)
+		Torque_Util.dump_writeln("   Writing material script %s" % filename)
+		materialScript = open(filename, "w")
+		materialScript.write("// Script automatically generated by Blender DTS Exporter\n\n")
+		for materialDef in scriptMaterials:
+			materialScript.write(materialDef)
+		materialScript.write("// End of generated script\n")
+		materialScript.close()
+		written.append(filename)
+
+	# Write out IFL File
+	# Now we can dump each frame
+	for seqName in prefs['Sequences'].keys():
+		seqPrefs = prefs['Sequences'][seqName]
+		if seqPrefs['IFL']['Enabled'] and validateIFL(seqName, seqPrefs) and seqPrefs['IFL']['WriteIFLFile']:
+			iflName = getIFLMatTextPortion(seqPrefs['IFL']['Material'])
+			filename = "%s%s%s.ifl" % (prefs['exportBasepath'], pathSep, iflName)
+			Torque_Util.dump_writeln("   Writing IFL script %s" % filename)
+			IFLScript = open(filename, "w")
+			for frame in seqPrefs['IFL']['IFLFrames']:
+				IFLScript.write("%s %i\n" % (frame[0], frame[1]))
+			IFLScript.close()
+			written.append(filename)
+	return written
+
+# Writes out all of the files of a snapshot, into the folder and under the name
+# it was exported with unless others are given.  Returns the names of the files
+# written.
+def buildSnapshot(snapshot, basepath=None, basename=None):
+	prefs = copy.copy(snapshot.prefs)
+	if basepath != None: prefs['exportBasepath'] = basepath
+	if basename != None: prefs['exportBasename'] = basename
+	pathSep = getPathSeparator(prefs['exportBasepath'])
+	written = []
+
+	for seqName, data in snapshot.dsqFiles:
+		filename = "%s%s%s.dsq" % (prefs['exportBasepath'], pathSep, seqName)
+		dsq_file = open(filename, "wb")
+		dsq_file.write(data)
+		dsq_file.close()
+		written.append(filename)
+
+	written.extend(writeShapeScripts(prefs, snapshot.externalSequences, snapshot.scriptMaterials, prefs['WriteShapeScript']))
+
+	filename = "%s%s%s.dts" % (prefs['exportBasepath'], pathSep, prefs['exportBasename'])
+	stream = DtsStream(filename, False, snapshot.version)
+	snapshot.getShape().write(stream)
+	stream.closeStream()
+	written.append(filename)
+	return written
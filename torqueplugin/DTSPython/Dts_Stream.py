@@ -53,7 +53,7 @@ class DtsStream:
 	
 	def __init__(self, fname, read=False, version=24):
 		# check python version and select correct write32 method
-		if sys.version.split(" ")[0][0:3] == "2.5":
+		if sys.version_info[0:2] >= (2, 5):
 			self.write32 = self.write32_py25
 		else:
 			self.write32 = self.write32_py24			
@@ -308,6 +308,12 @@ class DtsStream:
 		self.writef32(value[0])
 		self.writef32(value[1])
 		self.writef32(value[2])
+	def writePoint3FArray(self, values):
+		# Writes a list of points all at once
+		floats = []
+		for value in values: floats.extend((value[0], value[1], value[2]))
+		if len(floats) == 0: return
+		self.buffer32.extend(struct.unpack('%di' % len(floats), struct.pack('%df' % len(floats), *floats)))
 	def readPoint4F(self):
 		# X, Y, Z, W
 		x, y, z, w = self.readf32(), self.readf32(), self.readf32(), self.readf32()
@@ -347,21 +353,11 @@ class DtsStream:
 	def writeQuat16(self, value):
 		# Converts quat to quat16 and writes
 		# X, Y, Z, W
-		q16 = value.toQuat16()
-		# HACK : Clip some of these values if they are too big or too small
-		# (-32,768 to +32,767)
-		if q16.x > 32767: q16.x = 32767
-		elif q16.x < -32768: q16.x = -32768
-		elif q16.y > 32767: q16.y = 32767
-		elif q16.y < -32768: q16.y = -32768
-		elif q16.z > 32767: q16.z = 32767
-		elif q16.z < -32768: q16.z = -32768
-		elif q16.w > 32767: q16.w = 32767
-		elif q16.w < -32768: q16.w = -32768
-		self.writes16(q16.x)
-		self.writes16(q16.y)
-		self.writes16(q16.z)
-		self.writes16(q16.w)
+		self.buffer16.extend(quantizeQuats([value]))
+	def writeQuat16Array(self, values, tracks=None):
+		# Converts a list of quats to quat16 and writes them all at once,
+		# see quantizeQuats for tracks
+		self.buffer16.extend(quantizeQuats(values, tracks))
 	def readCluster(self):
 		v1 = self.reads32()
 		v2 = self.reads32()
@@ -404,6 +400,12 @@ class DtsStream:
 		self.writef32(value.vis)
 		self.writes32(value.frame)
 		self.writes32(value.matFrame)
+	def writeObjectStateArray(self, values):
+		# Writes a list of object states all at once
+		fields = []
+		for value in values: fields.extend((value.vis, value.frame, value.matFrame))
+		if len(fields) == 0: return
+		self.buffer32.extend(struct.unpack('%di' % len(fields), struct.pack('fii' * len(values), *fields)))
 	def readObject(self):
 		v1 = self.reads32()
 		v2 = self.reads32()
@@ -26,6 +26,11 @@ WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import struct, math
 from math import fabs
 from struct import *
+from array import array
+
+# NumPy is optional, it only speeds up quantizeQuats
+try: import numpy
+except ImportError: numpy = None
 
 #############################
 # Torque Game Engine
@@ -1131,7 +1136,7 @@ else:
 								narr[12]*vec[0],narr[13]*vec[1],narr[14]*vec[2],narr[15]])
 		
 		def copy(self):
-			return MatrixF(copy.deepcopy(n.members))
+			return MatrixF(self.members)
 
 		'''
 		def invert(self):
@@ -1230,6 +1235,52 @@ class Quat16:
 		elif key == 3:
 			self.w = value
 
+def quantizeQuats(quats, tracks=None):
+	'''
+	Converts quaternions to Quat16 values, returned as a flat array('h')
+	of x, y, z, w. Every component is rounded and clamped to 16 bits.
+	tracks is a list of (first key, number of keys) runs of animation
+	keys; inside a run each key is negated if needed to lie on the same
+	hemisphere as the key before it, so interpolation takes the short way.
+	'''
+	n = len(quats)
+	out = array('h')
+	if n == 0: return out
+	cont = [False] * n
+	if tracks != None:
+		for start, length in tracks:
+			for i in range(max(start + 1, 1), min(start + length, n)):
+				cont[i] = True
+
+	if numpy != None:
+		q = numpy.array([quat.members for quat in quats], numpy.float64)
+		c = numpy.array(cont, numpy.bool_)
+		# Flipping is cumulative along a run: count the sign changes since
+		# the start of each run and flip where the count is odd
+		neg = numpy.zeros(n, numpy.int32)
+		neg[1:] = (numpy.sum(q[1:] * q[:-1], 1) < 0.0) & c[1:]
+		counts = numpy.cumsum(neg)
+		starts = numpy.where(c, 0, numpy.arange(n))
+		starts = numpy.maximum.accumulate(starts)
+		flip = ((counts - counts[starts]) % 2) == 1
+		q[flip] = -q[flip]
+		q = numpy.clip(numpy.floor(q * Quat16.MAX_VAL + 0.5), -32768, 32767).astype(numpy.int16)
+		out.fromstring(q.tostring())
+		return out
+
+	prev = None
+	for i in range(0, n):
+		x, y, z, w = quats[i].members
+		if cont[i] and (x*prev[0] + y*prev[1] + z*prev[2] + w*prev[3]) < 0.0:
+			x, y, z, w = -x, -y, -z, -w
+		prev = (x, y, z, w)
+		for c in prev:
+			v = int(math.floor(c * Quat16.MAX_VAL + 0.5))
+			if v > 32767: v = 32767
+			elif v < -32768: v = -32768
+			out.append(v)
+	return out
+
 class PlaneF:
 	PLANE_FRONT = 0
 	PLANE_BACK = 1
@@ -1367,3 +1418,101 @@ class Box:
 		return ret
 
 
+
+'''
+	Minimal bounding sphere
+'''
+# Randomised incremental (Welzl) construction of the smallest sphere enclosing
+# a set of points, expected linear time. Points are tuples of 3 floats.
+
+def _sphereFrom2(a, b):
+	c = ((a[0]+b[0])*0.5, (a[1]+b[1])*0.5, (a[2]+b[2])*0.5)
+	dx, dy, dz = a[0]-c[0], a[1]-c[1], a[2]-c[2]
+	return c, dx*dx + dy*dy + dz*dz
+
+def _sphereFrom3(a, b, c):
+	# Circumscribed circle of the triangle abc
+	ux, uy, uz = b[0]-a[0], b[1]-a[1], b[2]-a[2]
+	vx, vy, vz = c[0]-a[0], c[1]-a[1], c[2]-a[2]
+	nx, ny, nz = uy*vz - uz*vy, uz*vx - ux*vz, ux*vy - uy*vx
+	nn = nx*nx + ny*ny + nz*nz
+	uu = ux*ux + uy*uy + uz*uz
+	vv = vx*vx + vy*vy + vz*vz
+	if nn < 1e-18 * (uu*vv + 1e-30):
+		# Colinear, the sphere is spanned by the two points furthest apart
+		best = None
+		for p, q in ((a, b), (a, c), (b, c)):
+			s = _sphereFrom2(p, q)
+			if best == None or s[1] > best[1]: best = s
+		return best
+	# offset = ((uu * v - vv * u) x n) / (2 * |n|^2)
+	wx, wy, wz = uu*vx - vv*ux, uu*vy - vv*uy, uu*vz - vv*uz
+	inv = 0.5 / nn
+	ox = (wy*nz - wz*ny) * inv
+	oy = (wz*nx - wx*nz) * inv
+	oz = (wx*ny - wy*nx) * inv
+	return (a[0]+ox, a[1]+oy, a[2]+oz), ox*ox + oy*oy + oz*oz
+
+def _sphereFrom4(a, b, c, d):
+	# Circumscribed sphere of the tetrahedron abcd
+	ux, uy, uz = b[0]-a[0], b[1]-a[1], b[2]-a[2]
+	vx, vy, vz = c[0]-a[0], c[1]-a[1], c[2]-a[2]
+	wx, wy, wz = d[0]-a[0], d[1]-a[1], d[2]-a[2]
+	uu = ux*ux + uy*uy + uz*uz
+	vv = vx*vx + vy*vy + vz*vz
+	ww = wx*wx + wy*wy + wz*wz
+	det = ux*(vy*wz - vz*wy) - uy*(vx*wz - vz*wx) + uz*(vx*wy - vy*wx)
+	if fabs(det) <= 1e-10 * math.sqrt(uu*vv*ww):
+		# Coplanar, use the smallest of the triangle spheres that holds all four
+		best = None
+		pts = (a, b, c, d)
+		for i, j, k, l in ((0, 1, 2, 3), (0, 1, 3, 2), (0, 2, 3, 1), (1, 2, 3, 0)):
+			s = _sphereFrom3(pts[i], pts[j], pts[k])
+			if not _sphereContains(s, pts[l]): continue
+			if best == None or s[1] < best[1]: best = s
+		if best == None: best = _sphereFrom3(a, b, c)
+		return best
+	inv = 0.5 / det
+	# offset = (|u|^2 (v x w) + |v|^2 (w x u) + |w|^2 (u x v)) / (2 * det)
+	ox = (uu*(vy*wz - vz*wy) + vv*(wy*uz - wz*uy) + ww*(uy*vz - uz*vy)) * inv
+	oy = (uu*(vz*wx - vx*wz) + vv*(wz*ux - wx*uz) + ww*(uz*vx - ux*vz)) * inv
+	oz = (uu*(vx*wy - vy*wx) + vv*(wx*uy - wy*ux) + ww*(ux*vy - uy*vx)) * inv
+	return (a[0]+ox, a[1]+oy, a[2]+oz), ox*ox + oy*oy + oz*oz
+
+def _sphereContains(s, p):
+	c, r2 = s
+	dx, dy, dz = p[0]-c[0], p[1]-c[1], p[2]-c[2]
+	return (dx*dx + dy*dy + dz*dz) <= r2 + 1e-9 * (r2 + 1.0)
+
+def calcBoundingSphere(points):
+	# Returns (center, radius) of the smallest sphere enclosing points,
+	# which may be Vectors or any 3 item sequences.
+	pts = {}
+	for p in points:
+		pts[(float(p[0]), float(p[1]), float(p[2]))] = True
+	pts = pts.keys()
+	if len(pts) == 0:
+		return Vector(0, 0, 0), 0.0
+	# Fixed seed so repeated exports produce identical files
+	import random
+	random.Random(1).shuffle(pts)
+
+	s = (pts[0], 0.0)
+	for i in range(1, len(pts)):
+		pi = pts[i]
+		if _sphereContains(s, pi): continue
+		s = (pi, 0.0)
+		for j in range(0, i):
+			pj = pts[j]
+			if _sphereContains(s, pj): continue
+			s = _sphereFrom2(pi, pj)
+			for k in range(0, j):
+				pk = pts[k]
+				if _sphereContains(s, pk): continue
+				s = _sphereFrom3(pi, pj, pk)
+				for l in range(0, k):
+					pl = pts[l]
+					if _sphereContains(s, pl): continue
+					s = _sphereFrom4(pi, pj, pk, pl)
+	c, r2 = s
+	return Vector(c[0], c[1], c[2]), math.sqrt(r2)
@@ -39,7 +39,7 @@ from array import *
 '''
 
 import Torque_Math
-from Torque_Math import Vector2, Vector, Vector4, Quaternion, MatrixF, Quat16, PlaneF, Box
+from Torque_Math import Vector2, Vector, Vector4, Quaternion, MatrixF, Quat16, PlaneF, Box, calcBoundingSphere, quantizeQuats
 
 # String Table Class
 class StringTable:
@@ -427,7 +427,9 @@ def getBlenderIPOChannelConst(IPOType, IPOChannel):
 
 # Helper functions for dealing with sequences
 
-import Blender
+# Only needed while exporting from Blender, shape snapshots are built without it
+try: import Blender
+except ImportError: Blender = None
 def validateAction(seqName, seqPrefs):
 	# Check to see if there's a valid action animation
 	ActionIsValid = False
@@ -27,6 +27,7 @@ from DTSPython import *
 
 import Blender
 from Blender import NMesh
+from array import array
 
 '''
    Utility functions
@@ -62,6 +63,9 @@ class BlenderMesh(DtsMesh):
 			self.initColMesh(shape, msh,  rootBone, scaleFactor, matrix)
 			return
 		
+		# Gather indices as 32 bit values; meshes that end up too big for the
+		# 16 bit format are split up by the shape afterwards (see DtsMesh.splitMesh)
+		self.indices = array('i')
 
 		# First, sort faces by material
 		for face in msh.faces:
@@ -99,7 +103,6 @@ class BlenderMesh(DtsMesh):
 				
 		
 		# Then, we can add in batches
-		limitExceeded = False
 		for group in materialGroups.values(): 
 			self.bVertList = []
 			self.dVertList = []
@@ -115,11 +118,6 @@ class BlenderMesh(DtsMesh):
 				if len(face.v) < 3:
 					continue # skip to next face
 
-				# if we've hit the vertex index limit, don't add any more primitives!
-				if len(self.indices) >= 32748:
-					limitExceeded = True
-					continue
-				
 				matIndex = None
 				
 				# if we're not using triangle lists, insert one primitive per face
@@ -226,10 +224,9 @@ class BlenderMesh(DtsMesh):
 				# Finally add the primitive
 				pr.numElements = (len(self.indices) - pr.firstElement) #-1
 				self.primitives.append(pr)
-			
-			if limitExceeded:
-				Torque_Util.dump_writeErr("Error: Vertex index limit exceeded for mesh %s, truncating mesh!" % meshName)
 
+		if len(self.indices) <= self.smMaxIndices and len(self.verts) <= 0xFFFF:
+			self.indices = array('H', self.indices)
 			
 
 
@@ -30,6 +30,7 @@ import math as pMath
 import DTSPython
 from DTSPython import *
 from DTSPython import Torque_Math
+from DTSPython import Dts_Kinematics
 
 
 import gc
@@ -79,6 +80,16 @@ class DtsPoseUtilClass:
 		gc.enable()
 		self.armBones = {}
 		self.armInfo = {}	
+		self.armBoneOrder = {}	# bone names of each armature, parents before children
+		try: cacheMB = prefs['PoseCacheMB']
+		except: cacheMB = 64
+		self.poseCache = Dts_Kinematics.PoseCache(cacheMB)
+		try: self.poseWorkers = prefs['PoseWorkers']
+		except: self.poseWorkers = 0
+		self.fkRigs = {}
+		self.plainFK = {}
+		# True while every armature is known to be sitting in its rest pose
+		self.atRest = False
 		self.__populateData(prefs)
 	
 	def __populateData(self, prefs):
@@ -113,6 +124,20 @@ class DtsPoseUtilClass:
 				self.armBones[armOb.name][bName][BONERESTPOSWS] = self.getBoneRestPosWS(armOb.name, bName)
 				self.armBones[armOb.name][bName][BONERESTROTWS] = self.getBoneRestRotWS(armOb.name, bName)
 
+			# order the bones so every parent comes before its children
+			order = []
+			added = {}
+			for bName in self.armBones[armOb.name].keys():
+				chain = []
+				while bName != None and not (bName in added):
+					chain.append(bName)
+					bName = self.armBones[armOb.name][bName][PARENTNAME]
+				chain.reverse()
+				for bName in chain:
+					added[bName] = True
+					order.append(bName)
+			self.armBoneOrder[armOb.name] = order
+
 			# second pass for calculated static bone data
 			for bone in armDb.bones.values():
 				bName = bone.name				
@@ -127,7 +152,7 @@ class DtsPoseUtilClass:
 
 
 	# *****
-	# This is our only exposed public method.
+	# These are our only exposed public methods.
 	def getBoneLocRotLS(self, armName, bName, pose):
 		loc = None
 		rot = None
@@ -138,6 +163,131 @@ class DtsPoseUtilClass:
 			loc = self.getBoneLocLS(armName, bName, pose)
 			rot = self.getBoneRotLS(armName, bName, pose)
 		return loc, rot
+
+	# Same as getBoneLocRotLS for every bone of the armature, returned as a
+	# dictionary of bone name -> (loc, rot). The worldspace transform of each
+	# bone is only worked out once, and the parent scale corrections are
+	# built up from the parent's instead of walking back to the root.
+	def getAllBoneLocRotLS(self, armName, pose):
+		bones = self.armBones[armName]
+		armRotInv = self.armInfo[armName][ARMROT].inverse()
+		locWS, rotWS, scaleChain = {}, {}, {}
+		result = {}
+		for bName in self.armBoneOrder[armName]:
+			poseBone = pose.bones[bName]
+			locWS[bName] = self.getBoneLocWS(armName, bName, pose)
+			rotWS[bName] = armRotInv * self.bMatToTorqueQuat(poseBone.poseMatrix, bName).inverse()
+			parentName = bones[bName][PARENTNAME]
+			if parentName == None:
+				scaleChain[bName] = []
+				loc = locWS[bName] - bones[bName][BONERESTPOSWS]
+				rot = (rotWS[bName].inverse() * bones[bName][BONERESTROTWS].inverse()).inverse()
+			else:
+				# parent scales to take out of the offset, root first
+				chain = scaleChain[parentName]
+				scaleRaw = self.toTorqueVec(pose.bones[parentName].size)
+				if not scaleRaw.eqDelta(Vector(1.0,1.0,1.0), 0.008):
+					chain = chain + [(rotWS[parentName], Vector(1.0/scaleRaw[0], 1.0/scaleRaw[1], 1.0/scaleRaw[2]))]
+				scaleChain[bName] = chain
+				offset = self.removeScales(locWS[bName] - locWS[parentName], chain)
+				loc = rotWS[parentName].apply(offset) - bones[bName][BONEDEFPOSPS]
+				rotPS = rotWS[parentName].inverse() * rotWS[bName]
+				rot = (rotPS.inverse() * bones[bName][BONEDEFROTPS].inverse()).inverse()
+			result[bName] = (loc, rot)
+		return result
+
+	# The local space (loc, rot, scale) of every bone of the armature for a frame of
+	# an action, from the pose cache if it has been worked out before.  actionKey
+	# has to tell apart everything the pose depends on besides the frame, use None
+	# for poses that should not be cached.  With decompose set the bones' matrices
+	# are taken apart instead, giving (loc, rot, scale factors, scale rotation);
+	# this is slower but holds up under unevenly scaled parents.
+	def getArmaturePose(self, armName, actionKey, frame, pose, decompose=False):
+		if actionKey != None:
+			bonePoses = self.poseCache.get(armName, actionKey, frame)
+			if bonePoses != None: return bonePoses
+		if decompose:
+			bonePoses = self.getFKRig(armName).decomposePose(self.getPoseMatrices(armName, pose))
+		else:
+			bonePoses = {}
+			for bName, locRot in self.getAllBoneLocRotLS(armName, pose).items():
+				bonePoses[bName] = (locRot[0], locRot[1], self.toTorqueVec(pose.bones[bName].size))
+		if actionKey != None: self.poseCache.put(armName, actionKey, frame, bonePoses)
+		return bonePoses
+
+	# the armature space pose matrix of every bone, as nested lists
+	def getPoseMatrices(self, armName, pose):
+		poseMats = {}
+		for bName in self.armBoneOrder[armName]:
+			m = pose.bones[bName].poseMatrix
+			poseMats[bName] = [[m[i][j] for j in range(0, 4)] for i in range(0, 4)]
+		return poseMats
+
+	# A Blender independent FK solver for the armature, built from the static data
+	# stored above.  Fed the values of getPoseChannels it gives the same results
+	# as getAllBoneLocRotLS for rigs without constraints or IK.
+	def getFKRig(self, armName):
+		try: return self.fkRigs[armName]
+		except KeyError: pass
+		info = self.armInfo[armName]
+		rig = Dts_Kinematics.FKRig(info[ARMROT], info[ARMLOC], info[ARMSIZE])
+		for bName in self.armBoneOrder[armName]:
+			bone = self.armBones[armName][bName]
+			restMat = [[bone[BONEMAT][i][j] for j in range(0, 4)] for i in range(0, 4)]
+			# Blender ignores the loc channel of connected bones
+			connected = Blender.Armature.CONNECTED in bone[BONE].options
+			rig.addBone(bName, bone[PARENTNAME], restMat, bone[BONERESTPOSWS], bone[BONERESTROTWS], bone[BONEDEFPOSPS], bone[BONEDEFROTPS], connected)
+		self.fkRigs[armName] = rig
+		return rig
+
+	# True if every bone of the armature only follows its own channels and its
+	# parent, so getFKRig can stand in for Blender's pose.  Constraints (IK
+	# included) and hinge bones need Blender to evaluate them.
+	def isPlainFK(self, armName):
+		try: return self.plainFK[armName]
+		except KeyError: pass
+		plain = True
+		pose = self.armInfo[armName][ARMOB].getPose()
+		for bName in self.armBoneOrder[armName]:
+			try:
+				if len(pose.bones[bName].constraints) > 0: plain = False
+				if Blender.Armature.HINGE in self.armBones[armName][bName][BONE].options: plain = False
+			except AttributeError: plain = False
+			if not plain: break
+		self.plainFK[armName] = plain
+		return plain
+
+	# the (loc, quat, size) channel values of every pose bone, as plain tuples
+	def getPoseChannels(self, armName, pose):
+		channels = {}
+		for bName in self.armBoneOrder[armName]:
+			poseBone = pose.bones[bName]
+			loc, quat, size = poseBone.loc, poseBone.quat, poseBone.size
+			channels[bName] = ((loc[0], loc[1], loc[2]), (quat[0], quat[1], quat[2], quat[3]), (size[0], size[1], size[2]))
+		return channels
+
+	# Resets the transforms of every bone of every armature so nothing carries over
+	# from other animations.  Skipped if the bones have not been moved since the
+	# last reset; anything that may move them has to call posesChanged.  Returns
+	# True if the bones were actually reset.
+	def resetPoses(self):
+		if self.atRest: return False
+		for armOb in Blender.Object.Get():
+			if (armOb.getType() != 'Armature') or (armOb.name == "DTS-EXP-GHOST-OB"): continue
+			tempPose = armOb.getPose()
+			for bonename in self.armBones[armOb.name].keys():
+				# reset the bone's transform
+				tempPose.bones[bonename].quat = bMath.Quaternion().identity()
+				tempPose.bones[bonename].size = bMath.Vector(1.0, 1.0, 1.0)
+				tempPose.bones[bonename].loc = bMath.Vector(0.0, 0.0, 0.0)
+			# update the pose.
+			tempPose.update()
+		self.atRest = True
+		return True
+
+	# To be called after changing the current frame or an armature's action
+	def posesChanged(self):
+		self.atRest = False
 	# *****
 	
 	# -----  everything below this point is private
@@ -254,11 +404,13 @@ class DtsPoseUtilClass:
 		scaleListLS.reverse()
 		rotListWS.reverse()
 		
-		# apply the inverse scales in the correct space
-		offsetAccum = offsetIn		
-		for i in range(0, len(scaleListLS)):
-			scaleInv = scaleListLS[i]
-			rot = rotListWS[i]
+		return self.removeScales(offsetIn, zip(rotListWS, scaleListLS))
+
+	# apply the inverse scales in chain, a root first list of
+	# (worldspace rotation, inverse scale) pairs, to a worldspace offset
+	def removeScales(self, offsetIn, chain):
+		offsetAccum = offsetIn
+		for rot, scaleInv in chain:
 			rotInv = rot.inverse()
 			# rotate the offset into parent bone's space 
 			offsetAccum = rot.apply(offsetAccum)
@@ -266,10 +418,7 @@ class DtsPoseUtilClass:
 			offsetAccum = Vector(offsetAccum[0] * scaleInv[0], offsetAccum[1] * scaleInv[1], offsetAccum[2] * scaleInv[2])
 			# rotate back into worldspace for next iteration :-)
 			offsetAccum = rotInv.apply(offsetAccum)
-
-		# return the calculated offset		
-		offsetOut = offsetAccum
-		return offsetOut
+		return offsetAccum
 
 
 
@@ -32,11 +32,19 @@ import Blender
 from Blender import NMesh, Armature, Scene, Object, Material, Texture
 from Blender import Mathutils as bMath
 import copy
+import math as pMath
 
 import DtsPoseUtil
+from DTSPython import Dts_Sampling
+from DTSPython import Dts_Curves
+from DTSPython import Dts_Kinematics
+from DTSPython import Dts_Snapshot
 
 import gc
 
+# fewest bone poses (bones times frames) worth handing out to worker processes
+MIN_WORKER_BONE_FRAMES = 2000
+
 '''
    Util functions used by class as well as exporter gui
 '''
@@ -74,6 +82,12 @@ def getHighestActFrame(act):
 			highest = int(fr)
 	return highest
 
+# formats a {count: number} histogram for the log, e.g. "1:120 2:40 3:6"
+def formatHistogram(hist):
+	keys = hist.keys()
+	keys.sort()
+	return " ".join(["%d:%d" % (k, hist[k]) for k in keys])
+
 '''
 Shape Class (Blender Export)
 '''
@@ -107,6 +121,11 @@ class BlenderShape(DtsShape):
 		# pose module and the blender armature system.
 		self.poseUtil = DtsPoseUtil.DtsPoseUtilClass(prefs)
 		
+		# sampled visibility curves, see sampleVisibilityCurve
+		self.visCurveCache = {}
+		# (sequence name, data) of the dsq files written, for snapshots
+		self.dsqFiles = []
+		
 		gc.enable()
 		
 	def __del__(self):
@@ -136,17 +155,7 @@ class BlenderShape(DtsShape):
 		# before we do anything else, reset the transforms of all bones.
 		# loop through each node and reset it's transforms.  This avoids transforms carrying over from
 		# other animations. Need to cycle through _ALL_ bones and reset the transforms.
-		for armOb in Blender.Object.Get():
-			if (armOb.getType() != 'Armature') or (armOb.name == "DTS-EXP-GHOST-OB"): continue
-			tempPose = armOb.getPose()
-			#for bonename in armOb.getData().bones.keys():
-			for bonename in self.poseUtil.armBones[armOb.name].keys():
-				# reset the bone's transform
-				tempPose.bones[bonename].quat = bMath.Quaternion().identity()
-				tempPose.bones[bonename].size = bMath.Vector(1.0, 1.0, 1.0)
-				tempPose.bones[bonename].loc = bMath.Vector(0.0, 0.0, 0.0)
-			# update the pose.
-			tempPose.update()
+		self.poseUtil.resetPoses()
 		#Blender.Scene.GetCurrent().makeCurrent()		
 		
 		numAddedMeshes = 0
@@ -231,9 +240,108 @@ class BlenderShape(DtsShape):
 		
 		# Store constructed detail level info into shape
 		self.detaillevels.append(DetailLevel(self.addName(detailName), 0, self.numBaseDetails-1, size, -1, -1, polyCount))
-			
+
 		return True
-	
+
+	def addGeneratedCollisionDetailLevel(self, source="Meshes", LOS=False, maxVerts=0):
+		'''
+		Adds a collision or LOS detail level made of convex hulls of the
+		highest visible detail level, so no collision meshes have to be
+		modelled. With source "Meshes" each object gets one hull; with
+		"Bones" vertices are grouped by the node that moves them (the
+		strongest bone for skinned vertices) and each group gets a hull
+		attached to that node.
+		'''
+		if self.numBaseDetails == 0 or self.subshapes[0].numObjects == 0:
+			Torque_Util.dump_writeWarning("Warning: No detail level to generate collision meshes from!")
+			return False
+		subshape = self.subshapes[0]
+
+		# Gather the point clouds, in shape space like the meshes themselves
+		clusters = {}
+		order = []
+		for obj in self.objects[subshape.firstObject:subshape.firstObject+subshape.numObjects]:
+			src = obj.tempMeshes[0]
+			if src.mtype == src.T_Null or len(src.verts) == 0: continue
+			if source == "Bones" and src.mtype == src.T_Skin:
+				influences = src.getInfluenceLists()
+				for v in range(0, len(src.verts)):
+					best, bestWeight = None, -1.0
+					for b, w in influences.get(v, []):
+						if w > bestWeight: best, bestWeight = b, w
+					if best == None: continue
+					node = src.nodeIndex[best]
+					try: clusters[node][1].append(src.verts[v])
+					except KeyError:
+						clusters[node] = (node, [src.verts[v]], self.sTable.get(self.nodes[node].name))
+						order.append(node)
+				continue
+			# Same node choice as finalizeObjects makes for rigid objects
+			if src.getNodeIndex(0) != None: node = src.getNodeIndex(0)
+			elif obj.node < 1: node = 0
+			else: node = obj.node
+			if source == "Bones": key, name = node, self.sTable.get(self.nodes[node].name)
+			else: key, name = obj, self.sTable.get(obj.name)
+			try: clusters[key][1].extend(src.verts)
+			except KeyError:
+				clusters[key] = (node, src.verts[:], name)
+				order.append(key)
+
+		numAddedMeshes = 0
+		polyCount = 0
+		if LOS: prefix = "LOS_"
+		else: prefix = "Col_"
+		for key in order:
+			node, points, name = clusters[key]
+			tmsh = DtsMesh(DtsMesh.T_Standard)
+			if not tmsh.buildHull(points, maxVerts):
+				Torque_Util.dump_writeWarning("Warning: Points of '%s' are flat, no collision hull generated." % name)
+				continue
+			obj = dObject(self.addName(prefix + name), -1, -1, node)
+			obj.tempMeshes = []
+			# prefix with null meshes so we're in the right objectDetail
+			for i in range(0, len(self.detaillevels)):
+				obj.tempMeshes.append(DtsMesh(DtsMesh.T_Null))
+			obj.tempMeshes.append(tmsh)
+			self.objects.append(obj)
+			polyCount += tmsh.getPolyCount()
+			numAddedMeshes += 1
+			Torque_Util.dump_writeln("   Generated hull '%s': %d points, %d verts, %d faces" % (prefix + name, len(points), len(tmsh.verts), tmsh.getPolyCount()))
+		if numAddedMeshes == 0: return False
+
+		self.subshapes[0].numObjects += numAddedMeshes
+		self.numBaseDetails += 1
+		if LOS:
+			self.numLOSCollisionDetails += 1
+			# Offset by MaxCollisionShapes + 1, as in addCollisionDetailLevel
+			detailName = "LOS-%d" % (9+self.numLOSCollisionDetails)
+			size = -self.numLOSCollisionDetails
+		else:
+			self.numCollisionDetails += 1
+			detailName = "Collision-%d" % (self.numCollisionDetails)
+			size = -self.numCollisionDetails
+		self.detaillevels.append(DetailLevel(self.addName(detailName), 0, self.numBaseDetails-1, size, -1, -1, polyCount))
+		return True
+
+	# Finds (or creates) the object holding a split mesh part
+	def getSplitPartObject(self, obj, partName):
+		if self.subshapes[0].numObjects != 0:
+			subshape = self.subshapes[self.detaillevels[self.numBaseDetails-1].subshape]
+			for dObj in self.objects[subshape.firstObject:subshape.firstObject+subshape.numObjects]:
+				if self.sTable.get(dObj.name).upper() == partName.upper():
+					return dObj
+		partObj = dObject(self.addName(partName), -1, -1, obj.node)
+		partObj.tempMeshes = []
+		if self.subshapes[0].numObjects != 0:
+			# A lower detail split into more parts than the base detail, so
+			# prefix with null meshes so we're in the right objectDetail
+			for i in range(0, self.numBaseDetails):
+				partObj.tempMeshes.append(DtsMesh(DtsMesh.T_Null))
+			self.subshapes[0].numObjects += 1
+			Torque_Util.dump_writeln("   Added object '%s' for a mesh part not in the base detail." % partName)
+		self.objects.append(partObj)
+		return partObj
+
 	# Adds non-specific detail levels
 	def addDetailLevel(self, meshes, size=-1):
 		'''
@@ -269,21 +377,12 @@ class BlenderShape(DtsShape):
 		# before we do anything else, reset the transforms of all bones.
 		# loop through each node and reset it's transforms.  This avoids transforms carrying over from
 		# other animations. Need to cycle through _ALL_ bones and reset the transforms.
-		for armOb in Blender.Object.Get():
-			if (armOb.getType() != 'Armature') or (armOb.name == "DTS-EXP-GHOST-OB"): continue
-			tempPose = armOb.getPose()
-			#for bonename in armOb.getData().bones.keys():
-			for bonename in self.poseUtil.armBones[armOb.name].keys():
-				# reset the bone's transform
-				tempPose.bones[bonename].quat = bMath.Quaternion().identity()
-				tempPose.bones[bonename].size = bMath.Vector(1.0, 1.0, 1.0)
-				tempPose.bones[bonename].loc = bMath.Vector(0.0, 0.0, 0.0)
-			# update the pose.
-			tempPose.update()
+		self.poseUtil.resetPoses()
 		#Blender.Scene.GetCurrent().makeCurrent()		
 		
 		numAddedMeshes = 0
 		polyCount = 0
+		numPrimsBefore, numPrimsAfter = 0, 0
 		# First, import meshes
 		for o in meshes:
 			# skip bounds mesh
@@ -373,17 +472,56 @@ class BlenderShape(DtsShape):
 			# Import Mesh, process flags
 			try: x = self.preferences['PrimType']
 			except KeyError: self.preferences['PrimType'] = "Tris"
+			try: x = self.preferences['MaxBonesPerMesh']
+			except KeyError: self.preferences['MaxBonesPerMesh'] = 0
+			try: x = self.preferences['MaxInfluences']
+			except KeyError: self.preferences['MaxInfluences'] = 0
+			try: x = self.preferences['MinInfluenceWeight']
+			except KeyError: self.preferences['MinInfluenceWeight'] = 0.0
+			try: x = self.preferences['QuantizeWeights']
+			except KeyError: self.preferences['QuantizeWeights'] = False
 			tmsh = BlenderMesh( self, o.name, mesh_data, -1, 1.0, mat, hasArmatureDeform, False, (self.preferences['PrimType'] == "TriLists" or self.preferences['PrimType'] == "TriStrips") )
 			if len(names) > 1: tmsh.setBlenderMeshFlags(names[1:])
+
+			# Drop faces with no area and repeated faces
+			numDegenerate, numDuplicate = tmsh.removeDegenerates()
+			if numDegenerate + numDuplicate > 0:
+				Torque_Util.dump_writeln("   Mesh '%s': removed %d degenerate and %d duplicate faces." % (o.name, numDegenerate, numDuplicate))
+
+			# Clean up skin weights
+			if tmsh.mtype == tmsh.T_Skin and (self.preferences['MaxInfluences'] > 0 or self.preferences['MinInfluenceWeight'] > 0.0 or self.preferences['QuantizeWeights']):
+				before, after = tmsh.limitInfluences(self.preferences['MaxInfluences'], self.preferences['MinInfluenceWeight'], self.preferences['QuantizeWeights'])
+				Torque_Util.dump_writeln("   Mesh '%s' influences per vertex, before: %s, after: %s" % (o.name, formatHistogram(before), formatHistogram(after)))
 			
-			# If we ended up being a Sorted Mesh, sort the faces
-			if tmsh.mtype == tmsh.T_Sorted:
-				tmsh.sortMesh(self.preferences['AlwaysWriteDepth'], self.preferences['ClusterDepth'])
+			# Skin meshes using more bones than the palette allows, and meshes
+			# too big for 16 bit indices are split, with the extra parts going
+			# to objects named <object>_part<n>
+			parts = []
+			paletteParts = tmsh.splitBonePalette(self.preferences['MaxBonesPerMesh'])
+			if len(paletteParts) > 1:
+				Torque_Util.dump_writeln("   Mesh '%s' uses %d bones, split into %d parts of at most %d bones." % (o.name, tmsh.getNodeIndexCount(), len(paletteParts), self.preferences['MaxBonesPerMesh']))
+			for part in paletteParts:
+				parts += part.splitMesh()
+			if len(parts) > len(paletteParts):
+				Torque_Util.dump_writeln("   Mesh '%s' exceeds the index limit, split into %d parts." % (o.name, len(parts)))
+			for i in range(0, len(parts)):
+				tmsh = parts[i]
+				partObj = obj
+				if i > 0: partObj = self.getSplitPartObject(obj, "%s_part%d" % (detail_name, i))
 				
-			# Increment polycount metric
-			polyCount += tmsh.getPolyCount()
-			obj.tempMeshes.append(tmsh)
-			numAddedMeshes += 1
+				# One primitive per material, so the engine changes state once per material
+				before, after = tmsh.batchPrimitives()
+				numPrimsBefore += before
+				numPrimsAfter += after
+
+				# If we ended up being a Sorted Mesh, sort the faces
+				if tmsh.mtype == tmsh.T_Sorted:
+					tmsh.sortMesh(self.preferences['AlwaysWriteDepth'], self.preferences['ClusterDepth'])
+					
+				# Increment polycount metric
+				polyCount += tmsh.getPolyCount()
+				partObj.tempMeshes.append(tmsh)
+				numAddedMeshes += 1
 			
 			# clean up temporary objects
 			del mesh_data
@@ -420,9 +558,55 @@ class BlenderShape(DtsShape):
 		
 		# Store constructed detail level info into shape
 		self.detaillevels.append(DetailLevel(self.addName(detailName), 0, self.numBaseDetails-1, calcSize, -1, -1, polyCount))
+		Torque_Util.dump_writeln("   %s: batched %d primitives into %d." % (detailName, numPrimsBefore, numPrimsAfter))
 			
 		return True
 		
+	def addAutoDetailLevels(self, levels):
+		'''
+		Generates lower detail levels by decimating the meshes of the highest
+		detail level. levels is a list of [size, target] pairs, where targets
+		up to 1.0 are a fraction of the highest detail's poly count and bigger
+		values are a poly count for the whole detail level.
+		'''
+		if self.numBaseDetails == 0 or self.subshapes[0].numObjects == 0:
+			Torque_Util.dump_writeWarning("Warning: No detail level to generate automatic detail levels from!")
+			return False
+		subshape = self.subshapes[0]
+		objs = self.objects[subshape.firstObject:subshape.firstObject+subshape.numObjects]
+		smallest = self.detaillevels[0].size
+		for dl in self.detaillevels:
+			if dl.size >= 0 and dl.size < smallest: smallest = dl.size
+		sourcePolys = self.detaillevels[0].polyCount
+		
+		levels = levels[:]
+		levels.sort()
+		levels.reverse()
+		for size, target in levels:
+			if size >= smallest:
+				Torque_Util.dump_writeWarning("Warning: Automatic detail level of size %d is not smaller than the existing detail levels, skipped." % size)
+				continue
+			smallest = size
+			if target <= 1.0: ratio = float(target)
+			elif sourcePolys > 0: ratio = float(target) / sourcePolys
+			else: ratio = 1.0
+			polyCount = 0
+			for obj in objs:
+				src = obj.tempMeshes[0]
+				if src.mtype == src.T_Null or len(src.primitives) == 0:
+					obj.tempMeshes.append(DtsMesh(DtsMesh.T_Null))
+					continue
+				tmsh = src.decimate(int(src.getPolyCount() * ratio + 0.5))
+				if tmsh.mtype == tmsh.T_Sorted:
+					tmsh.sortMesh(self.preferences['AlwaysWriteDepth'], self.preferences['ClusterDepth'])
+				polyCount += tmsh.getPolyCount()
+				obj.tempMeshes.append(tmsh)
+			self.numBaseDetails += 1
+			detailName = "Detail-%d" % (self.numBaseDetails)
+			self.detaillevels.append(DetailLevel(self.addName(detailName), 0, self.numBaseDetails-1, size, -1, -1, polyCount))
+			Torque_Util.dump_writeln("   Generated detail level %d: %d polys (%d in source)" % (size, polyCount, sourcePolys))
+		return True
+
 	def addBillboardDetailLevel(self, dispDetail, equator, polar, polarangle, dim, includepoles, size):
 		self.numBaseDetails += 1
 		bb = DetailLevel(self.addName("BILLBOARD-%d" % (self.numBaseDetails)),-1,
@@ -461,6 +645,9 @@ class BlenderShape(DtsShape):
 			mat.name = finalizeImageName(mat.name, False)		
 		
 	def finalizeObjects(self):
+		try: x = self.preferences['BoundingSphere']
+		except KeyError: self.preferences['BoundingSphere'] = "Box"
+		minimalSphere = (self.preferences['BoundingSphere'] == "Minimal")
 		# Go through objects, add meshes, set transforms
 		for o in self.objects:
 			o.numMeshes = len(o.tempMeshes)
@@ -490,6 +677,11 @@ class BlenderShape(DtsShape):
 				o.node = 0
 				isSkinned = True
 				Torque_Util.dump_writeln("Object %s, Skinned" % (self.sTable.get(o.name)))
+			if not isSkinned:
+				# All meshes of a rigid object share the same node, so the
+				# inverse node transform only needs to be computed once.
+				world_trans, world_rot = self.getNodeWorldPosRot(o.node)
+				inv_trans, inv_rot = -world_trans, world_rot.inverse()
 			for tmsh in o.tempMeshes:
 				'''
 					We need to assign nodes to objects and set transforms.
@@ -502,9 +694,7 @@ class BlenderShape(DtsShape):
 					
 					# Transform the mesh into node space. The Mesh vertices
 					# must all be relative to the bone they're attached to
-					world_trans, world_rot = self.getNodeWorldPosRot(o.node)
-					tmsh.translate(-world_trans)
-					tmsh.rotate(world_rot.inverse())
+					tmsh.transform(inv_trans, inv_rot)
 					
 					if tmsh.mtype == tmsh.T_Skin:
 						tmsh.mtype = tmsh.T_Standard
@@ -517,6 +707,7 @@ class BlenderShape(DtsShape):
 						world_trans, world_rot = self.getNodeWorldPosRot(tmsh.getNodeIndex(n))
 						tmsh.setNodeTransform(n, world_trans, world_rot)		
 				
+				if minimalSphere: tmsh.calculateBoundingSphere()
 				self.meshes.append(tmsh)
 				
 		# To conclude, remove subshape's and details we don't need
@@ -562,13 +753,25 @@ class BlenderShape(DtsShape):
 				self.calculateBounds()
 				self.calculateCenter()
 				self.calculateRadius()
+				self.calculateShapeSphere(minimalSphere)
 				self.calculateTubeRadius()
 		except ValueError:
 				self.calculateBounds()
 				self.calculateCenter()
 				self.calculateRadius()
+				self.calculateShapeSphere(minimalSphere)
 				self.calculateTubeRadius()
 
+	# Optionally tightens the box centered shape radius to the minimal
+	# bounding sphere, logging both so the gain is visible.
+	def calculateShapeSphere(self, minimalSphere):
+		boxRadius = self.radius
+		if minimalSphere:
+			self.calculateBoundingSphere()
+			Torque_Util.dump_writeln("   Shape radius: %f (box centered), %f (minimal sphere)" % (boxRadius, self.radius))
+		else:
+			Torque_Util.dump_writeln("   Shape radius: %f (box centered)" % boxRadius)
+
 			
 	# Converts a blender matrix to a Torque_Util.MatrixF
 	def toTorqueUtilMatrix(self, blendermatrix):
@@ -920,55 +1123,216 @@ class BlenderShape(DtsShape):
 		delta = 0.00001
 		return not ((vec[0] < 1.0 + delta) and (vec[0] > 1.0 - delta) and (vec[1] < 1.0 + delta) and (vec[1] > 1.0 - delta) and (vec[2] < 1.0 + delta) and (vec[2] > 1.0 - delta))
 
+	def pruneConstantTracks(self, sequence, numFrames, isBlend):
+		'''
+		Drops the tracks of a sampled sequence that hold the node's default
+		transform on every frame, as the engine uses the default for nodes a
+		sequence doesn't animate anyway. Constant tracks away from the
+		default are kept: the defaults are shared by every sequence and by
+		the meshes, so there is nowhere to fold them into.
+		Returns (number of tracks dropped, number of constant tracks kept).
+		'''
+		numDropped, numKept = 0, 0
+		identity = Quaternion(0.0, 0.0, 0.0, 1.0)
+		for nodeIndex in range(1, len(self.nodes)):
+			frames = sequence.frames[nodeIndex]
+			if frames == 0 or len(frames) == 0: continue
+			if isBlend:
+				defaults = [Vector(0.0, 0.0, 0.0), identity, Vector(1.0, 1.0, 1.0)]
+			else:
+				defaults = [self.defaultTranslations[nodeIndex], self.defaultRotations[nodeIndex], Vector(1.0, 1.0, 1.0)]
+			matters = [sequence.matters_translation, sequence.matters_rotation, sequence.matters_scale]
+			for channel in range(0, 3):
+				if not matters[channel][nodeIndex]: continue
+				# Same tolerances as isTranslated, isRotated and isScaled
+				if channel == 1: delta = 0.0001
+				else: delta = 0.00001
+				first = frames[0][channel]
+				if first is None: continue
+				isConstant = True
+				for frame in frames[1:numFrames]:
+					value = frame[channel]
+					if value is None or not (value.eqDelta(first, delta) or (channel == 1 and value.eqDelta(-first, delta))):
+						isConstant = False
+						break
+				if not isConstant: continue
+				default = defaults[channel]
+				if first.eqDelta(default, delta) or (channel == 1 and first.eqDelta(-default, delta)):
+					matters[channel][nodeIndex] = False
+					numDropped += 1
+				else:
+					numKept += 1
+
+		# Update the sequence flags to match what is left
+		sequence.has_loc = True in sequence.matters_translation
+		sequence.has_rot = True in sequence.matters_rotation
+		sequence.has_scale = True in sequence.matters_scale
+		return numDropped, numKept
+
 	
-	# adds a ground frame to a sequence
-	def addGroundFrame(self, sequence, frame_idx, boundsStartMat):
+	def reduceKeyFrames(self, sequence, numFrames):
+		'''
+		Replaces the densely sampled frames of a sequence with the smallest
+		number of evenly spaced keyframes that stays within the
+		AdaptiveSampling error bounds on every animated track.
+		Returns the new number of keyframes.
+		'''
+		tracks = []
+		for nodeIndex in range(1, len(self.nodes)):
+			frames = sequence.frames[nodeIndex]
+			if frames == 0 or len(frames) == 0: continue
+			matters = [sequence.matters_translation[nodeIndex], sequence.matters_rotation[nodeIndex], sequence.matters_scale[nodeIndex]]
+			for channel in range(0, 3):
+				if not matters[channel]: continue
+				tracks.append((nodeIndex, channel, [tuple(frame[channel].members) for frame in frames[0:numFrames]]))
+			# anisotropic scale also has a rotation track for the scale
+			if matters[2] and len(sequence.scaleRotations[nodeIndex]) > 0:
+				tracks.append((nodeIndex, 3, [tuple(q.members) for q in sequence.scaleRotations[nodeIndex][0:numFrames]]))
+		if len(tracks) == 0: return numFrames
+		settings = self.preferences['AdaptiveSampling']
+		# Rotations (and scale rotations) in degrees, translations in shape units, scales as factors
+		channelLimits = [settings['MaxLocError'], settings['MaxRotError'], settings['MaxScaleError'], settings['MaxRotError']]
+		numKeys, errors = Dts_Sampling.chooseKeyCount([t[2] for t in tracks], [channelLimits[t[1]] for t in tracks])
+		maxErrors = [0.0, 0.0, 0.0, 0.0]
+		for i in range(0, len(tracks)):
+			maxErrors[tracks[i][1]] = max(maxErrors[tracks[i][1]], errors[i])
+		Torque_Util.dump_writeln("      Adaptive sampling: %d keyframes (from %d), max error %f degrees, %f units, %f scale" % (numKeys, numFrames, max(maxErrors[1], maxErrors[3]), maxErrors[0], maxErrors[2]))
+		if numKeys == numFrames: return numFrames
+
+		newFrames = {}
+		for nodeIndex, channel, track in tracks:
+			values = Dts_Sampling.resampleTrack(track, numKeys)
+			if channel == 3:
+				sequence.scaleRotations[nodeIndex] = [Quaternion(v[0], v[1], v[2], v[3]) for v in values]
+				continue
+			try: keys = newFrames[nodeIndex]
+			except KeyError: keys = newFrames[nodeIndex] = [[None, None, None] for k in range(0, numKeys)]
+			for k in range(0, numKeys):
+				if channel == 1: keys[k][1] = Quaternion(values[k][0], values[k][1], values[k][2], values[k][3])
+				else: keys[k][channel] = Vector(values[k][0], values[k][1], values[k][2])
+		for nodeIndex in range(1, len(self.nodes)):
+			if sequence.frames[nodeIndex] == 0: continue
+			try: sequence.frames[nodeIndex] = newFrames[nodeIndex]
+			except KeyError: sequence.frames[nodeIndex] = [[None, None, None] for k in range(0, numKeys)]
+		sequence.numKeyFrames = numKeys
+		return numKeys
+
+	# Works out which of the frames a sequence goes through get a ground frame: the
+	# first frame at or past the end of each of the ground_target equal parts of the
+	# sequence.
+	def getGroundFrames(self, sequence, curFrames):
+		groundFrames = []
+		duration = sequence.numKeyFrames / sequence.ground_target
+		for frame_idx in curFrames:
+			if len(groundFrames) == sequence.ground_target: break
+			if frame_idx >= (duration * (len(groundFrames)+1))-1:
+				groundFrames.append(frame_idx)
+		return groundFrames
+
+	# A Dts_Curves curve with the points and settings of a Blender IPO curve
+	def getIpoCurve(self, icu):
+		points = []
+		for point in icu.bezierPoints:
+			vec = point.vec
+			points.append(((vec[0][0], vec[0][1]), (vec[1][0], vec[1][1]), (vec[2][0], vec[2][1])))
+		return Dts_Curves.Curve(points, icu.interpolation, icu.extend)
+
+	# The collapseBlenderTransform of an unparented object at each of frames, worked
+	# out from its IPO curves.  Returns None if anything besides the object's own
+	# location, rotation and size curves could move it.
+	def getObjectMatrices(self, obj, frames):
+		if obj.getParent() != None or len(obj.constraints) > 0: return None
+		ipo = obj.getIpo()
+		curveTypes = [Blender.Ipo.OB_LOCX, Blender.Ipo.OB_LOCY, Blender.Ipo.OB_LOCZ, \
+			Blender.Ipo.OB_ROTX, Blender.Ipo.OB_ROTY, Blender.Ipo.OB_ROTZ, \
+			Blender.Ipo.OB_SIZEX, Blender.Ipo.OB_SIZEY, Blender.Ipo.OB_SIZEZ]
+		loc, rot, size = obj.getLocation(), obj.getEuler(), obj.getSize()
+		# channels without a curve stay at the object's own values
+		values = []
+		for v in [loc[0], loc[1], loc[2], rot[0], rot[1], rot[2], size[0], size[1], size[2]]:
+			values.append([v] * len(frames))
+		if ipo != None:
+			numCurves = 0
+			for i in range(0, len(curveTypes)):
+				icu = ipo[curveTypes[i]]
+				if icu == None: continue
+				if getattr(icu, 'driver', 0): return None
+				numCurves += 1
+				values[i] = self.getIpoCurve(icu).sample(frames)
+				# rotation curves are in tens of degrees
+				if 3 <= i <= 5: values[i] = [v * pMath.pi / 18.0 for v in values[i]]
+			# delta transforms, time curves and the like
+			if numCurves != ipo.getNcurves(): return None
+		mats = []
+		for f in range(0, len(frames)):
+			# the same as Blender's EulToMat3, scaled and moved like an object matrix
+			ci, cj, ch = pMath.cos(values[3][f]), pMath.cos(values[4][f]), pMath.cos(values[5][f])
+			si, sj, sh = pMath.sin(values[3][f]), pMath.sin(values[4][f]), pMath.sin(values[5][f])
+			cc, cs, sc, ss = ci*ch, ci*sh, si*ch, si*sh
+			sx, sy, sz = values[6][f], values[7][f], values[8][f]
+			mats.append(MatrixF([cj*ch*sx, cj*sh*sx, -sj*sx, 0.0,
+					(sj*sc-cs)*sy, (sj*ss+cc)*sy, cj*si*sy, 0.0,
+					(sj*cc+ss)*sz, (sj*cs-sc)*sz, cj*ci*sz, 0.0,
+					values[0][f], values[1][f], values[2][f], 1.0]))
+		exportScale = self.preferences['ExportScale']
+		scaleMat = MatrixF([exportScale, 0.0, 0.0, 0.0,
+				    0.0, exportScale, 0.0, 0.0,
+				    0.0, 0.0, exportScale, 0.0,
+				    0.0, 0.0, 0.0, exportScale])
+		return [scaleMat * mat for mat in mats]
+
+	# Adds the ground frames of a sequence at the given frames, taken from the Bounds
+	# object all in one go.  Returns True if Blender had to be moved through the
+	# frames, in which case the sequence's action has been set up with setupActionPose.
+	def addGroundFrames(self, sequence, groundFrames, boundsStartMat, seqPrefs, isBlend):
 		# quit trying to export ground frames if we have had an error.
 		try: x = self.GroundFrameError
 		except: self.GroundFrameError = False
-		if self.GroundFrameError: return
-		
-		# Add ground frames if enabled
-		if sequence.has_ground:
-			# Check if we have any more ground frames to add
-			if sequence.ground_target != sequence.numGroundFrames:
-				# Ok, we can add a ground frame, but do we add it now?
-				duration = sequence.numKeyFrames / sequence.ground_target
-				if frame_idx >= (duration * (sequence.numGroundFrames+1))-1:
-					# We are ready, lets stomp!
-					try:						
-						bound_obj = Blender.Object.Get("Bounds")
-						bound_parent = bound_obj.getParent()
-						if bound_parent != None and bound_parent.getType() == 'Armature':
-							pose = bound_parent.getPose()
-							pos = self.poseUtil.getBoneLocWS(bound_parent.getName(), bound_obj.parentbonename, pose)
-							pos = pos - self.poseUtil.getBoneRestPosWS(bound_parent.name, bound_obj.parentbonename)
-							rot = self.poseUtil.getBoneRotWS(bound_parent.getName(), bound_obj.parentbonename, pose)
-							rot = self.poseUtil.getBoneRestRotWS(bound_parent.name, bound_obj.parentbonename).inverse() * rot
-							self.groundTranslations.append(pos)
-							self.groundRotations.append(rot)
-						else:
-							bound_obj = Blender.Object.Get("Bounds")							
-							matf = self.collapseBlenderTransform(bound_obj)
-							pos = Vector(matf.get(3,0),matf.get(3,1),matf.get(3,2))
-							pos = pos - Vector(boundsStartMat.get(3,0),boundsStartMat.get(3,1),boundsStartMat.get(3,2))
-							matf = boundsStartMat.inverse() * matf 
-							rot = Quaternion().fromMatrix(matf).inverse()
-							self.groundTranslations.append(pos)
-							self.groundRotations.append(rot)							
-							
-						sequence.numGroundFrames += 1
-					except ValueError:
-						# record the error state so we don't repeat ourselves.
-						self.GroundFrameError = True
-						sequence.has_ground = False # <- nope, no ground frames.
-						Torque_Util.dump_writeErr("Error: Could not get ground frames %d" % sequence.numGroundFrames)
-						Torque_Util.dump_writeln("  You must have an object named Bounds in your scene to export ground frames.")
+		if self.GroundFrameError or len(groundFrames) == 0: return False
 
+		posed = False
+		translations, rotations = [], []
+		try:
+			bound_obj = Blender.Object.Get("Bounds")
+			bound_parent = bound_obj.getParent()
+			if bound_parent != None and bound_parent.getType() == 'Armature':
+				self.setupActionPose(sequence, seqPrefs, isBlend)
+				posed = True
+				restPos = self.poseUtil.getBoneRestPosWS(bound_parent.name, bound_obj.parentbonename)
+				restRotInv = self.poseUtil.getBoneRestRotWS(bound_parent.name, bound_obj.parentbonename).inverse()
+				for frame in groundFrames:
+					Blender.Set('curframe', frame)
+					pose = bound_parent.getPose()
+					translations.append(self.poseUtil.getBoneLocWS(bound_parent.getName(), bound_obj.parentbonename, pose) - restPos)
+					rotations.append(restRotInv * self.poseUtil.getBoneRotWS(bound_parent.getName(), bound_obj.parentbonename, pose))
+			else:
+				mats = self.getObjectMatrices(bound_obj, groundFrames)
+				if mats == None:
+					self.setupActionPose(sequence, seqPrefs, isBlend)
+					posed = True
+					mats = []
+					for frame in groundFrames:
+						Blender.Set('curframe', frame)
+						mats.append(self.collapseBlenderTransform(bound_obj))
+				startPos = Vector(boundsStartMat.get(3,0),boundsStartMat.get(3,1),boundsStartMat.get(3,2))
+				startMatInv = boundsStartMat.inverse()
+				for matf in mats:
+					translations.append(Vector(matf.get(3,0),matf.get(3,1),matf.get(3,2)) - startPos)
+					rotations.append(Quaternion().fromMatrix(startMatInv * matf).inverse())
+		except ValueError:
+			# record the error state so we don't repeat ourselves.
+			self.GroundFrameError = True
+			sequence.has_ground = False # <- nope, no ground frames.
+			Torque_Util.dump_writeErr("Error: Could not get ground frames %d" % len(translations))
+			Torque_Util.dump_writeln("  You must have an object named Bounds in your scene to export ground frames.")
+			return posed
+		self.groundTranslations.extend(translations)
+		self.groundRotations.extend(rotations)
+		sequence.numGroundFrames += len(translations)
+		return posed
 
-	
 	# grab the pose transform of whatever frame we're currently at.  Frame must be set before calling this method.
-	def getPoseTransform(self, sequence, nodeIndex, frame_idx, pose, baseTransform=None, getRawValues=False):
+	def getPoseTransform(self, sequence, nodeIndex, frame_idx, pose, baseTransform=None, getRawValues=False, bonePoses=None):
 
 		loc, rot, scale = None, None, None
 		arm = self.addedArmatures[self.nodes[nodeIndex].armIdx][0]
@@ -988,10 +1352,13 @@ class BlenderShape(DtsShape):
 		
 
 		
-		# Get our values from the poseUtil interface		
-		transVec, quatRot = self.poseUtil.getBoneLocRotLS(arm.name, bonename, pose)
-		# - determine the scale of the bone.
-		scaleVec = pose.bones[bonename].size
+		# Get our values from the poseUtil interface, or from the whole
+		# armature's values if they have already been worked out for this frame
+		if bonePoses != None: transVec, quatRot, scaleVec = bonePoses[bonename][0:3]
+		else:
+			transVec, quatRot = self.poseUtil.getBoneLocRotLS(arm.name, bonename, pose)
+			# - determine the scale of the bone.
+			scaleVec = pose.bones[bonename].size
 
 
 		# We dump out every transform regardless of whether it matters or not.  This avoids having to
@@ -1096,32 +1463,34 @@ class BlenderShape(DtsShape):
 		
 		tempSequence.numKeyFrames = 10000 # one brazilion
 
-		# loop through each node and reset it's transforms.  This avoids transforms carrying over from
-		# other animations. Need to cycle through _ALL_ bones and reset the transforms.
-		for armOb in Blender.Object.Get():
-			if (armOb.getType() != 'Armature') or (armOb.name == "DTS-EXP-GHOST-OB"): continue
-			tempPose = armOb.getPose()
-			#for bonename in armOb.getData().bones.keys():
-			for bonename in self.poseUtil.armBones[armOb.name].keys():
-				# reset the bone's transform
-				tempPose.bones[bonename].quat = bMath.Quaternion().identity()
-				tempPose.bones[bonename].size = bMath.Vector(1.0, 1.0, 1.0)
-				tempPose.bones[bonename].loc = bMath.Vector(0.0, 0.0, 0.0)
-			# update the pose.
-			tempPose.update()
-
-		# now set the active action and move to the desired frame
+		# The reference pose is evaluated the same way as a normal export of its
+		# action, so it shares that action's cached poses.  If every armature is
+		# cached there is no need to touch Blender at all.
+		allCached = True
 		for i in range(0, len(self.addedArmatures)):
-			arm = self.addedArmatures[i][0]	
-			useAction.setActive(arm)
+			arm = self.addedArmatures[i][0]
+			if not self.poseUtil.poseCache.has(arm.name, useActionName, useFrame): allCached = False
+
+		if not allCached:
+			# loop through each node and reset it's transforms.  This avoids transforms carrying over from
+			# other animations. Need to cycle through _ALL_ bones and reset the transforms.
+			self.poseUtil.resetPoses()
+
+			# now set the active action and move to the desired frame
+			for i in range(0, len(self.addedArmatures)):
+				arm = self.addedArmatures[i][0]	
+				useAction.setActive(arm)
 
-		# Set the current frame in blender
-		#context.currentFrame(useFrame)
-		Blender.Set('curframe', useFrame)
+			# Set the current frame in blender
+			#context.currentFrame(useFrame)
+			Blender.Set('curframe', useFrame)
+			self.poseUtil.posesChanged()
 		
 		for armIdx in range(0, len(self.addedArmatures)):
 			arm = self.addedArmatures[armIdx][0]
-			pose = arm.getPose()
+			if allCached: pose = None
+			else: pose = arm.getPose()
+			bonePoses = self.poseUtil.getArmaturePose(arm.name, useActionName, useFrame, pose)
 			# build our transform for each node		
 			for nodeIndex in range(1, len(self.nodes)):
 				# since Armature.getPose() leaks memory in Blender 2.41, skip nodes not
@@ -1131,7 +1500,7 @@ class BlenderShape(DtsShape):
 				tempSequence.matters_translation[nodeIndex] = True
 				tempSequence.matters_rotation[nodeIndex] = True
 				tempSequence.matters_scale[nodeIndex] = True
-				baseTransforms[nodeIndex] = self.getPoseTransform(tempSequence, nodeIndex, useFrame, pose, None, True)
+				baseTransforms[nodeIndex] = self.getPoseTransform(tempSequence, nodeIndex, useFrame, pose, None, True, bonePoses)
 		
 		del tempSequence
 		return baseTransforms
@@ -1210,19 +1579,303 @@ class BlenderShape(DtsShape):
 		
 		return sequence
 	
-	def getActionFrames(self, numOverallFrames, interpolateInc, seqPrefs, sequence, boundsStartMat, baseTransforms, numFrameSamples, isBlend, addScale):
+	# Checks whether a channel's scale curves ever scale unevenly over the first
+	# numFrames frames.
+	def isAnisotropicScale(self, channelIpo, numFrames):
+		for i in range(0, numFrames):
+			sx = channelIpo[Blender.Ipo.PO_SCALEX][i]
+			sy = channelIpo[Blender.Ipo.PO_SCALEY][i]
+			sz = channelIpo[Blender.Ipo.PO_SCALEZ][i]
+			sv = self.poseUtil.toTorqueVec([sx, sy, sz])
+			sv2 = self.poseUtil.toTorqueVec([sy, sz, sx])
+			if not sv.eqDelta(sv2, 0.001): return True
+		return False
+
+	# Works out how an action sequence samples its action.  Returns the overall
+	# number of frames, how many of them are taken from the action, the step
+	# between them in action frames, and whether adaptive sampling picks the
+	# keyframes afterwards.
+	def getActionSampling(self, seqPrefs, numOverallFrames):
+		# Calculate the raw number of action frames, from start frame to end frame, inclusive.
+		rawActFrames = (seqPrefs['Action']['EndFrame'] - seqPrefs['Action']['StartFrame']) + 1
+
+		# calc the interpolation increment
+		try: interpolateInc = float(rawActFrames-1.0) / float(seqPrefs['Action']['FrameSamples']-1.0)
+		except: interpolateInc = 1.0
+		
+		# make sure it's not less than 1
+		if interpolateInc < 1.0: interpolateInc = 1.0
+
+		# this is the number of real action frames we are exporting.
+		#numFrameSamples = seqPrefs['Action']['FrameSamples']+1
+		numFrameSamples = seqPrefs['Action']['FrameSamples']
+
+		# Adaptive sampling takes every frame of the action and picks the number
+		# of keyframes afterwards. Visibility and IFL keys are tied to the frame
+		# samples, so sequences using them keep the fixed count.
+		try: x = self.preferences['AdaptiveSampling']
+		except KeyError: self.preferences['AdaptiveSampling'] = {'Enabled' : False, 'MaxRotError' : 0.5, 'MaxLocError' : 0.005, 'MaxScaleError' : 0.001}
+		try: x = self.preferences['AdaptiveSampling']['MaxScaleError']
+		except KeyError: self.preferences['AdaptiveSampling']['MaxScaleError'] = 0.001
+		adaptive = self.preferences['AdaptiveSampling']['Enabled'] and numOverallFrames == numFrameSamples \
+			and not (seqPrefs['Vis']['Enabled'] or seqPrefs['IFL']['Enabled'])
+		if adaptive:
+			numOverallFrames = numFrameSamples = rawActFrames
+			interpolateInc = 1.0
+		return numOverallFrames, numFrameSamples, interpolateInc, adaptive
+
+	# The Blender frames an action sequence takes its poses from, without repeats
+	def getActionSampleFrames(self, seqPrefs, numOverallFrames, numFrameSamples, interpolateInc):
+		frames = []
+		for frame in range(0, min(numOverallFrames, numFrameSamples)):
+			curFrame = int(round(float(frame)*interpolateInc,0)) + seqPrefs['Action']['StartFrame']
+			if not curFrame in frames: frames.append(curFrame)
+		return frames
+
+	# Plans the pose sampling for a list of (sequence name, sequence prefs), in the
+	# order they will be exported.  Every armature pose an action sequence or a blend
+	# reference pose needs from an action is gathered up, so that the union of them
+	# can be sampled in one pass before the first sequence that uses the action.
+	# Returns a dictionary of sequence name -> list of (action name, action key,
+	# frames, decompose) to hand to sampleActionFrames before adding the sequence.
+	def planSequenceSampling(self, seqList):
+		actions = Blender.Armature.NLA.GetActions()
+		groups = {}
+		order = []
+		for seqName, seqPrefs in seqList:
+			if not validateAction(seqName, seqPrefs) or getNumActFrames(seqName, seqPrefs) < 1: continue
+			uses = []
+			if seqPrefs['Action']['Blend']:
+				# blends are reset to their reference pose, so only the reference
+				# pose itself is shared with other sequences.
+				refName = seqPrefs['Action']['BlendRefPoseAction']
+				if refName in actions.keys(): uses.append(((refName, refName), [seqPrefs['Action']['BlendRefPoseFrame']], False))
+			elif seqName in actions.keys():
+				numOverallFrames, numFrameSamples, interpolateInc, adaptive = self.getActionSampling(seqPrefs, getSeqNumFrames(seqName, seqPrefs))
+				frames = self.getActionSampleFrames(seqPrefs, numOverallFrames, numFrameSamples, interpolateInc)
+				if self.hasAnisotropicScale(actions[seqName]): uses.append(((seqName, ('Decomposed', seqName)), frames, True))
+				else: uses.append(((seqName, seqName), frames, False))
+			for key, frames, decompose in uses:
+				if not key in groups:
+					groups[key] = [seqName, [], decompose]
+					order.append(key)
+				for frame in frames:
+					if not frame in groups[key][1]: groups[key][1].append(frame)
+		plan = {}
+		for key in order:
+			firstSeq, frames, decompose = groups[key]
+			frames.sort()
+			if not firstSeq in plan: plan[firstSeq] = []
+			plan[firstSeq].append((key[0], key[1], frames, decompose))
+		return plan
+
+	# Checks an action the same way addAction does for anisotropic scale on any
+	# of the shape's nodes.
+	def hasAnisotropicScale(self, action):
+		nf = getHighestActFrame(action)
+		channels = action.getAllChannelIpos()
+		for channel_name in channels:
+			ipo = channels[channel_name]
+			if ipo == None or ipo.getNcurves() == 0: continue
+			if self.getNodeIndex(channel_name) == None: continue
+			try:
+				if ipo[Blender.Ipo.PO_SCALEX] == None and ipo[Blender.Ipo.PO_SCALEY] == None and ipo[Blender.Ipo.PO_SCALEZ] == None: continue
+				if self.isAnisotropicScale(ipo, nf): return True
+			except ValueError: continue
+		return False
+
+	# Puts the poses of every armature at frames of an action into the pose cache,
+	# in one pass over the action, as planned by planSequenceSampling.
+	def sampleActionFrames(self, actionName, actionKey, frames, decompose):
+		if len(frames) == 0 or self.poseUtil.poseCache.maxBytes <= 0: return
+		armNames = [self.addedArmatures[i][0].name for i in range(0, len(self.addedArmatures))]
+		if len(armNames) == 0: return
+		needed = []
+		for frame in frames:
+			for armName in armNames:
+				if not self.poseUtil.poseCache.has(armName, actionKey, frame):
+					needed.append(frame)
+					break
+		if len(needed) == 0: return
+		# only worth doing if the poses will still be there when they are used
+		numBones = 0
+		for armName in armNames: numBones += len(self.poseUtil.armBones[armName])
+		if len(needed) * numBones * Dts_Kinematics.POSE_BYTES_PER_BONE > self.poseUtil.poseCache.maxBytes * 0.9:
+			Torque_Util.dump_writeln("   Poses of action %s do not fit in the pose cache, sampling per sequence." % actionName)
+			return
+		if self.getDirectActionPoses(actionName, needed, actionKey, decompose) != None:
+			Torque_Util.dump_writeln("   Sampled %d frame(s) of action %s from its curves." % (len(needed), actionName))
+			return
+		# reset all of the bones the same way addAction does, then go through the
+		# frames once with the action active.
+		self.poseUtil.resetPoses()
+		act = Blender.Armature.NLA.GetActions()[actionName]
+		for i in range(0, len(self.addedArmatures)):
+			act.setActive(self.addedArmatures[i][0])
+		self.poseUtil.posesChanged()
+		for frame in needed:
+			Blender.Set('curframe', frame)
+			for i in range(0, len(self.addedArmatures)):
+				arm = self.addedArmatures[i][0]
+				self.poseUtil.getArmaturePose(arm.name, actionKey, frame, arm.getPose(), decompose)
+		Torque_Util.dump_writeln("   Sampled %d frame(s) of action %s in one pass." % (len(needed), actionName))
+
+	# Works out the poses of every armature at frames straight from the action's IPO
+	# curves, for armatures whose bones are reset to rest and then moved by the
+	# action alone.  Returns a dictionary of (armature name, frame) -> bone poses, or
+	# None if any armature needs Blender to evaluate it.  decompose is as for
+	# DtsPoseUtilClass.getArmaturePose.
+	def getDirectActionPoses(self, actionName, frames, actionKey, decompose=False):
+		for armIdx in range(0, len(self.addedArmatures)):
+			if not self.poseUtil.isPlainFK(self.addedArmatures[armIdx][0].name): return None
+
+		# sample every curve at all of the frames at once
+		curveTypes = [Blender.Ipo.PO_LOCX, Blender.Ipo.PO_LOCY, Blender.Ipo.PO_LOCZ, \
+			Blender.Ipo.PO_QUATW, Blender.Ipo.PO_QUATX, Blender.Ipo.PO_QUATY, Blender.Ipo.PO_QUATZ, \
+			Blender.Ipo.PO_SCALEX, Blender.Ipo.PO_SCALEY, Blender.Ipo.PO_SCALEZ]
+		defaults = [0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 1.0, 1.0]
+		samples = {}
+		channelIpos = Blender.Armature.NLA.GetActions()[actionName].getAllChannelIpos()
+		for bonename in channelIpos.keys():
+			ipo = channelIpos[bonename]
+			if ipo == None: continue
+			values = []
+			for i in range(0, len(curveTypes)):
+				icu = ipo[curveTypes[i]]
+				if icu == None:
+					values.append([defaults[i]] * len(frames))
+					continue
+				# driven curves depend on other objects
+				if getattr(icu, 'driver', 0): return None
+				values.append(self.getIpoCurve(icu).sample(frames))
+			samples[bonename] = values
+		del channelIpos
+
+		# Everything the rigs need is plain data now, so the frames of each armature
+		# can be split up between worker processes.  Small jobs are not worth
+		# starting them for.
+		numWorkers = self.poseUtil.poseWorkers
+		numBones = 0
+		for armIdx in range(0, len(self.addedArmatures)):
+			numBones += len(self.poseUtil.getFKRig(self.addedArmatures[armIdx][0].name).bones)
+		if numBones * len(frames) < MIN_WORKER_BONE_FRAMES: numWorkers = 0
+		numChunks = max(1, numWorkers)
+		chunkSize = max(1, (len(frames) + numChunks - 1) / numChunks)
+		jobs, jobFrames = [], []
+		for armIdx in range(0, len(self.addedArmatures)):
+			arm = self.addedArmatures[armIdx][0]
+			rig = self.poseUtil.getFKRig(arm.name)
+			for first in range(0, len(frames), chunkSize):
+				frameChannels = []
+				for f in range(first, min(first + chunkSize, len(frames))):
+					channels = {}
+					for bonename in rig.bones:
+						try: v = samples[bonename]
+						except KeyError: continue
+						channels[bonename] = ((v[0][f], v[1][f], v[2][f]), (v[3][f], v[4][f], v[5][f], v[6][f]), (v[7][f], v[8][f], v[9][f]))
+					frameChannels.append(channels)
+				jobs.append((rig, frameChannels, decompose))
+				jobFrames.append((arm.name, frames[first:first + chunkSize]))
+
+		# the results come back in the order of the jobs, whoever worked them out
+		poses = {}
+		results = Dts_Kinematics.evaluatePosesParallel(jobs, numWorkers)
+		for j in range(0, len(jobs)):
+			armName, chunkFrames = jobFrames[j]
+			for f in range(0, len(chunkFrames)):
+				poses[(armName, chunkFrames[f])] = results[j][f]
+				self.poseUtil.poseCache.put(armName, actionKey, chunkFrames[f], results[j][f])
+		return poses
+
+	# Gets the armatures ready to be moved through the frames of a sequence's action.
+	# Left until a frame actually has to be evaluated by Blender, so sequences whose
+	# poses are all known already never touch the bones.
+	def setupActionPose(self, sequence, seqPrefs, isBlend):
+		# For blend animations, we need to reset the pose to the reference pose instead of the default
+		# transforms.  Otherwise, we won't be able to tell reliably which bones have actually moved
+		# during the blend sequence.
+		if isBlend:
+			self.poseUtil.resetPoses()
+			# get our blend ref pose action
+			refPoseAct = Blender.Armature.NLA.GetActions()[seqPrefs['Action']['BlendRefPoseAction']]
+			# now set the active action and move to the desired frame
+			for i in range(0, len(self.addedArmatures)):
+				arm = self.addedArmatures[i][0]
+				refPoseAct.setActive(arm)
+			# Set the current frame in blender
+			Blender.Set('curframe', seqPrefs['Action']['BlendRefPoseFrame'])
+			self.poseUtil.posesChanged()
+
+		# For normal animations, loop through each node and reset it's transforms.
+		# This avoids transforms carrying over from other action animations.
+		else:
+			self.poseUtil.resetPoses()
+
+		act = Blender.Armature.NLA.GetActions()[sequence.name]
+
+		# loop through all of the armatures and set the current action as active for all
+		# of them.  Sadly, there is no way to tell which action belongs with which armature
+		# using the Python API in Blender, so this is a bit messy.
+		for i in range(0, len(self.addedArmatures)):
+			arm = self.addedArmatures[i][0]			
+			act.setActive(arm)
+		self.poseUtil.posesChanged()
+
+	def getActionFrames(self, numOverallFrames, interpolateInc, seqPrefs, sequence, boundsStartMat, baseTransforms, numFrameSamples, isBlend):
+		# Poses are cached by action, and for blends by the reference pose the bones
+		# were reset to.  Anisotropic scale needs the bones' matrices taken apart,
+		# which gives poses of a different form, so those are cached separately.
+		decompose = sequence.has_ansitropic_scale
+		if isBlend: actionKey = (sequence.name, seqPrefs['Action']['BlendRefPoseAction'], seqPrefs['Action']['BlendRefPoseFrame'])
+		else: actionKey = sequence.name
+		if decompose: actionKey = ('Decomposed', actionKey)
+		posed = False
+		# The ground frames are taken from the Bounds object in a pass of their own,
+		# so they never hold up the poses below.
+		if sequence.has_ground:
+			curFrames = [int(round(float(frame)*interpolateInc,0)) + seqPrefs['Action']['StartFrame'] for frame in range(0, numOverallFrames)]
+			posed = self.addGroundFrames(sequence, self.getGroundFrames(sequence, curFrames), boundsStartMat, seqPrefs, isBlend)
+		# Plain FK rigs are evaluated from the action's curves instead of moving
+		# Blender through the frames.  Blends start from the reference pose, so
+		# they need Blender.
+		directPoses = None
+		if not isBlend:
+			# frames planned ahead by sampleActionFrames are already cached
+			frames = []
+			for curFrame in self.getActionSampleFrames(seqPrefs, numOverallFrames, numFrameSamples, interpolateInc):
+				for armIdx in range(0, len(self.addedArmatures)):
+					if not self.poseUtil.poseCache.has(self.addedArmatures[armIdx][0].name, actionKey, curFrame):
+						frames.append(curFrame)
+						break
+			if len(frames) > 0:
+				directPoses = self.getDirectActionPoses(sequence.name, frames, actionKey, decompose)
+				if directPoses != None: Torque_Util.dump_writeln("      Sampled directly from the action curves")
+		if directPoses == None: directPoses = {}
 		# loop through all of the exisitng action frames
 		for frame in range(0, numOverallFrames):
 			# Set the current frame in blender
 			#context.currentFrame(int(frame*interpolateInc))
 			curFrame = int(round(float(frame)*interpolateInc,0)) + seqPrefs['Action']['StartFrame']
-			Blender.Set('curframe', curFrame)
-			# add ground frames
-			self.addGroundFrame(sequence, curFrame, boundsStartMat)
+			# skip the frame change if every armature's pose is already known, frames
+			# past the end of the action just repeat the last one.
+			allCached = True
+			for armIdx in range(0, len(self.addedArmatures)):
+				arm = self.addedArmatures[armIdx][0]
+				if allCached and frame < numFrameSamples and not ((arm.name, curFrame) in directPoses or self.poseUtil.poseCache.has(arm.name, actionKey, curFrame)): allCached = False
+			if not allCached:
+				if not posed:
+					self.setupActionPose(sequence, seqPrefs, isBlend)
+					posed = True
+				Blender.Set('curframe', curFrame)
 			# loop through each armature
 			for armIdx in range(0, len(self.addedArmatures)):
 				arm = self.addedArmatures[armIdx][0]
-				pose = arm.getPose()
+				if allCached: pose = None
+				else: pose = arm.getPose()
+				# evaluate every bone of the armature in one pass
+				if frame < numFrameSamples:
+					try: bonePoses = directPoses[(arm.name, curFrame)]
+					except KeyError: bonePoses = self.poseUtil.getArmaturePose(arm.name, actionKey, curFrame, pose, decompose)
 				# loop through each node for the current frame.
 				#i = 0
 				for nodeIndex in range(1, len(self.nodes)):
@@ -1233,33 +1886,20 @@ class BlenderShape(DtsShape):
 						baseTransform = baseTransforms[nodeIndex]
 					else:
 						baseTransform = None
-					if not addScale:
-						# make sure we're not past the end of our action
-						if frame < numFrameSamples:
-							# let's pretend that everything matters, we'll remove the cruft later
-							# this prevents us from having to do a second pass through the frames.
-							loc, rot, scale = self.getPoseTransform(sequence, nodeIndex, curFrame, pose, baseTransform)
-							sequence.frames[nodeIndex].append([loc,rot,scale])
-						# if we're past the end, just duplicate the last good frame.
-						else:
-							loc, rot, scale = sequence.frames[nodeIndex][-1][0], sequence.frames[nodeIndex][-1][1], sequence.frames[nodeIndex][-1][2]
-							sequence.frames[nodeIndex].append([loc,rot,scale])
+					# make sure we're not past the end of our action
+					if frame < numFrameSamples:
+						# let's pretend that everything matters, we'll remove the cruft later
+						# this prevents us from having to do a second pass through the frames.
+						loc, rot, scale = self.getPoseTransform(sequence, nodeIndex, curFrame, pose, baseTransform, False, bonePoses)
+						sequence.frames[nodeIndex].append([loc,rot,scale])
+						if decompose:
+							sequence.scaleRotations[nodeIndex].append(bonePoses[self.sTable.get(self.nodes[nodeIndex].name)][3])
+					# if we're past the end, just duplicate the last good frame.
 					else:
-						# make sure we're not past the end of our action
-						if frame < numFrameSamples:
-							# let's pretend that everything matters, we'll remove the cruft later
-							# this prevents us from having to do a second pass through the frames.							
-							node = self.nodes[nodeIndex]
-							bonename = self.sTable.get(node.name)
-							scale = self.poseUtil.toTorqueVec(pose.bones[bonename].size)
-							if self.isScaled(scale):
-								sequence.matters_scale[nodeIndex] = True
-								sequence.has_scale = True
-								sequence.frames[nodeIndex][frame][2] = scale
-						# if we're past the end, just duplicate the last good frame.
-						else:
-							loc, rot, scale = sequence.frames[nodeIndex][-1][0], sequence.frames[nodeIndex][-1][1], sequence.frames[nodeIndex][-1][2]
-							sequence.frames[nodeIndex].append([loc,rot,scale])
+						loc, rot, scale = sequence.frames[nodeIndex][-1][0], sequence.frames[nodeIndex][-1][1], sequence.frames[nodeIndex][-1][2]
+						sequence.frames[nodeIndex].append([loc,rot,scale])
+						if decompose:
+							sequence.scaleRotations[nodeIndex].append(sequence.scaleRotations[nodeIndex][-1])
 
 
 
@@ -1333,14 +1973,8 @@ class BlenderShape(DtsShape):
 					sequence.matters_scale[nodeIndex] = True
 					sequence.has_scale = True
 					# check for anisotropic scale
-					for i in range(0, nf):
-						sx = channels[channel_name][Blender.Ipo.PO_SCALEX][i]
-						sy = channels[channel_name][Blender.Ipo.PO_SCALEY][i]
-						sz = channels[channel_name][Blender.Ipo.PO_SCALEZ][i]
-						sv = self.poseUtil.toTorqueVec([sx, sy, sz])
-						sv2 = self.poseUtil.toTorqueVec([sy, sz, sx])
-						if not sv.eqDelta(sv2, 0.001):
-							sequence.has_ansitropic_scale = True
+					if self.isAnisotropicScale(channels[channel_name], nf):
+						sequence.has_ansitropic_scale = True
 			except ValueError:
 				# not an Action IPO...
 				print "whoops!"
@@ -1374,26 +2008,17 @@ class BlenderShape(DtsShape):
 		#sequence.numKeyFrames = getNumFrames(action.getAllChannelIpos().values(), False)
 		sequence.numKeyFrames = numOverallFrames
 		
-		# Calculate the raw number of action frames, from start frame to end frame, inclusive.
-		rawActFrames = (seqPrefs['Action']['EndFrame'] - seqPrefs['Action']['StartFrame']) + 1
-
-		# calc the interpolation increment
-		try: interpolateInc = float(rawActFrames-1.0) / float(seqPrefs['Action']['FrameSamples']-1.0)
-		except: interpolateInc = 1.0
-		
-		# make sure it's not less than 1
-		if interpolateInc < 1.0: interpolateInc = 1.0
-
 		Torque_Util.dump_writeln("      Frames: %d " % seqPrefs['Action']['FrameSamples'])
 		
 		# Depending on what we have, set the bases accordingly
 		if sequence.has_ground: sequence.firstGroundFrame = len(self.groundTranslations)
 		else: sequence.firstGroundFrame = -1
 		
-		# this is the number of real action frames we are exporting.
-		#numFrameSamples = seqPrefs['Action']['FrameSamples']+1
-		numFrameSamples = seqPrefs['Action']['FrameSamples']
+		numOverallFrames, numFrameSamples, interpolateInc, adaptive = self.getActionSampling(seqPrefs, numOverallFrames)
+		if adaptive: sequence.numKeyFrames = numOverallFrames
 		
+		cacheHits, cacheMisses = self.poseUtil.poseCache.hits, self.poseUtil.poseCache.misses
+
 		removeLast = False
 		baseTransforms = []
 		useAction = None
@@ -1412,173 +2037,62 @@ class BlenderShape(DtsShape):
 		# *** special processing for the first frame:
 		# store off the default position of the bounds box
 		try:
-			Blender.Set('curframe', 1)
 			bound_obj = Blender.Object.Get("Bounds")
+			Blender.Set('curframe', 1)
+			self.poseUtil.posesChanged()
 			boundsStartMat = self.collapseBlenderTransform(bound_obj)
 		except ValueError:
 			boundsStartMat = MatrixF()
 
-		# For blend animations, we need to reset the pose to the reference pose instead of the default
-		# transforms.  Otherwise, we won't be able to tell reliably which bones have actually moved
-		# during the blend sequence.
-		if isBlend:
-			# get our blend ref pose action
-			refPoseAct = Blender.Armature.NLA.GetActions()[useAction]
-			# now set the active action and move to the desired frame
-			for i in range(0, len(self.addedArmatures)):
-				arm = self.addedArmatures[i][0]
-				refPoseAct.setActive(arm)
-			# Set the current frame in blender
-			Blender.Set('curframe', useFrame)
-
-		# For normal animations, loop through each node and reset it's transforms.
-		# This avoids transforms carrying over from other action animations.
-		else:			
-			# need to cycle through ALL bones and reset the transforms.
-			for armOb in Blender.Object.Get():
-				if (armOb.getType() != 'Armature'): continue
-				tempPose = armOb.getPose()
-				for bonename in self.poseUtil.armBones[armOb.name].keys():
-					# reset the bone's transform
-					tempPose.bones[bonename].quat = bMath.Quaternion().identity()
-					tempPose.bones[bonename].size = bMath.Vector(1.0, 1.0, 1.0)
-					tempPose.bones[bonename].loc = bMath.Vector(0.0, 0.0, 0.0)
-				# update the pose.
-				tempPose.update()
-
-			
-		
 		# create blank frames for each node
 		for nodeIndex in range(1, len(self.nodes)):
 			sequence.frames[nodeIndex] = []
-		
-
-		act = Blender.Armature.NLA.GetActions()[sequence.name]
-
-		# loop through all of the armatures and set the current action as active for all
-		# of them.  Sadly, there is no way to tell which action belongs with which armature
-		# using the Python API in Blender, so this is a bit messy.
-		for i in range(0, len(self.addedArmatures)):
-			arm = self.addedArmatures[i][0]			
-			act.setActive(arm)
+		# the scale rotation of every frame, only filled in for anisotropic scale
+		sequence.scaleRotations = [[] for n in self.nodes]
 
 
-		# do a two pass action export if we've got anisotropic scale.
-		# Blender's pose module suffers from un-correctable
-		# gimbal lock and accuracy issues when anisotropic scale is present >:-(
+		# Anisotropic scale throws off the rotations Blender's pose gives for the
+		# children of the scaled bones, so each bone's matrix is taken apart
+		# relative to its parent's instead.
 		if sequence.has_ansitropic_scale:
-			#print "Doing two pass export..."
-
-			# temporarily remove scale ipos
-			tempDict = {}
-			channelIpos = action.getAllChannelIpos()
-			for ipoName in channelIpos.keys():
-				tempDict[ipoName] = {}
-				tempDict[ipoName]['X'] = {}
-				tempDict[ipoName]['X']['vec'] = []
-				tempDict[ipoName]['X']['ht'] = []
-				tempDict[ipoName]['Y'] = {}
-				tempDict[ipoName]['Y']['vec'] = []
-				tempDict[ipoName]['Y']['ht'] = []
-				tempDict[ipoName]['Z'] = {}
-				tempDict[ipoName]['Z']['vec'] = []
-				tempDict[ipoName]['Z']['ht'] = []
-				ipo = channelIpos[ipoName]
-				# copy scale ipos to temp holding dictionary
-				for point in ipo[Blender.Ipo.PO_SCALEX].bezierPoints:
-					tempDict[ipoName]['X']['vec'].append(point.vec)
-					tempDict[ipoName]['X']['ht'].append(point.handleTypes)
-
-				for point in ipo[Blender.Ipo.PO_SCALEY].bezierPoints:
-					tempDict[ipoName]['Y']['vec'].append(point.vec)
-					tempDict[ipoName]['Y']['ht'].append(point.handleTypes)
-
-				for point in ipo[Blender.Ipo.PO_SCALEZ].bezierPoints:
-					tempDict[ipoName]['Z']['vec'].append(point.vec)
-					tempDict[ipoName]['Z']['ht'].append(point.handleTypes)
-
-				# remove scale ipos
-				try:ipo[Blender.Ipo.PO_SCALEX] = None
-				except: pass
-				try:ipo[Blender.Ipo.PO_SCALEY] = None
-				except: pass
-				try:ipo[Blender.Ipo.PO_SCALEZ] = None
-				except: pass
+			Torque_Util.dump_writeln("      Anisotropic scale, decomposing bone matrices")
 
-			try:
-				# loop through all of the exisitng action frames, get loc and rot
-				addScale = False
-				self.getActionFrames(numOverallFrames, interpolateInc, seqPrefs, sequence, boundsStartMat, baseTransforms, numFrameSamples, isBlend, addScale)
-			except: pass
-
-			# restore scale IPOs (only if they existed in the first place)
-			nf = getHighestActFrame(act)
-			channelIpos = action.getAllChannelIpos()
-			for ipoName in channelIpos.keys():
-				ipo = channelIpos[ipoName]
-
-				# re-create curves
-				if len(tempDict[ipoName]['X']['vec']) > 0:
-					ipo.addCurve('ScaleX')
-				if len(tempDict[ipoName]['Y']['vec']) > 0:
-					ipo.addCurve('ScaleY')
-				if len(tempDict[ipoName]['Z']['vec']) > 0:
-					ipo.addCurve('ScaleZ')
-
-				# add points
-				for point in tempDict[ipoName]['X']['vec']:
-					knot = point[1]
-					ipo[Blender.Ipo.PO_SCALEX].append((knot[0], knot[1]))
-				
-				for point in tempDict[ipoName]['X']['vec']:
-					knot = point[1]
-					ipo[Blender.Ipo.PO_SCALEY].append((knot[0], knot[1]))
-
-				for point in tempDict[ipoName]['X']['vec']:
-					knot = point[1]
-					ipo[Blender.Ipo.PO_SCALEZ].append((knot[0], knot[1]))
-
-				# fix up handles
-				for i in range(0, len(ipo[Blender.Ipo.PO_SCALEX].bezierPoints)):
-					point = ipo[Blender.Ipo.PO_SCALEX].bezierPoints[i]
-					point.handleTypes = tempDict[ipoName]['X']['ht'][i]
-					point.vec = tempDict[ipoName]['X']['vec'][i]
-				for i in range(0, len(ipo[Blender.Ipo.PO_SCALEY].bezierPoints)):
-					point = ipo[Blender.Ipo.PO_SCALEY].bezierPoints[i]
-					point.handleTypes = tempDict[ipoName]['Y']['ht'][i]
-					point.vec = tempDict[ipoName]['Y']['vec'][i]
-				for i in range(0, len(ipo[Blender.Ipo.PO_SCALEZ].bezierPoints)):
-					point = ipo[Blender.Ipo.PO_SCALEZ].bezierPoints[i]
-					point.handleTypes = tempDict[ipoName]['Z']['ht'][i]
-					point.vec = tempDict[ipoName]['Z']['vec'][i]
-				
-				# recalc scale curves
-				ipo[Blender.Ipo.PO_SCALEX].recalc()
-				ipo[Blender.Ipo.PO_SCALEY].recalc()
-				ipo[Blender.Ipo.PO_SCALEZ].recalc()
-
-
-			# loop through all of the exisitng action frames, get scales
-			addScale = True
-			self.getActionFrames(numOverallFrames, interpolateInc, seqPrefs, sequence, boundsStartMat, baseTransforms, numFrameSamples, isBlend, addScale)
+		# loop through all of the exisitng action frames
+		self.getActionFrames(numOverallFrames, interpolateInc, seqPrefs, sequence, boundsStartMat, baseTransforms, numFrameSamples, isBlend)
 
-			
-			
-		else:
-			#print "Doing single pass export..."
-			# loop through all of the exisitng action frames
-			addScale = False
-			self.getActionFrames(numOverallFrames, interpolateInc, seqPrefs, sequence, boundsStartMat, baseTransforms, numFrameSamples, isBlend, addScale)
+		cacheHits = self.poseUtil.poseCache.hits - cacheHits
+		if cacheHits > 0:
+			Torque_Util.dump_writeln("      Pose cache: %d of %d armature poses reused" % (cacheHits, cacheHits + self.poseUtil.poseCache.misses - cacheMisses))
+		
+		# Drop tracks that only ever hold the default transform
+		try: x = self.preferences['PruneConstantTracks']
+		except KeyError: self.preferences['PruneConstantTracks'] = False
+		if self.preferences['PruneConstantTracks']:
+			numDropped, numKept = self.pruneConstantTracks(sequence, numFrameSamples, isBlend)
+			if numDropped > 0 or numKept > 0:
+				Torque_Util.dump_writeln("      Constant tracks: %d at the default transform removed, %d kept" % (numDropped, numKept))
 
+		if adaptive and (sequence.has_loc or sequence.has_rot or sequence.has_scale):
+			numOverallFrames = numFrameSamples = self.reduceKeyFrames(sequence, numFrameSamples)
 
-		
 		# if nothing was actually animated abandon exporting the action.
 		if not (sequence.has_loc or sequence.has_rot or sequence.has_scale):
 			Torque_Util.dump_writeWarning("Warning: Action has no keyframes, aborting export for this animation.")
 			return sequence, False
 
-		# set the aligned scale flag if we have scale.
-		if sequence.has_scale: sequence.flags |= Sequence.AlignedScale
+		# set the aligned scale flag if we have scale, or the arbitrary scale flag
+		# if any of it is not along the node's own axes.
+		if sequence.has_scale:
+			isAligned = True
+			identity = Quaternion(0.0, 0.0, 0.0, 1.0)
+			for nodeIndex in range(1, len(self.nodes)):
+				if not sequence.matters_scale[nodeIndex]: continue
+				for scaleRot in sequence.scaleRotations[nodeIndex]:
+					if not (scaleRot.eqDelta(identity, 0.0001) or scaleRot.eqDelta(-identity, 0.0001)):
+						isAligned = False
+						break
+			if isAligned: sequence.flags |= Sequence.AlignedScale
+			else: sequence.flags |= Sequence.ArbitraryScale
 		
 		# It should be safe to add this sequence to the list now.
 		#self.sequences.append(sequence)
@@ -1636,6 +2150,7 @@ class BlenderShape(DtsShape):
 				#if ipo != 0:
 				if sequence.matters_translation[nodeIndex] or sequence.matters_rotation[nodeIndex] or sequence.matters_scale[nodeIndex]:
 					del sequence.frames[nodeIndex][-1]
+					if len(sequence.scaleRotations[nodeIndex]) > 0: del sequence.scaleRotations[nodeIndex][-1]
 			sequence.numKeyFrames -= 1
 			Torque_Util.dump_writeln("      Note: Duplicate frames removed,  (was %d,  now %d)" % (sequence.numKeyFrames+1, sequence.numKeyFrames))
 
@@ -1644,24 +2159,32 @@ class BlenderShape(DtsShape):
 		else: sequence.baseTranslation = -1
 		if sequence.has_rot: sequence.baseRotation = len(self.nodeRotations)
 		else: sequence.baseRotation = -1
-		if sequence.has_scale: sequence.baseScale = len(self.nodeAlignedScales)
-		else: sequence.baseScale = -1
+		if not sequence.has_scale: sequence.baseScale = -1
+		elif sequence.flags & Sequence.ArbitraryScale: sequence.baseScale = len(self.nodeAbitraryScaleFactors)
+		else: sequence.baseScale = len(self.nodeAlignedScales)
 		
 		# To simplify things, we now assume everything is internal and just dump the sequence
 		
 		# Dump Frames
-		for node in sequence.frames:
+		for nodeIndex in range(0, len(sequence.frames)):
+			node = sequence.frames[nodeIndex]
 			if node == 0: continue
-			for frame in node:
+			for k in range(0, len(node)):
+				frame = node[k]
 				if frame[0]:
 					self.nodeTranslations.append(frame[0])
 				if frame[1]:
 					self.nodeRotations.append(frame[1])
 				if frame[2]:
-					self.nodeAlignedScales.append(frame[2])
+					if sequence.flags & Sequence.ArbitraryScale:
+						self.nodeAbitraryScaleFactors.append(frame[2])
+						self.nodeAbitraryScaleRots.append(sequence.scaleRotations[nodeIndex][k])
+					else:
+						self.nodeAlignedScales.append(frame[2])
 		
 		# Clean out temporary junk
 		del sequence.frames
+		del sequence.scaleRotations
 
 		return sequence, removeLast
 
@@ -1725,6 +2248,36 @@ class BlenderShape(DtsShape):
 		sequence.has_ifl = True
 		return sequence
 
+	# Samples the IPO curve of a visibility track over a sequence, clamped to 0..1.
+	# Past endFrame the value at endFrame is repeated.  Returns None if the curve
+	# can't be found.
+	def sampleVisibilityCurve(self, keyedObj, startFrame, endFrame, numOverallFrames):
+		try:
+			if keyedObj['IPOType'] == "Object":
+				bObj = Blender.Object.Get(keyedObj['IPOObject'])
+			elif keyedObj['IPOType'] == "Material":
+				bObj = Blender.Material.Get(keyedObj['IPOObject'])
+
+			bIpo = bObj.getIpo()
+			IPOCurveName = getBlenderIPOChannelConst(keyedObj['IPOType'], keyedObj['IPOChannel'])
+			IPOCurve = None
+			IPOCurveConst = bIpo.curveConsts[IPOCurveName]
+			IPOCurve = bIpo[IPOCurveConst]
+			if IPOCurve == None: raise TypeError
+		except:
+			return None
+
+		frames = []
+		for fr in range(startFrame, numOverallFrames + startFrame):
+			# Make sure we're still in the user define frame range, past it
+			# the last good frame is repeated.
+			if fr <= endFrame: frames.append(int(fr))
+			else: frames.append(int(endFrame))
+		# driven curves depend on other objects, leave those to Blender
+		if getattr(IPOCurve, 'driver', 0): values = [IPOCurve[fr] for fr in frames]
+		else: values = self.getIpoCurve(IPOCurve).sample(frames)
+		return [min(max(val, 0.0), 1.0) for val in values]
+
 	# Processes a material ipo and incorporates it into the Action
 	def addSequenceVisibility(self, sequence, numOverallFrames, sequenceKey, startFrame, endFrame):
 		'''
@@ -1758,19 +2311,14 @@ class BlenderShape(DtsShape):
 			# skip this object if the vis track is not enabled
 			if not keyedObj['hasVisTrack']: continue
 			
-			try:
-				if keyedObj['IPOType'] == "Object":
-					bObj = Blender.Object.Get(keyedObj['IPOObject'])
-				elif keyedObj['IPOType'] == "Material":
-					bObj = Blender.Material.Get(keyedObj['IPOObject'])
-
-				bIpo = bObj.getIpo()
-				IPOCurveName = getBlenderIPOChannelConst(keyedObj['IPOType'], keyedObj['IPOChannel'])
-				IPOCurve = None
-				IPOCurveConst = bIpo.curveConsts[IPOCurveName]
-				IPOCurve = bIpo[IPOCurveConst]
-				if IPOCurve == None: raise TypeError
-			except: 
+			# the same channel often drives several objects and sequences, so
+			# each one is only sampled once per export
+			cacheKey = (keyedObj['IPOType'], keyedObj['IPOObject'], keyedObj['IPOChannel'], startFrame, endFrame, numOverallFrames)
+			try: values = self.visCurveCache[cacheKey]
+			except KeyError:
+				values = self.sampleVisibilityCurve(keyedObj, startFrame, endFrame, numOverallFrames)
+				self.visCurveCache[cacheKey] = values
+			if values == None:
 				Torque_Util.dump_writeErr("Error: Could not get animation curve for visibility animation: %s " % sequence.name)
 				continue
 
@@ -1778,22 +2326,7 @@ class BlenderShape(DtsShape):
 			if sequence.baseObjectState == -1:
 				sequence.baseObjectState = len(self.objectstates)
 			# add the object states, include the last frame
-			for fr in range(startFrame, numOverallFrames + startFrame):
-				#print "#####  Writing IPO for frame:%2i (%f)" % (int(fr), IPOCurve[fr])
-				#print "#####  Writing IPO Value:", IPOCurve[fr]				
-				val = IPOCurve[int(fr)]
-				if val > 1.0: val = 1.0
-				elif val < 0.0: val = 0.0
-				# Make sure we're still in the user define frame range.
-				if fr <= endFrame:
-					self.objectstates.append(ObjectState(val,0,0))
-				# If we're past the user defined frame range, pad out object states
-				# with copies of the good last frame state.
-				else:
-					val = IPOCurve[int(endFrame)]
-					if val > 1.0: val = 1.0
-					elif val < 0.0: val = 0.0
-					self.objectstates.append(ObjectState(val,0,0))
+			self.objectstates.extend([ObjectState(val,0,0) for val in values])
 							
 		sequence.has_vis = True
 		return sequence
@@ -1811,12 +2344,25 @@ class BlenderShape(DtsShape):
 		self.writeDSQSequence(dsq_file, sequence, version) # Write only current sequence data
 		dsq_file.close()
 
+		# Snapshots keep a copy, the sequence is gone from the shape after this
+		try: x = self.preferences['ExportSnapshot']
+		except KeyError: self.preferences['ExportSnapshot'] = False
+		if self.preferences['ExportSnapshot']:
+			dsq_file = open(filename, "rb")
+			self.dsqFiles.append((self.sTable.get(sequence.nameIndex), dsq_file.read()))
+			dsq_file.close()
+
 
 		# Remove anything we added (using addAction or addSequenceTrigger only) to the main list
 		
 		if sequence.baseTranslation != -1: del self.nodeTranslations[sequence.baseTranslation-1:sequence.baseTranslation+sequence.numKeyFrames]
 		if sequence.baseRotation != -1:    del self.nodeRotations[sequence.baseRotation-1:sequence.baseRotation+sequence.numKeyFrames]
-		if sequence.baseScale != -1:       del self.nodeAlignedScales[sequence.baseScale-1:sequence.baseScale+sequence.numKeyFrames]
+		if sequence.baseScale != -1:
+			if sequence.flags & Sequence.ArbitraryScale:
+				del self.nodeAbitraryScaleFactors[sequence.baseScale-1:sequence.baseScale+sequence.numKeyFrames]
+				del self.nodeAbitraryScaleRots[sequence.baseScale-1:sequence.baseScale+sequence.numKeyFrames]
+			else:
+				del self.nodeAlignedScales[sequence.baseScale-1:sequence.baseScale+sequence.numKeyFrames]
 		if sequence.firstTrigger != -1:    del self.triggers[sequence.firstTrigger-1:sequence.firstTrigger+sequence.numTriggers]
 		if sequence.firstGroundFrame != -1:
 			del self.groundTranslations[sequence.firstGroundFrame-1:sequence.firstGroundFrame+sequence.numGroundFrames]
@@ -1941,48 +2487,16 @@ class BlenderShape(DtsShape):
 	
 	# Finalizes shape
 	def finalize(self, writeShapeScript=False):
-		pathSep = "/"
-		if "\\" in self.preferences['exportBasepath']: pathSep = "\\"
-		
-		# Write out shape script
-		if writeShapeScript:
-			Torque_Util.dump_writeln("   Writing script%s%s%s.cs" % (self.preferences['exportBasepath'], pathSep, self.preferences['exportBasename']))
-			shapeScript = open("%s%s%s.cs" % (self.preferences['exportBasepath'], pathSep, self.preferences['exportBasename']), "w")
-			shapeScript.write("datablock TSShapeConstructor(%sDts)\n" % self.preferences['exportBasename'])
-			shapeScript.write("{\n")
-			# don't need to write out the full path, in fact, it causes problems to do so.  We'll just assume
-			# that the player is putting their shape script in the same folder as the .dts.
-			shapeScript.write("   baseShape = \"./%s\";\n" % (self.preferences['exportBasename'] + ".dts"))
-			count = 0
-			for sequence in self.externalSequences:
-				#shapeScript.write("   sequence%d = \"./%s_%s.dsq %s\";\n" % (count,self.preferences['exportBasepath'],sequence,sequence))
-				shapeScript.write("   sequence%d = \"./%s.dsq %s\";\n" % (count,sequence,sequence))
-				count += 1
-			shapeScript.write("};")
-			shapeScript.close()
-
-		# Write out TGEA Material Script
-		if self.preferences['TSEMaterial']:
-			Torque_Util.dump_writeln("   Writing material script %s%smaterials.cs" % (self.preferences['exportBasepath'], pathSep))
-			materialScript = open("%s%smaterials.cs" % (self.preferences['exportBasepath'], pathSep), "w")
-			materialScript.write("// Script automatically generated by Blender DTS Exporter\n\n")
-			for materialDef in self.scriptMaterials:			
-				materialScript.write(materialDef)
-			materialScript.write("// End of generated script\n")
-			materialScript.close()
-		
-		# Write out IFL File
-		# Now we can dump each frame
-		for seqName in self.preferences['Sequences'].keys():
-			seqPrefs = self.preferences['Sequences'][seqName]
-			if seqPrefs['IFL']['Enabled'] and validateIFL(seqName, seqPrefs) and seqPrefs['IFL']['WriteIFLFile']:				
-				iflName = getIFLMatTextPortion(seqPrefs['IFL']['Material'])
-				Torque_Util.dump_writeln("   Writing IFL script %s%s%s.ifl" % (self.preferences['exportBasepath'], pathSep, iflName))
-				IFLScript = open("%s%s%s.ifl" % (self.preferences['exportBasepath'], pathSep, iflName), "w")
-				for frame in seqPrefs['IFL']['IFLFrames']:
-					IFLScript.write("%s %i\n" % (frame[0], frame[1]))
-				IFLScript.close()
-
+		# Write out the shape script, TGEA material script and IFL files
+		Dts_Snapshot.writeShapeScripts(self.preferences, self.externalSequences, self.scriptMaterials, writeShapeScript)
+
+	# Takes a snapshot of everything the shape's files are written from, see Dts_Snapshot
+	def takeSnapshot(self, version):
+		snapshot = Dts_Snapshot.snapshotShape(self, self.preferences, version)
+		snapshot.externalSequences = self.externalSequences
+		snapshot.scriptMaterials = self.scriptMaterials
+		snapshot.dsqFiles = self.dsqFiles
+		return snapshot
 		
 	def dumpShapeInfo(self):
 		Torque_Util.dump_writeln("   > Nodes")
@@ -40,6 +40,7 @@ import string, math, re, gc
 
 import DtsShape_Blender
 from DtsShape_Blender import *
+from DTSPython import Dts_Snapshot
 
 
 import os.path
@@ -645,6 +646,51 @@ def updateOldPrefs():
 
 	try: x = Prefs['ExportScale']
 	except: Prefs['ExportScale'] = 1.0
+	
+	# "Box" measures radii from the bounding box center, "Minimal" uses the smallest enclosing sphere
+	try: x = Prefs['BoundingSphere']
+	except: Prefs['BoundingSphere'] = "Box"
+	# Let duplicate meshes point at the vertex data of the first copy, off by default
+	# so existing projects export as they always have
+	try: x = Prefs['ShareMeshData']
+	except: Prefs['ShareMeshData'] = False
+	# Bone palette size for skinned meshes, 0 for no limit
+	try: x = Prefs['MaxBonesPerMesh']
+	except: Prefs['MaxBonesPerMesh'] = 0
+	# Skin weight cleanup; 0 influences means no limit
+	try: x = Prefs['MaxInfluences']
+	except: Prefs['MaxInfluences'] = 0
+	try: x = Prefs['MinInfluenceWeight']
+	except: Prefs['MinInfluenceWeight'] = 0.0
+	try: x = Prefs['QuantizeWeights']
+	except: Prefs['QuantizeWeights'] = False
+	# Automatic detail levels, [size, target] pairs where targets up to 1.0 are a
+	# fraction of the highest detail's poly count, bigger values a poly count
+	try: x = Prefs['AutoLOD']
+	except: Prefs['AutoLOD'] = {'Enabled' : False, 'Levels' : [[64, 0.5], [32, 0.25], [16, 0.125]]}
+	# Convex hull collision meshes generated from the visible meshes ('Meshes')
+	# or from vertex groups moved by the same bone ('Bones')
+	try: x = Prefs['AutoCollision']
+	except: Prefs['AutoCollision'] = {'Enabled' : False, 'Source' : 'Meshes', 'LOS' : False, 'MaxHullVerts' : 32}
+	# Drop animation tracks that only hold the default transform, off by default
+	# so existing projects export as they always have
+	try: x = Prefs['PruneConstantTracks']
+	except: Prefs['PruneConstantTracks'] = False
+	# Pick the number of keyframes per action from error bounds (degrees, shape
+	# units, and scale factors) instead of the sequence's frame samples
+	try: x = Prefs['AdaptiveSampling']
+	except: Prefs['AdaptiveSampling'] = {'Enabled' : False, 'MaxRotError' : 0.5, 'MaxLocError' : 0.005, 'MaxScaleError' : 0.001}
+	try: x = Prefs['AdaptiveSampling']['MaxScaleError']
+	except: Prefs['AdaptiveSampling']['MaxScaleError'] = 0.001
+	# Memory budget for armature poses shared between sequences, 0 turns the cache off
+	try: x = Prefs['PoseCacheMB']
+	except: Prefs['PoseCacheMB'] = 64
+	# Worker processes that evaluate armature poses from the action curves, 0 keeps it all in Blender's process
+	try: x = Prefs['PoseWorkers']
+	except: Prefs['PoseWorkers'] = 0
+	# Also save a snapshot that the shape's files can be built again from without Blender
+	try: x = Prefs['ExportSnapshot']
+	except: Prefs['ExportSnapshot'] = False
 
 
 # Call this function when the number of frames in the sequence has changed, or may have changed.
@@ -1110,6 +1156,10 @@ class ShapeTree(SceneTree):
 					for i in range(0, len(self.normalDetails)):
 						self.Shape.addDetailLevel(meshDetails[i], self.normalDetails[i][0])
 						progressBar.update()
+					
+					# Generate any automatic detail levels from the highest one
+					if Prefs['AutoLOD']['Enabled']:
+						self.Shape.addAutoDetailLevels(Prefs['AutoLOD']['Levels'])
 					curSize = -1
 					for marker in self.collisionMeshes:
 						meshes = filter(lambda x: x.getType()=='Mesh', getAllChildren(marker))
@@ -1122,6 +1172,11 @@ class ShapeTree(SceneTree):
 						self.Shape.addCollisionDetailLevel(meshes, True, curSize)
 						curSize -= 1
 						progressBar.update()
+					# Generate convex collision hulls from the visible meshes
+					if Prefs['AutoCollision']['Enabled']:
+						self.Shape.addGeneratedCollisionDetailLevel(Prefs['AutoCollision']['Source'], False, Prefs['AutoCollision']['MaxHullVerts'])
+						if Prefs['AutoCollision']['LOS']:
+							self.Shape.addGeneratedCollisionDetailLevel(Prefs['AutoCollision']['Source'], True, Prefs['AutoCollision']['MaxHullVerts'])
 					
 					# We have finished adding the regular detail levels. Now add the billboard if required.
 					if Prefs['Billboard']['Enabled']:
@@ -1142,6 +1197,10 @@ class ShapeTree(SceneTree):
 				progressBar.update()
 				if Prefs['PrimType'] == "TriStrips":
 					self.Shape.stripMeshes(Prefs['MaxStripSize'])
+				# Let duplicate meshes reference the vertex data of the first copy
+				if Prefs['ShareMeshData']:
+					numShared, bytesSaved = self.Shape.shareMeshData()
+					Torque_Util.dump_writeln("   Shared mesh data: %d mesh(es) use a parent mesh, saving %d bytes." % (numShared, bytesSaved))
 				progressBar.update()
 				
 				# Add all actions (will ignore ones not belonging to shape)
@@ -1162,6 +1221,15 @@ class ShapeTree(SceneTree):
 				seqKeys = Prefs['Sequences'].keys()
 				if len(seqKeys) > 0:
 					progressBar.pushTask("Adding Sequences..." , len(seqKeys*4), 0.8)
+					# Work out which frames of each action the sequences need, so every
+					# action is only gone through once however many sequences use it
+					exportSeqs = []
+					for seqName in seqKeys:
+						seqKey = getSequenceKey(seqName)
+						if seqKey['NoExport'] or not seqKey['Action']['Enabled']: continue
+						exportSeqs.append((seqName, seqKey))
+					samplingPlan = self.Shape.planSequenceSampling(exportSeqs)
+					del exportSeqs
 					for seqName in seqKeys:
 						seqKey = getSequenceKey(seqName)
 
@@ -1176,6 +1244,10 @@ class ShapeTree(SceneTree):
 						# try to add the sequence
 						try: action = actions[seqName]
 						except: action = None
+						try: plannedActions = samplingPlan[seqName]
+						except KeyError: plannedActions = []
+						for actionName, actionKey, frames, decompose in plannedActions:
+							self.Shape.sampleActionFrames(actionName, actionKey, frames, decompose)
 						sequence = self.Shape.addSequence(seqName, context, seqKey, scene, action)
 						if sequence == None:
 							Torque_Util.dump_writeWarning("Warning : Couldn't add sequence '%s' to shape!" % seqName)
@@ -1212,6 +1284,12 @@ class ShapeTree(SceneTree):
 				progressBar.update()
 				progressBar.popTask()
 
+				# Everything has been taken out of Blender by now
+				if Prefs['ExportSnapshot']:
+					snapshotName = "%s%s%s.dtssnap" % (Prefs['exportBasepath'], pathSeperator, Prefs['exportBasename'])
+					Torque_Util.dump_writeln("Writing snapshot to '%s'." % snapshotName)
+					Dts_Snapshot.saveSnapshot(self.Shape.takeSnapshot(Stream.DTSVersion), snapshotName)
+
 				# Now we've finished, we can save shape and burn it.
 				progressBar.pushTask("Writing out DTS...", 1, 0.9)
 				Torque_Util.dump_writeln("Writing out DTS...")
@@ -1717,6 +1795,9 @@ class GeneralControlsClass:
 		self.guiBillboardSize = Common_Gui.NumberSlider("guiBillboardSize", "Size", "Size of billboard's detail level", 18, self.handleEvent, self.resize)
 		# --
 		self.guiShowWarnErrPopup = Common_Gui.ToggleButton("guiShowWarnErrPopup", "Show Error/Warning popup", "Shows a popup when errors or warnings occur during export.", 27, self.handleEvent, self.resize)
+		self.guiMinimalSphere = Common_Gui.ToggleButton("guiMinimalSphere", "Minimal Radius", "Use the smallest enclosing sphere for shape and mesh radii", 28, self.handleEvent, self.resize)
+		self.guiShareMeshData = Common_Gui.ToggleButton("guiShareMeshData", "Share Mesh Data", "Write the vertex data of duplicate meshes only once", 29, self.handleEvent, self.resize)
+		self.guiPruneTracks = Common_Gui.ToggleButton("guiPruneTracks", "Prune Constant Tracks", "Leave out animation tracks that only hold the default transform", 30, self.handleEvent, self.resize)
 		# --
 		self.guiOutputText = Common_Gui.SimpleText("guiOutputText", "Output:", None, self.resize)
 		self.guiShapeScriptButton =  Common_Gui.ToggleButton("guiShapeScriptButton", "Write Shape Script", "Write .cs script that details the .dts and all .dsq sequences", 19, self.handleEvent, self.resize)
@@ -1757,6 +1838,9 @@ class GeneralControlsClass:
 		self.guiBillboardSize.min, self.guiBillboardSize.max = 0.0, 128.0
 		self.guiBillboardSize.value = Prefs['Billboard']['Size']
 		self.guiShowWarnErrPopup.state = Prefs["ShowWarningErrorPopup"]
+		self.guiMinimalSphere.state = (Prefs['BoundingSphere'] == "Minimal")
+		self.guiShareMeshData.state = Prefs['ShareMeshData']
+		self.guiPruneTracks.state = Prefs['PruneConstantTracks']
 		self.guiCustomFilename.length = 255
 		if "\\" in Prefs['exportBasepath']:
 			pathSep = "\\"
@@ -1794,6 +1878,9 @@ class GeneralControlsClass:
 		guiGeneralSubtab.addControl(self.guiBillboardPoles)
 		guiGeneralSubtab.addControl(self.guiBillboardSize)
 		guiGeneralSubtab.addControl(self.guiShowWarnErrPopup)
+		guiGeneralSubtab.addControl(self.guiMinimalSphere)
+		guiGeneralSubtab.addControl(self.guiShareMeshData)
+		guiGeneralSubtab.addControl(self.guiPruneTracks)
 		guiGeneralSubtab.addControl(self.guiOutputText)
 		guiGeneralSubtab.addControl(self.guiShapeScriptButton)
 		guiGeneralSubtab.addControl(self.guiCustomFilename)
@@ -1833,6 +1920,9 @@ class GeneralControlsClass:
 		del self.guiBillboardSize
 		# --
 		del self.guiShowWarnErrPopup
+		del self.guiMinimalSphere
+		del self.guiShareMeshData
+		del self.guiPruneTracks
 		# --
 		del self.guiOutputText
 		del self.guiShapeScriptButton
@@ -1901,6 +1991,13 @@ class GeneralControlsClass:
 			Prefs['WriteShapeScript'] = control.state
 		elif control.name == "guiShowWarnErrPopup":
 			Prefs["ShowWarningErrorPopup"] = control.state
+		elif control.name == "guiMinimalSphere":
+			if control.state: Prefs['BoundingSphere'] = "Minimal"
+			else: Prefs['BoundingSphere'] = "Box"
+		elif control.name == "guiShareMeshData":
+			Prefs['ShareMeshData'] = control.state
+		elif control.name == "guiPruneTracks":
+			Prefs['PruneConstantTracks'] = control.state
 		elif control.name == "guiCustomFilename":
 			Prefs['exportBasename'] = noext(basename(control.value))
 			Prefs['exportBasepath'] = basepath(control.value)
@@ -1976,6 +2073,12 @@ class GeneralControlsClass:
 			control.x, control.y, control.width = 164,newheight-130-control.height, 200
 		elif control.name == "guiShowWarnErrPopup":
 			control.x, control.y, control.width = 10,newheight-195-control.height, 220
+		elif control.name == "guiMinimalSphere":
+			control.x, control.y, control.width = 232,newheight-195-control.height, 132
+		elif control.name == "guiShareMeshData":
+			control.x, control.y, control.width = 366,newheight-195-control.height, 112
+		elif control.name == "guiPruneTracks":
+			control.x, control.y, control.width = 10,newheight-217-control.height, 220
 		elif control.name == "guiShapeScriptButton":
 			control.x, control.y, control.width = 346,newheight-260-control.height, 132
 		elif control.name == "guiCustomFilename":
@@ -0,0 +1,146 @@
+'''
+dtsbuild.py
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+'''
+- Builds .dts, .dsq, .cs and .ifl files from shape snapshots, without Blender
+
+Snapshots are saved by the exporter when its ExportSnapshot pref is on.
+
+	python dtsbuild.py [options] shape.dtssnap [more.dtssnap ...]
+
+Exits with 0 if every snapshot was built, 1 if any failed, and 2 if the
+command line was wrong.
+'''
+
+import sys, os, time, traceback
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "DTSPython"))
+import Torque_Util
+import Dts_Snapshot
+
+try: import multiprocessing
+except ImportError: multiprocessing = None
+
+try: import json
+except ImportError:
+	try: import simplejson as json
+	except ImportError: json = None
+
+# Builds a single snapshot, job being (snapshot file, output folder, log folder,
+# whether console output goes to stderr).  Returns a dictionary describing how
+# it went.
+def buildFile(job):
+	filename, outputDir, logDir, useStderr = job
+	stdout = sys.stdout
+	if useStderr: sys.stdout = sys.stderr
+	try: return buildFileLogged(filename, outputDir, logDir)
+	finally: sys.stdout = stdout
+
+def buildFileLogged(filename, outputDir, logDir):
+	result = {'snapshot' : filename, 'outputs' : [], 'errors' : 0, 'warnings' : 0}
+	if logDir != None:
+		Torque_Util.dump_setout(os.path.join(logDir, os.path.splitext(os.path.basename(filename))[0] + ".log"))
+	Torque_Util.numErrors = 0
+	Torque_Util.numWarnings = 0
+	start = time.time()
+	try:
+		snapshot = Dts_Snapshot.loadSnapshot(filename)
+		result['outputs'] = Dts_Snapshot.buildSnapshot(snapshot, outputDir)
+		result['status'] = "ok"
+	except:
+		result['status'] = "failed"
+		result['error'] = traceback.format_exc()
+		Torque_Util.dump_writeErr("Error: could not build %s\n%s" % (filename, result['error']))
+	result['seconds'] = time.time() - start
+	result['errors'] = Torque_Util.numErrors
+	result['warnings'] = Torque_Util.numWarnings
+	if logDir != None:
+		Torque_Util.dump_finish()
+		Torque_Util.dump_setout("stdout")
+	return result
+
+# Builds every job, in numWorkers worker processes if there is more than one,
+# and returns the results in the order of the jobs.
+def buildFiles(jobs, numWorkers):
+	if multiprocessing != None and numWorkers > 1 and len(jobs) > 1:
+		pool = multiprocessing.Pool(min(numWorkers, len(jobs)))
+		try: return pool.map(buildFile, jobs, 1)
+		finally:
+			pool.close()
+			pool.join()
+	return [buildFile(job) for job in jobs]
+
+def main(argv):
+	parser = OptionParser(usage="%prog [options] snapshot [snapshot ...]")
+	parser.add_option("-o", "--output", dest="output", default=None,
+		help="folder to write the files to, instead of the one each shape was exported to")
+	parser.add_option("-j", "--jobs", dest="jobs", type="int", default=1,
+		help="number of snapshots to build at once, 0 for one per processor")
+	parser.add_option("-s", "--summary", dest="summary", default=None,
+		help="write a JSON summary of the build to this file, - for stdout (everything else then goes to stderr)")
+	parser.add_option("-l", "--logs", dest="logs", default=None,
+		help="folder to write a log of each snapshot to, instead of the console")
+	options, args = parser.parse_args(argv)
+	if len(args) == 0:
+		parser.error("no snapshots given")
+	if options.summary != None and json == None:
+		parser.error("a JSON summary needs the json or simplejson module")
+	for path in [options.output, options.logs]:
+		if path != None and not os.path.isdir(path):
+			parser.error("%s is not a folder" % path)
+
+	numWorkers = options.jobs
+	if numWorkers == 0:
+		if multiprocessing != None: numWorkers = multiprocessing.cpu_count()
+		else: numWorkers = 1
+
+	# a summary on the console gets stdout to itself, so it can be parsed
+	useStderr = options.summary == "-"
+	console = sys.stdout
+	if useStderr: console = sys.stderr
+
+	start = time.time()
+	results = buildFiles([(filename, options.output, options.logs, useStderr) for filename in args], numWorkers)
+	numFailed = 0
+	for result in results:
+		if result['status'] != "ok": numFailed += 1
+		print >>console, "%-6s %8.2fs  %s" % (result['status'], result['seconds'], result['snapshot'])
+	seconds = time.time() - start
+	print >>console, "Built %d of %d snapshot(s) in %.2fs." % (len(results) - numFailed, len(results), seconds)
+
+	if options.summary != None:
+		summary = {'files' : results, 'built' : len(results) - numFailed, 'failed' : numFailed, 'seconds' : seconds}
+		if options.summary == "-":
+			print json.dumps(summary, indent=2)
+		else:
+			summaryFile = open(options.summary, "w")
+			json.dump(summary, summaryFile, indent=2)
+			summaryFile.close()
+
+	if numFailed > 0: return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main(sys.argv[1:]))
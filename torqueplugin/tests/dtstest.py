@@ -0,0 +1,96 @@
+'''
+dtstest.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+'''
+- Shared setup for the DTSPython tests
+
+The tests don't need Blender, run them from the torqueplugin folder with
+
+	python -m unittest discover -s tests
+'''
+
+import sys, os, unittest
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "DTSPython"))
+# Dts_Stream first, it has to be loaded before Dts_Shape and Dts_Mesh can be
+import Dts_Stream
+from Dts_Mesh import DtsMesh, Primitive
+from Torque_Math import Vector, Vector2, Quaternion, MatrixF
+
+# Builds a flat grid of size x size quads in the XY plane as one triangle
+# list primitive.  Vertex v of the grid is at (v % (size+1), v / (size+1), 0).
+def gridMesh(size, mtype=DtsMesh.T_Standard, indexType='i', matindex=0):
+	msh = DtsMesh(mtype)
+	msh.indices = array(indexType)
+	for y in range(0, size+1):
+		for x in range(0, size+1):
+			msh.verts.append(Vector(float(x), float(y), 0.0))
+			msh.tverts.append(Vector2(float(x) / size, float(y) / size))
+			msh.normals.append(Vector(0.0, 0.0, 1.0))
+			msh.enormals.append(0)
+	for y in range(0, size):
+		for x in range(0, size):
+			a = y * (size+1) + x
+			b, c, d = a + 1, a + size + 1, a + size + 2
+			for v in (a, c, b, b, c, d): msh.indices.append(v)
+	msh.primitives.append(Primitive(0, len(msh.indices), matindex | Primitive.Triangles | Primitive.Indexed))
+	msh.vertsPerFrame = len(msh.verts)
+	msh.calculateBounds()
+	msh.calculateCenter()
+	msh.calculateRadius()
+	return msh
+
+# Gives a mesh a node palette of numNodes identity transforms, and each vertex
+# the influences returned by weights(vertex index) as [(bone index, weight)].
+def skinMesh(msh, numNodes, weights):
+	msh.mtype = DtsMesh.T_Skin
+	for n in range(0, numNodes):
+		msh.nodeIndex.append(n)
+		msh.nodeTransforms.append(MatrixF([1.0,0.0,0.0,0.0, 0.0,1.0,0.0,0.0, 0.0,0.0,1.0,0.0, 0.0,0.0,0.0,1.0]))
+	for v in range(0, len(msh.verts)):
+		for b, w in weights(v):
+			msh.vindex.append(v)
+			msh.bindex.append(b)
+			msh.vweight.append(w)
+	return msh
+
+# The faces of a mesh as a sorted list of (material, vertex positions) tuples,
+# so meshes can be compared however their vertices are numbered
+def faceSet(msh):
+	faces = []
+	for tri in msh.getTriangles():
+		pts = [tuple([round(c, 5) for c in msh.verts[v].members]) for v in tri[0:3]]
+		# Rotate so the smallest point is first, keeping the winding
+		first = pts.index(min(pts))
+		pts = pts[first:] + pts[:first]
+		faces.append((tri[3] & (Primitive.MaterialMask | Primitive.NoMaterial), tuple(pts)))
+	faces.sort()
+	return faces
+
+class TestCase(unittest.TestCase):
+	def assertVectorAlmostEqual(self, a, b, places=5):
+		for i in range(0, len(a.members)):
+			self.assertAlmostEqual(a.members[i], b.members[i], places)
@@ -0,0 +1,96 @@
+'''
+test_Dts_ConvexHull.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest, random, math
+from dtstest import *
+from Dts_ConvexHull import convexHull, sub, cross, dot
+
+class ConvexHullTests(TestCase):
+	def assertClosedHull(self, hull, points):
+		hullPts, faces = hull
+		edges = {}
+		for a, b, c in faces:
+			for e in ((a, b), (b, c), (c, a)):
+				self.failIf(e in edges)
+				edges[e] = True
+		# Every edge is used once in each direction
+		for a, b in edges.keys(): self.failUnless((b, a) in edges)
+		self.assertEqual(len(hullPts) - len(edges) / 2 + len(faces), 2)
+		# Faces are counter clockwise seen from outside, with every point behind them
+		for a, b, c in faces:
+			n = cross(sub(hullPts[b], hullPts[a]), sub(hullPts[c], hullPts[a]))
+			length = math.sqrt(dot(n, n))
+			self.failUnless(length > 0.0)
+			for p in points:
+				self.failUnless(dot(n, sub(p, hullPts[a])) / length <= 1e-6)
+
+	def testCube(self):
+		pts = [(x, y, z) for x in (0.0, 1.0) for y in (0.0, 1.0) for z in (0.0, 1.0)]
+		rnd = random.Random(1)
+		inner = [(rnd.uniform(0.1, 0.9), rnd.uniform(0.1, 0.9), rnd.uniform(0.1, 0.9)) for i in range(0, 50)]
+		hull = convexHull(inner + pts)
+		self.assertEqual(sorted(hull[0]), sorted(pts))
+		self.assertEqual(len(hull[1]), 12)
+		self.assertClosedHull(hull, inner + pts)
+
+	def testRandomCloud(self):
+		rnd = random.Random(5)
+		pts = [(rnd.gauss(0, 1), rnd.gauss(0, 2), rnd.gauss(0, 0.5)) for i in range(0, 300)]
+		hull = convexHull(pts)
+		self.assertClosedHull(hull, pts)
+		for p in hull[0]: self.failUnless(p in pts)
+
+	def testVertexLimit(self):
+		rnd = random.Random(2)
+		pts = []
+		for i in range(0, 200):
+			z = rnd.uniform(-1.0, 1.0)
+			a = rnd.uniform(0.0, 2.0 * math.pi)
+			r = math.sqrt(1.0 - z * z)
+			pts.append((r * math.cos(a), r * math.sin(a), z))
+		hull = convexHull(pts, 12)
+		self.failUnless(len(hull[0]) <= 12)
+		self.assertClosedHull(hull, hull[0])
+
+	def testFlat(self):
+		self.assertEqual(convexHull([(x, y, 0.0) for x in range(0, 3) for y in range(0, 3)]), None)
+		self.assertEqual(convexHull([(0.0, 0.0, 0.0)] * 5), None)
+
+	def testBuildHull(self):
+		pts = [Vector(x, y, z) for x in (-1.0, 1.0) for y in (-1.0, 1.0) for z in (-1.0, 1.0)]
+		msh = DtsMesh(DtsMesh.T_Standard)
+		self.failUnless(msh.buildHull(pts))
+		self.assertEqual(len(msh.verts), 8)
+		self.assertEqual(msh.getPolyCount(), 12)
+		self.assertEqual(msh.primitives[0].matindex & Primitive.NoMaterial, Primitive.NoMaterial)
+		self.assertVectorAlmostEqual(msh.center, Vector(0.0, 0.0, 0.0))
+		# Dts faces are clockwise seen from outside
+		for tri in msh.getTriangles():
+			a, b, c = [msh.verts[v].members for v in tri[0:3]]
+			self.failUnless(dot(cross(sub(b, a), sub(c, a)), a) < 0.0)
+		self.failIf(DtsMesh(DtsMesh.T_Standard).buildHull([Vector(x, 0.0, 0.0) for x in range(0, 4)]))
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,122 @@
+'''
+test_Dts_Curves.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest
+from dtstest import *
+import Dts_Curves
+from Dts_Curves import Curve
+
+# A knot with its handles a third of the way to the knots either side
+def linearPoints(knots):
+	points = []
+	for i in range(0, len(knots)):
+		prev, next = knots[max(i - 1, 0)], knots[min(i + 1, len(knots) - 1)]
+		left = (knots[i][0] + (prev[0] - knots[i][0]) / 3.0, knots[i][1] + (prev[1] - knots[i][1]) / 3.0)
+		right = (knots[i][0] + (next[0] - knots[i][0]) / 3.0, knots[i][1] + (next[1] - knots[i][1]) / 3.0)
+		points.append((left, knots[i], right))
+	return points
+
+class CurveTests(TestCase):
+	# Samples the curve with sampleAt, and checks sampleArray gives the same if NumPy is there
+	def sample(self, curve, times):
+		out = [curve.sampleAt(t) for t in times]
+		if Dts_Curves.numpy != None:
+			arrayOut = curve.sampleArray(Dts_Curves.numpy.array(times, Dts_Curves.numpy.float64)).tolist()
+			for i in range(0, len(times)): self.assertAlmostEqual(arrayOut[i], out[i], 9)
+			self.assertEqual(curve.sample(times), arrayOut)
+		return out
+
+	def assertValues(self, values, expected, places=7):
+		self.assertEqual(len(values), len(expected))
+		for i in range(0, len(values)): self.assertAlmostEqual(values[i], expected[i], places)
+
+	def testConstant(self):
+		curve = Curve(linearPoints([(0.0, 1.0), (2.0, 3.0), (4.0, -1.0)]), Dts_Curves.CONST)
+		self.assertValues(self.sample(curve, [-1.0, 0.0, 1.9, 2.0, 3.5, 4.0, 9.0]), [1.0, 1.0, 1.0, 3.0, 3.0, -1.0, -1.0])
+
+	def testLinear(self):
+		curve = Curve(linearPoints([(0.0, 1.0), (2.0, 3.0), (4.0, -1.0)]), Dts_Curves.LINEAR)
+		self.assertValues(self.sample(curve, [-1.0, 0.0, 0.5, 2.0, 3.0, 4.0, 5.0]), [1.0, 1.0, 1.5, 3.0, 1.0, -1.0, -1.0])
+
+	def testStraightBezier(self):
+		# handles on the line between the knots give a straight line
+		curve = Curve(linearPoints([(0.0, 0.0), (3.0, 3.0), (6.0, 0.0)]))
+		times = [0.0, 0.25, 1.0, 2.9, 3.0, 4.5, 6.0]
+		self.assertValues(self.sample(curve, times), [0.0, 0.25, 1.0, 2.9, 3.0, 1.5, 0.0])
+
+	def testEaseBezier(self):
+		# flat handles, the curve is symmetric about its midpoint
+		curve = Curve([((-1.0, 0.0), (0.0, 0.0), (1.0, 0.0)), ((2.0, 1.0), (3.0, 1.0), (4.0, 1.0))])
+		values = self.sample(curve, [0.3 * i for i in range(0, 11)])
+		self.assertAlmostEqual(values[5], 0.5)
+		for i in range(0, 11):
+			self.assertAlmostEqual(values[i] + values[10 - i], 1.0)
+			if i > 0: self.assertTrue(values[i] > values[i - 1])
+		self.assertTrue(values[1] < 0.1)
+
+	def testLongHandles(self):
+		# handles that reach past the other knot get shortened, so the
+		# curve still runs forwards in time and stays between the knots
+		curve = Curve([((-9.0, 0.0), (0.0, 0.0), (9.0, 0.0)), ((-7.0, 1.0), (2.0, 1.0), (11.0, 1.0))])
+		values = self.sample(curve, [0.1 * i for i in range(0, 21)])
+		self.assertAlmostEqual(values[10], 0.5)
+		for i in range(1, 21): self.assertTrue(values[i] >= values[i - 1])
+		self.assertAlmostEqual(values[0], 0.0)
+		self.assertAlmostEqual(values[20], 1.0)
+
+	def testExtrapolated(self):
+		curve = Curve(linearPoints([(0.0, 1.0), (2.0, 3.0), (4.0, 2.0)]), Dts_Curves.LINEAR, Dts_Curves.EXTEND_EXTRAP)
+		self.assertValues(self.sample(curve, [-2.0, 1.0, 6.0]), [-1.0, 2.0, 1.0])
+		# Bezier curves carry on along their end handles
+		curve = Curve([((-1.0, -2.0), (0.0, 0.0), (1.0, 0.0)), ((2.0, 1.0), (3.0, 1.0), (5.0, 2.0))], Dts_Curves.BEZIER, Dts_Curves.EXTEND_EXTRAP)
+		self.assertValues(self.sample(curve, [-1.5, 5.0]), [-3.0, 2.0])
+
+	def testCyclic(self):
+		curve = Curve(linearPoints([(0.0, 0.0), (2.0, 1.0), (4.0, 0.0)]), Dts_Curves.LINEAR, Dts_Curves.EXTEND_CYCLIC)
+		times = [-7.0, -1.0, 0.0, 1.0, 4.0, 5.0, 6.0, 13.0]
+		self.assertValues(self.sample(curve, times), [0.5, 0.5, 0.0, 0.5, 0.0, 0.5, 1.0, 0.5])
+
+	def testCyclicBezier(self):
+		curve = Curve([((-1.0, 0.0), (0.0, 0.0), (1.0, 0.0)), ((2.0, 1.0), (3.0, 1.0), (4.0, 1.0)), ((5.0, 0.0), (6.0, 0.0), (7.0, 0.0))],
+			Dts_Curves.BEZIER, Dts_Curves.EXTEND_CYCLIC)
+		times = [0.4, 1.3, 2.2, 4.1, 5.9]
+		values = self.sample(curve, times)
+		self.assertValues(self.sample(curve, [t + 6.0 for t in times]), values)
+		self.assertValues(self.sample(curve, [t - 12.0 for t in times]), values)
+
+	def testCyclicExtrapolated(self):
+		# each cycle adds on the change over the curve
+		curve = Curve(linearPoints([(0.0, 0.0), (2.0, 2.0), (4.0, 1.0)]), Dts_Curves.LINEAR, Dts_Curves.EXTEND_CYCLIC_EXTRAP)
+		self.assertValues(self.sample(curve, [-1.0, 1.0, 5.0, 10.0]), [0.5, 1.0, 2.0, 4.0])
+
+	def testFewPoints(self):
+		self.assertEqual(Curve([]).sample([0.0, 1.0]), [0.0, 0.0])
+		curve = Curve([((-1.0, 1.0), (0.0, 2.0), (1.0, 3.0))])
+		self.assertEqual(curve.sample([-5.0, 0.0, 5.0]), [2.0, 2.0, 2.0])
+		curve.extend = Dts_Curves.EXTEND_EXTRAP
+		self.assertValues(self.sample(curve, [-5.0, 0.0, 5.0]), [-3.0, 2.0, 7.0])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,105 @@
+'''
+test_Dts_Decimate.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest
+from dtstest import *
+import Dts_Decimate
+from Dts_Decimate import faceNormal
+
+def faceArea(msh, tri):
+	n = faceNormal(msh.verts[tri[0]].members, msh.verts[tri[1]].members, msh.verts[tri[2]].members)
+	return n, 0.5 * (n[0]*n[0] + n[1]*n[1] + n[2]*n[2]) ** 0.5
+
+class DecimateTests(TestCase):
+	def testFlatGrid(self):
+		msh = gridMesh(8)
+		tris = Dts_Decimate.decimate(msh, 40)
+		self.failUnless(len(tris) <= 40)
+		area = 0.0
+		for tri in tris:
+			n, a = faceArea(msh, tri)
+			# Nothing flips over
+			self.failUnless(n[2] < 0.0)
+			area += a
+		# The borders stay put, so the surface still covers the whole grid
+		self.assertAlmostEqual(area, 64.0, 6)
+
+	def testKeepsFeatures(self):
+		msh = gridMesh(8)
+		msh.verts[4 * 9 + 4] = Vector(4.0, 4.0, 2.0)
+		tris = Dts_Decimate.decimate(msh, 30)
+		used = {}
+		for tri in tris:
+			for v in tri[0:3]: used[v] = True
+		# The peak is the most expensive vertex to remove
+		self.failUnless(4 * 9 + 4 in used)
+		for corner in (0, 8, 72, 80): self.failUnless(corner in used)
+
+	def testTargetNotBelowCount(self):
+		msh = gridMesh(3)
+		self.assertEqual(len(Dts_Decimate.decimate(msh, 100)), 18)
+
+	def testSeamsKept(self):
+		# Split the grid down the middle into two sets of vertices at the
+		# same positions, like a UV seam
+		msh = gridMesh(4)
+		seam = {}
+		for v in range(0, len(msh.verts)):
+			if msh.verts[v].members[0] == 2.0:
+				seam[v] = len(msh.verts)
+				msh.verts.append(Vector(*msh.verts[v].members))
+				msh.tverts.append(Vector2(0.9, 0.9))
+				msh.normals.append(msh.normals[v])
+		tris = msh.getTriangles()
+		for i in range(0, len(msh.indices)):
+			v = msh.indices[i]
+			tri = tris[i / 3]
+			right = max([msh.verts[t].members[0] for t in tri[0:3]]) > 2.0
+			if right and v in seam: msh.indices[i] = seam[v]
+		out = msh.decimate(8)
+		# Faces left and right of the seam still use their own seam vertices
+		numSeamFaces = 0
+		for tri in out.getTriangles():
+			xs = [out.verts[v].members[0] for v in tri[0:3]]
+			for v in tri[0:3]:
+				if out.verts[v].members[0] != 2.0: continue
+				numSeamFaces += 1
+				if max(xs) > 2.0: self.assertEqual(out.tverts[v].members[0:2], [0.9, 0.9])
+				else: self.assertNotEqual(out.tverts[v].members[0:2], [0.9, 0.9])
+		self.failUnless(numSeamFaces > 0)
+
+	def testSkinWeightsKept(self):
+		msh = skinMesh(gridMesh(6), 2, lambda v: [(v % 2, 0.5 + (v % 7) * 0.05), ((v + 1) % 2, 0.5 - (v % 7) * 0.05)])
+		out = msh.decimate(20)
+		self.failUnless(out.getPolyCount() <= 20)
+		self.assertEqual(len(out.vindex), 2 * len(out.verts))
+		for i in range(0, len(out.vindex)):
+			x, y = out.verts[out.vindex[i]].members[0:2]
+			v = int(y) * 7 + int(x)
+			if out.bindex[i] == v % 2: self.assertAlmostEqual(out.vweight[i], 0.5 + (v % 7) * 0.05, 6)
+			else: self.assertAlmostEqual(out.vweight[i], 0.5 - (v % 7) * 0.05, 6)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,342 @@
+'''
+test_Dts_Kinematics.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest
+from math import sqrt, sin, cos
+from dtstest import *
+import Dts_Kinematics
+from Dts_Kinematics import FKRig
+
+# Blender quaternion for a rotation of angle radians about axis
+def axisQuat(axis, angle):
+	s = sin(angle * 0.5)
+	return (cos(angle * 0.5), axis[0] * s, axis[1] * s, axis[2] * s)
+
+def restMatrix(quat, loc):
+	r = Dts_Kinematics.quatToMat(quat)
+	return [r[0] + [0.0], r[1] + [0.0], r[2] + [0.0], list(loc) + [1.0]]
+
+# Builds a rig from (name, parent, rest quat, rest location) tuples in
+# armature space, working out the rest values the way DtsPoseUtilClass does
+# when it reads them from Blender.  The bones named in connected are joined
+# to their parents.
+def buildRig(bones, armRot=Quaternion(0.0, 0.0, 0.0, 1.0), armLoc=Vector(0.0, 0.0, 0.0), armSize=Vector(1.0, 1.0, 1.0), connected=()):
+	rig = FKRig(armRot, armLoc, armSize)
+	for name, parentName, quat, loc in bones:
+		restMat = restMatrix(quat, loc)
+		restPosWS = armRot.apply(Vector(loc[0]*armSize[0], loc[1]*armSize[1], loc[2]*armSize[2])) + armLoc
+		restRotWS = Dts_Kinematics.toTorqueQuat(Dts_Kinematics.matToQuat(restMat)) * armRot
+		defPosPS, defRotPS = None, None
+		if parentName != None:
+			defPosPS = rig.restRotWS[parentName].inverse().apply(restPosWS - rig.restPosWS[parentName])
+			defRotPS = restRotWS * rig.restRotWS[parentName].inverse()
+		rig.addBone(name, parentName, restMat, restPosWS, restRotWS, defPosPS, defRotPS, name in connected)
+	return rig
+
+IDENTITY_QUAT = (1.0, 0.0, 0.0, 0.0)
+ZAXIS_90 = axisQuat((0.0, 0.0, 1.0), 0.5 * 3.14159265358979)
+
+# Torque quaternion of a bone that was turned by the Blender quaternion q
+def torqueRot(q):
+	return Quaternion(q[1], q[2], q[3], q[0])
+
+class KinematicsTestCase(TestCase):
+	def assertQuatAlmostEqual(self, a, b, places=5):
+		# q and -q are the same rotation
+		if a.members[0]*b.members[0] + a.members[1]*b.members[1] + a.members[2]*b.members[2] + a.members[3]*b.members[3] < 0.0:
+			b = Quaternion(-b.members[0], -b.members[1], -b.members[2], -b.members[3])
+		self.assertVectorAlmostEqual(a, b, places)
+
+	def assertMatrixAlmostEqual(self, a, b, places=6):
+		for i in range(0, len(a)):
+			for j in range(0, len(a[i])):
+				self.assertAlmostEqual(a[i][j], b[i][j], places)
+
+class MatrixTests(KinematicsTestCase):
+	def testQuatRoundTrip(self):
+		for q in (IDENTITY_QUAT, ZAXIS_90, axisQuat((0.0, 1.0, 0.0), 3.14159265358979), axisQuat((0.48, 0.6, 0.64), 2.5)):
+			back = Dts_Kinematics.matToQuat(Dts_Kinematics.quatToMat(q))
+			self.assertQuatAlmostEqual(Quaternion(*back), Quaternion(*q))
+
+	def testMatToQuatIgnoresScale(self):
+		q = axisQuat((0.6, 0.0, 0.8), 1.2)
+		m = Dts_Kinematics.channelMatrix((1.0, 2.0, 3.0), q, (2.0, 0.5, 3.0))
+		self.assertQuatAlmostEqual(Quaternion(*Dts_Kinematics.matToQuat(m)), Quaternion(*q))
+
+	def testAffineInverse(self):
+		m = Dts_Kinematics.channelMatrix((1.0, -2.0, 0.5), axisQuat((0.0, 0.6, 0.8), 0.7), (2.0, 0.5, 3.0))
+		identity = [[1.0, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0], [0.0, 0.0, 1.0, 0.0], [0.0, 0.0, 0.0, 1.0]]
+		self.assertMatrixAlmostEqual(Dts_Kinematics.matMul(m, Dts_Kinematics.affineInverse(m)), identity)
+		rest = restMatrix(ZAXIS_90, (1.0, 2.0, 3.0))
+		self.assertMatrixAlmostEqual(Dts_Kinematics.rigidInverse(rest), Dts_Kinematics.affineInverse(rest))
+
+	def testPolarDecompose(self):
+		q = axisQuat((0.48, 0.6, 0.64), 0.9)
+		m = Dts_Kinematics.channelMatrix((0.0, 0.0, 0.0), q, (2.0, 0.5, 3.0))
+		rot, stretch = Dts_Kinematics.polarDecompose(m)
+		self.assertMatrixAlmostEqual(rot, Dts_Kinematics.quatToMat(q))
+		self.assertMatrixAlmostEqual(stretch, [[2.0, 0.0, 0.0], [0.0, 0.5, 0.0], [0.0, 0.0, 3.0]])
+
+	def testSymmetricEigen(self):
+		axes = Dts_Kinematics.quatToMat(axisQuat((0.0, 0.0, 1.0), 0.3))
+		values = [2.0, 0.5, 3.0]
+		s = [[sum([axes[k][i] * values[k] * axes[k][j] for k in range(0, 3)]) for j in range(0, 3)] for i in range(0, 3)]
+		foundValues, foundAxes = Dts_Kinematics.symmetricEigen(s)
+		for i in range(0, 3): self.assertAlmostEqual(foundValues[i], values[i])
+		self.assertMatrixAlmostEqual(foundAxes, axes)
+
+class FKRigTests(KinematicsTestCase):
+	def setUp(self):
+		# A chain along y, with the middle bone turned about z at rest
+		self.bones = [("root", None, IDENTITY_QUAT, (0.0, 0.0, 0.0)),
+			("mid", "root", ZAXIS_90, (0.0, 1.0, 0.0)),
+			("tip", "mid", ZAXIS_90, (-1.0, 1.0, 0.0))]
+
+	def testRestPose(self):
+		rig = buildRig(self.bones, Quaternion(0.0, 0.6, 0.0, 0.8), Vector(5.0, -1.0, 2.0), Vector(2.0, 2.0, 2.0))
+		pose = rig.getAllBoneLocRotLS({})
+		self.assertEqual(sorted(pose.keys()), ["mid", "root", "tip"])
+		for loc, rot in pose.values():
+			self.assertVectorAlmostEqual(loc, Vector(0.0, 0.0, 0.0))
+			self.assertQuatAlmostEqual(rot, Quaternion(0.0, 0.0, 0.0, 1.0))
+
+	def testRootChannels(self):
+		rig = buildRig(self.bones, armSize=Vector(2.0, 2.0, 2.0))
+		pose = rig.getAllBoneLocRotLS({"root" : ((1.0, 2.0, 3.0), ZAXIS_90, (1.0, 1.0, 1.0))})
+		self.assertVectorAlmostEqual(pose["root"][0], Vector(2.0, 4.0, 6.0))
+		self.assertQuatAlmostEqual(pose["root"][1], torqueRot(ZAXIS_90))
+		# the rest of the chain just follows
+		for name in ("mid", "tip"):
+			self.assertVectorAlmostEqual(pose[name][0], Vector(0.0, 0.0, 0.0))
+			self.assertQuatAlmostEqual(pose[name][1], Quaternion(0.0, 0.0, 0.0, 1.0))
+
+	def testChildFollowsParent(self):
+		rig = buildRig(self.bones)
+		poseMats = rig.getPoseMatrices({"root" : ((0.0, 0.0, 0.0), ZAXIS_90, (1.0, 1.0, 1.0))})
+		# turning the root a quarter about z swings the tip from (-1, 1) to (-1, -1)
+		self.assertAlmostEqual(poseMats["tip"][3][0], -1.0)
+		self.assertAlmostEqual(poseMats["tip"][3][1], -1.0)
+		self.assertAlmostEqual(poseMats["tip"][3][2], 0.0)
+
+	def testChildChannels(self):
+		rig = buildRig(self.bones)
+		q = axisQuat((1.0, 0.0, 0.0), 0.4)
+		pose = rig.getAllBoneLocRotLS({"root" : ((0.0, 0.0, 0.0), ZAXIS_90, (1.0, 1.0, 1.0)),
+			"mid" : ((0.0, 0.5, 0.0), q, (1.0, 1.0, 1.0))})
+		# channels are in the bone's own rest space, the location is
+		# given in the parent's, where the mid bone's y is -x
+		self.assertVectorAlmostEqual(pose["mid"][0], Vector(-0.5, 0.0, 0.0))
+		self.assertQuatAlmostEqual(pose["mid"][1], torqueRot(q))
+		self.assertVectorAlmostEqual(pose["tip"][0], Vector(0.0, 0.0, 0.0))
+		self.assertQuatAlmostEqual(pose["tip"][1], Quaternion(0.0, 0.0, 0.0, 1.0))
+
+	def testUniformParentScale(self):
+		rig = buildRig(self.bones, armSize=Vector(3.0, 3.0, 3.0))
+		pose = rig.getAllBoneLocRotLS({"root" : ((0.0, 0.0, 0.0), IDENTITY_QUAT, (2.0, 2.0, 2.0)),
+			"tip" : ((0.0, 0.25, 0.0), IDENTITY_QUAT, (1.0, 1.0, 1.0))})
+		# the scale stretches the offsets, but is taken back out of them
+		self.assertVectorAlmostEqual(pose["mid"][0], Vector(0.0, 0.0, 0.0))
+		self.assertVectorAlmostEqual(pose["tip"][0], Vector(0.0, 0.75, 0.0))
+		for name in ("root", "mid", "tip"):
+			self.assertQuatAlmostEqual(pose[name][1], Quaternion(0.0, 0.0, 0.0, 1.0))
+
+	def testConnectedBoneIgnoresLoc(self):
+		# Blender keeps connected bones on the end of their parent, whatever
+		# their loc channel says
+		q = axisQuat((1.0, 0.0, 0.0), 0.4)
+		channels = {"root" : ((1.0, 0.0, 0.0), IDENTITY_QUAT, (1.0, 1.0, 1.0)),
+			"mid" : ((0.0, 0.5, 0.0), q, (1.0, 1.0, 1.0))}
+		rig = buildRig(self.bones, connected=("root", "mid"))
+		loose = buildRig(self.bones)
+		poseMats = rig.getPoseMatrices(channels)
+		expected = loose.getPoseMatrices({"root" : channels["root"], "mid" : ((0.0, 0.0, 0.0), q, (1.0, 1.0, 1.0))})
+		self.assertMatrixAlmostEqual(poseMats["mid"], expected["mid"])
+		self.assertMatrixAlmostEqual(poseMats["tip"], expected["tip"])
+		pose = rig.getAllBoneLocRotLS(channels)
+		# a root bone has nothing to be connected to
+		self.assertVectorAlmostEqual(pose["root"][0], Vector(1.0, 0.0, 0.0))
+		self.assertVectorAlmostEqual(pose["mid"][0], Vector(0.0, 0.0, 0.0))
+		self.assertQuatAlmostEqual(pose["mid"][1], torqueRot(q))
+		# the same channels move a bone that isn't connected
+		self.assertVectorAlmostEqual(loose.getAllBoneLocRotLS(channels)["mid"][0], Vector(-0.5, 0.0, 0.0))
+
+	def testArmaturePose(self):
+		rig = buildRig(self.bones)
+		pose = rig.getArmaturePose({"mid" : ((0.0, 0.0, 0.0), IDENTITY_QUAT, (1.0, 2.0, 0.5))})
+		self.assertVectorAlmostEqual(pose["mid"][2], Vector(1.0, 2.0, 0.5))
+		self.assertVectorAlmostEqual(pose["root"][2], Vector(1.0, 1.0, 1.0))
+
+class DecomposePoseTests(KinematicsTestCase):
+	def setUp(self):
+		self.rig = buildRig([("root", None, axisQuat((0.0, 0.6, 0.8), 0.5), (0.0, 0.0, 0.0)),
+			("mid", "root", ZAXIS_90, (0.0, 1.0, 0.0)),
+			("tip", "mid", axisQuat((1.0, 0.0, 0.0), 0.3), (-1.0, 1.0, 0.0))],
+			Quaternion(0.0, 0.6, 0.0, 0.8), Vector(5.0, -1.0, 2.0), Vector(2.0, 2.0, 2.0))
+
+	def decompose(self, channels):
+		return self.rig.decomposePose(self.rig.getPoseMatrices(channels))
+
+	def testMatchesLocRotUnderUniformScale(self):
+		channels = {"root" : ((1.0, 0.5, -1.0), axisQuat((0.0, 0.0, 1.0), 0.4), (1.5, 1.5, 1.5)),
+			"mid" : ((0.0, 0.2, 0.1), axisQuat((0.6, 0.8, 0.0), -0.7), (0.5, 0.5, 0.5)),
+			"tip" : ((0.3, 0.0, 0.0), axisQuat((0.0, 1.0, 0.0), 1.1), (1.0, 1.0, 1.0))}
+		locRot = self.rig.getAllBoneLocRotLS(channels)
+		decomposed = self.decompose(channels)
+		for name in ("root", "mid", "tip"):
+			loc, rot, factors, scaleRot = decomposed[name]
+			self.assertVectorAlmostEqual(loc, locRot[name][0])
+			self.assertQuatAlmostEqual(rot, locRot[name][1])
+			size = channels[name][2]
+			self.assertVectorAlmostEqual(factors, Vector(size[0], size[1], size[2]))
+			self.assertQuatAlmostEqual(scaleRot, Quaternion(0.0, 0.0, 0.0, 1.0))
+
+	def testRestPose(self):
+		for loc, rot, factors, scaleRot in self.decompose({}).values():
+			self.assertVectorAlmostEqual(loc, Vector(0.0, 0.0, 0.0))
+			self.assertQuatAlmostEqual(rot, Quaternion(0.0, 0.0, 0.0, 1.0))
+			self.assertVectorAlmostEqual(factors, Vector(1.0, 1.0, 1.0))
+
+	def testUnevenParentScale(self):
+		# getAllBoneLocRotLS can't undo a parent stretched along one axis
+		# when the child is turned, taking the matrices apart can
+		q = axisQuat((0.0, 0.0, 1.0), 0.6)
+		channels = {"mid" : ((0.0, 0.0, 0.0), IDENTITY_QUAT, (1.0, 3.0, 0.5)),
+			"tip" : ((0.25, 0.0, 0.0), q, (2.0, 1.0, 1.0))}
+		loc, rot, factors, scaleRot = self.decompose(channels)["tip"]
+		self.assertQuatAlmostEqual(rot, torqueRot(q))
+		self.assertVectorAlmostEqual(factors, Vector(2.0, 1.0, 1.0))
+		self.assertQuatAlmostEqual(scaleRot, Quaternion(0.0, 0.0, 0.0, 1.0))
+		locRot = self.rig.getAllBoneLocRotLS(channels)
+		self.assertVectorAlmostEqual(loc, locRot["tip"][0])
+		other = locRot["tip"][1]
+		self.assertTrue(abs(sum([rot.members[i] * other.members[i] for i in range(0, 4)])) < 0.999)
+		mid = self.decompose(channels)["mid"]
+		self.assertVectorAlmostEqual(mid[2], Vector(1.0, 3.0, 0.5))
+
+# Stands in for multiprocessing, its pools fail to map
+class BrokenPool:
+	pools = []
+	def __init__(self, processes):
+		self.calls = []
+		BrokenPool.pools.append(self)
+	def map(self, func, jobs):
+		self.calls.append("map")
+		raise OSError("worker died")
+	def close(self): self.calls.append("close")
+	def terminate(self): self.calls.append("terminate")
+	def join(self): self.calls.append("join")
+
+class BrokenMultiprocessing:
+	Pool = BrokenPool
+
+class EvaluatePosesTests(KinematicsTestCase):
+	def setUp(self):
+		self.multiprocessing = Dts_Kinematics.multiprocessing
+		self.canForkWorkers = Dts_Kinematics.canForkWorkers
+		BrokenPool.pools = []
+		rig = buildRig([("root", None, IDENTITY_QUAT, (0.0, 0.0, 0.0)), ("tip", "root", ZAXIS_90, (0.0, 1.0, 0.0))])
+		frames = [{"root" : ((0.1 * i, 0.0, 0.0), axisQuat((0.0, 0.0, 1.0), 0.2 * i), (1.0, 1.0, 1.0))} for i in range(0, 4)]
+		self.jobs = [(rig, frames[0:2], False), (rig, frames[2:4], True)]
+
+	def tearDown(self):
+		Dts_Kinematics.multiprocessing = self.multiprocessing
+		Dts_Kinematics.canForkWorkers = self.canForkWorkers
+
+	def assertSamePoses(self, a, b):
+		self.assertEqual(len(a), len(b))
+		for i in range(0, len(a)):
+			self.assertEqual(len(a[i]), len(b[i]))
+			for frameA, frameB in zip(a[i], b[i]):
+				self.assertEqual(sorted(frameA.keys()), sorted(frameB.keys()))
+				for name in frameA.keys():
+					for va, vb in zip(frameA[name], frameB[name]): self.assertVectorAlmostEqual(va, vb)
+
+	def serial(self):
+		return [Dts_Kinematics.evaluatePoses(job) for job in self.jobs]
+
+	def testFailingPoolFallsBack(self):
+		Dts_Kinematics.multiprocessing = BrokenMultiprocessing
+		Dts_Kinematics.canForkWorkers = lambda: True
+		self.assertSamePoses(Dts_Kinematics.evaluatePosesParallel(self.jobs, 2), self.serial())
+		self.assertEqual(len(BrokenPool.pools), 1)
+		self.assertEqual(BrokenPool.pools[0].calls, ["map", "terminate", "join"])
+
+	def testNoPoolWithoutFork(self):
+		Dts_Kinematics.multiprocessing = BrokenMultiprocessing
+		Dts_Kinematics.canForkWorkers = lambda: False
+		self.assertSamePoses(Dts_Kinematics.evaluatePosesParallel(self.jobs, 2), self.serial())
+		self.assertEqual(BrokenPool.pools, [])
+
+	def testWorkers(self):
+		self.assertSamePoses(Dts_Kinematics.evaluatePosesParallel(self.jobs, 2), self.serial())
+
+class PoseCacheTests(TestCase):
+	# Room for three poses of five bones, a fourth has to push one out
+	def setUp(self):
+		self.cache = Dts_Kinematics.PoseCache(10000.0 / 1048576)
+		self.pose = dict([("bone%d" % i, None) for i in range(0, 5)])
+
+	def testHitsAndMisses(self):
+		self.assertEqual(self.cache.get("arm", "walk", 1), None)
+		self.cache.put("arm", "walk", 1, self.pose)
+		self.assertTrue(self.cache.has("arm", "walk", 1))
+		self.assertFalse(self.cache.has("arm", "run", 1))
+		self.assertTrue(self.cache.get("arm", "walk", 1) is self.pose)
+		self.assertEqual(self.cache.get("arm", "walk", 2), None)
+		self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+	def testReplace(self):
+		self.cache.put("arm", "walk", 1, self.pose)
+		other = {"bone0" : None}
+		self.cache.put("arm", "walk", 1, other)
+		self.assertTrue(self.cache.get("arm", "walk", 1) is other)
+		self.assertEqual(self.cache.size, Dts_Kinematics.POSE_BYTES_PER_BONE)
+
+	def testEvictsLeastRecentlyUsed(self):
+		for frame in (1, 2, 3): self.cache.put("arm", "walk", frame, self.pose)
+		self.assertEqual(self.cache.size, 15 * Dts_Kinematics.POSE_BYTES_PER_BONE)
+		# frame 1 was used last, so frame 2 is the oldest
+		self.cache.get("arm", "walk", 1)
+		self.cache.put("arm", "walk", 4, self.pose)
+		self.assertEqual([self.cache.has("arm", "walk", frame) for frame in (1, 2, 3, 4)], [True, False, True, True])
+		self.assertTrue(self.cache.size <= self.cache.maxBytes * 0.9)
+
+	def testEvictsDownToNinetyPercent(self):
+		# a pose that needs most of the cache pushes out everything else
+		for frame in (1, 2, 3): self.cache.put("arm", "walk", frame, self.pose)
+		big = dict([("bone%d" % i, None) for i in range(0, 14)])
+		self.cache.put("arm", "walk", 4, big)
+		self.assertEqual(len(self.cache.entries), 1)
+		self.assertEqual(self.cache.size, 14 * Dts_Kinematics.POSE_BYTES_PER_BONE)
+
+	def testDisabled(self):
+		cache = Dts_Kinematics.PoseCache(0)
+		cache.put("arm", "walk", 1, self.pose)
+		self.assertFalse(cache.has("arm", "walk", 1))
+		self.assertEqual(cache.get("arm", "walk", 1), None)
+		self.assertEqual(cache.size, 0)
+
+if __name__ == "__main__":
+	unittest.main()
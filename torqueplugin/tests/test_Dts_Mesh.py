@@ -0,0 +1,313 @@
+'''
+test_Dts_Mesh.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest
+from dtstest import *
+
+class TransformTests(TestCase):
+	def setUp(self):
+		self.rot = Quaternion(0.1, -0.3, 0.2, 0.9).normalize()
+		self.trans = Vector(1.5, -2.0, 0.25)
+
+	def testMatchesTranslateThenRotate(self):
+		single = gridMesh(3)
+		twoPass = gridMesh(3)
+		single.transform(self.trans, self.rot)
+		twoPass.translate(self.trans)
+		twoPass.rotate(self.rot)
+		for v in range(0, len(single.verts)):
+			self.assertVectorAlmostEqual(single.verts[v], twoPass.verts[v])
+			self.assertVectorAlmostEqual(single.normals[v], twoPass.normals[v])
+		self.assertVectorAlmostEqual(single.center, twoPass.center)
+		self.assertAlmostEqual(single.radius, twoPass.radius, 5)
+
+	def testMatrix(self):
+		msh = gridMesh(2)
+		mat = self.rot.toMatrix()
+		mat.members[12], mat.members[13], mat.members[14] = 3.0, 4.0, 5.0
+		expected = [self.rot.apply(v) + Vector(3.0, 4.0, 5.0) for v in msh.verts]
+		msh.transform(mat)
+		for v in range(0, len(msh.verts)):
+			self.assertVectorAlmostEqual(msh.verts[v], expected[v])
+			self.assertVectorAlmostEqual(msh.normals[v], self.rot.apply(Vector(0.0, 0.0, 1.0)))
+
+	def testMissingNormals(self):
+		msh = gridMesh(1)
+		msh.normals = msh.normals[0:2]
+		msh.transform(self.trans, self.rot)
+		self.assertEqual(len(msh.normals), 2)
+		self.assertVectorAlmostEqual(msh.verts[3], self.rot.apply(Vector(1.0, 1.0, 0.0) + self.trans))
+
+class SplitMeshTests(TestCase):
+	def assertValidPart(self, part, maxIndices):
+		self.failUnless(len(part.indices) <= maxIndices)
+		self.failUnless(len(part.verts) <= 0xFFFF)
+		self.assertEqual(part.vertsPerFrame, len(part.verts))
+		self.assertEqual(len(part.tverts), len(part.verts))
+		self.assertEqual(len(part.normals), len(part.verts))
+		for i in part.indices: self.failUnless(i < len(part.verts))
+		used = {}
+		for i in part.indices: used[i] = True
+		self.assertEqual(len(used), len(part.verts))
+
+	def testSmallMeshNotSplit(self):
+		msh = gridMesh(4)
+		self.assertEqual(msh.splitMesh(), [msh])
+
+	def testIndexLimit(self):
+		msh = gridMesh(20)
+		parts = msh.splitMesh(300)
+		self.assertEqual(len(parts), 8)
+		faces = []
+		for part in parts:
+			self.assertValidPart(part, 300)
+			faces += faceSet(part)
+		faces.sort()
+		self.assertEqual(faces, faceSet(msh))
+
+	def testMaterialsKept(self):
+		msh = gridMesh(6)
+		# Second half of the faces use another material
+		half = len(msh.indices) / 2
+		msh.primitives = [Primitive(0, half, Primitive.Triangles | Primitive.Indexed | 0),
+			Primitive(half, half, Primitive.Triangles | Primitive.Indexed | 1)]
+		parts = msh.splitMesh(30)
+		faces = []
+		for part in parts:
+			self.assertValidPart(part, 30)
+			faces += faceSet(part)
+			for p in part.primitives:
+				self.assertEqual(p.matindex & Primitive.TypeMask, Primitive.Triangles)
+				self.failUnless(p.matindex & Primitive.Indexed)
+		faces.sort()
+		self.assertEqual(faces, faceSet(msh))
+
+	def testVertexLimit(self):
+		# 68121 vertices, but the index limit is out of the way
+		msh = gridMesh(260)
+		parts = msh.splitMesh(10 ** 7)
+		self.assertEqual(len(parts), 2)
+		numFaces = 0
+		for part in parts:
+			self.assertValidPart(part, 10 ** 7)
+			numFaces += len(part.indices) / 3
+		self.assertEqual(numFaces, 260 * 260 * 2)
+
+	def testSkinInfluencesKept(self):
+		msh = skinMesh(gridMesh(10), 3, lambda v: [(v % 3, 0.75), ((v + 1) % 3, 0.25)])
+		for part in msh.splitMesh(60):
+			self.assertEqual(list(part.nodeIndex), [0, 1, 2])
+			self.assertEqual(len(part.vindex), 2 * len(part.verts))
+			for i in range(0, len(part.vindex)):
+				# Find the source vertex from its position
+				x, y = part.verts[part.vindex[i]].members[0:2]
+				v = int(y) * 11 + int(x)
+				if part.vweight[i] == 0.75: self.assertEqual(part.bindex[i], v % 3)
+				else: self.assertEqual(part.bindex[i], (v + 1) % 3)
+
+class SplitBonePaletteTests(TestCase):
+	def testPaletteLimit(self):
+		# Columns of 3 quads per bone, 5 bones
+		msh = skinMesh(gridMesh(15), 5, lambda v: [((v % 16) / 4 % 5, 1.0)])
+		parts = msh.splitBonePalette(2)
+		self.failUnless(len(parts) > 1)
+		faces = []
+		for part in parts:
+			self.failUnless(len(part.nodeIndex) <= 2)
+			for b in part.bindex: self.failUnless(b < len(part.nodeIndex))
+			faces += faceSet(part)
+		faces.sort()
+		self.assertEqual(faces, faceSet(msh))
+
+	def testNodesRemapped(self):
+		msh = skinMesh(gridMesh(4), 4, lambda v: [(3 - (v % 5) / 2 % 4, 1.0)])
+		for part in msh.splitBonePalette(2):
+			for i in range(0, len(part.vindex)):
+				x, y = part.verts[part.vindex[i]].members[0:2]
+				v = int(y) * 5 + int(x)
+				self.assertEqual(part.nodeIndex[part.bindex[i]], 3 - (v % 5) / 2 % 4)
+
+	def testNoSplitNeeded(self):
+		msh = skinMesh(gridMesh(4), 4, lambda v: [(v % 4, 1.0)])
+		self.assertEqual(msh.splitBonePalette(4), [msh])
+		self.assertEqual(msh.splitBonePalette(0), [msh])
+		std = gridMesh(4)
+		self.assertEqual(std.splitBonePalette(1), [std])
+
+	def testLargePart(self):
+		# A 90601 vertex mesh with 16 bones in columns; the 15 bone part is
+		# too big for 16 bit indices until splitMesh has been through it
+		msh = skinMesh(gridMesh(300), 16, lambda v: [((v % 301) / 19, 1.0)])
+		parts = []
+		for part in msh.splitBonePalette(15):
+			parts += part.splitMesh()
+		numFaces = 0
+		for part in parts:
+			self.failUnless(len(part.verts) <= 0xFFFF)
+			self.assertEqual(part.indices.typecode, 'H')
+			numFaces += len(part.indices) / 3
+		self.assertEqual(numFaces, 300 * 300 * 2)
+
+class LimitInfluencesTests(TestCase):
+	def influences(self, msh, v):
+		return [(msh.bindex[i], msh.vweight[i]) for i in range(0, len(msh.vindex)) if msh.vindex[i] == v]
+
+	def testMaxInfluences(self):
+		weights = [0.05, 0.3, 0.1, 0.25, 0.2, 0.1]
+		msh = skinMesh(gridMesh(1), 6, lambda v: [(b, weights[b]) for b in range(0, 6)])
+		before, after = msh.limitInfluences(4)
+		self.assertEqual(before, {6 : 4})
+		self.assertEqual(after, {4 : 4})
+		for v in range(0, 4):
+			infs = self.influences(msh, v)
+			# Biggest first, renormalized
+			self.assertEqual([msh.nodeIndex[b] for b, w in infs][0:3], [1, 3, 4])
+			self.assertAlmostEqual(infs[0][1], 0.3 / 0.85, 6)
+			self.assertAlmostEqual(sum([w for b, w in infs]), 1.0, 6)
+
+	def testMinWeightKeepsBiggest(self):
+		msh = skinMesh(gridMesh(1), 3, lambda v: [(0, 0.02), (1, 0.01), (2, 0.015)])
+		before, after = msh.limitInfluences(0, 0.1)
+		self.assertEqual(after, {1 : 4})
+		self.assertEqual(list(msh.nodeIndex), [0])
+		for v in range(0, 4): self.assertEqual(self.influences(msh, v), [(0, 1.0)])
+
+	def testDuplicateBonesMerged(self):
+		msh = skinMesh(gridMesh(1), 2, lambda v: [(0, 0.25), (1, 0.5), (0, 0.25)])
+		before, after = msh.limitInfluences(0)
+		self.assertEqual(before, {3 : 4})
+		self.assertEqual(after, {2 : 4})
+		for v in range(0, 4): self.assertEqual(sorted(self.influences(msh, v)), [(0, 0.5), (1, 0.5)])
+
+	def testQuantize(self):
+		msh = skinMesh(gridMesh(2), 3, lambda v: [(0, 0.333), (1, 0.333), (2, 0.334 + v * 0.01)])
+		msh.limitInfluences(4, 0.0, True)
+		for v in range(0, 9):
+			steps = [w * 255.0 for b, w in self.influences(msh, v)]
+			for st in steps: self.assertAlmostEqual(st, round(st), 3)
+			self.assertEqual(sum([int(round(st)) for st in steps]), 255)
+
+	def testUnusedNodesDropped(self):
+		msh = skinMesh(gridMesh(1), 4, lambda v: [(3, 0.9), (1, 0.1)])
+		msh.limitInfluences(1)
+		self.assertEqual(list(msh.nodeIndex), [3])
+		self.assertEqual(len(msh.nodeTransforms), 1)
+		self.assertEqual(list(msh.bindex), [0, 0, 0, 0])
+
+	def testNotSkin(self):
+		self.assertEqual(gridMesh(1).limitInfluences(1), ({}, {}))
+
+class RemoveDegeneratesTests(TestCase):
+	def addFace(self, msh, a, b, c, matindex=0):
+		msh.primitives.append(Primitive(len(msh.indices), 3, matindex | Primitive.Triangles | Primitive.Indexed))
+		for v in (a, b, c): msh.indices.append(v)
+
+	def testCleanMeshUntouched(self):
+		msh = gridMesh(3)
+		self.assertEqual(msh.removeDegenerates(), (0, 0))
+		self.assertEqual(len(msh.verts), 16)
+		self.assertEqual(len(msh.indices), 54)
+
+	def testDegenerateFaces(self):
+		msh = gridMesh(2)
+		faces = faceSet(msh)
+		self.addFace(msh, 0, 0, 4)
+		# Three points on one line
+		self.addFace(msh, 0, 1, 2)
+		# A vertex welded onto another
+		msh.verts.append(Vector(1.0, 1.0, 0.0))
+		msh.tverts.append(Vector2(0.0, 0.0))
+		msh.normals.append(Vector(0.0, 0.0, 1.0))
+		msh.enormals.append(0)
+		self.addFace(msh, 4, 9, 2)
+		self.assertEqual(msh.removeDegenerates(), (3, 0))
+		self.assertEqual(faceSet(msh), faces)
+		# The welded vertex is no longer used
+		self.assertEqual(len(msh.verts), 9)
+
+	def testDuplicateFaces(self):
+		msh = gridMesh(2)
+		faces = faceSet(msh)
+		self.addFace(msh, 0, 3, 1)
+		# Same face, rotated
+		self.addFace(msh, 3, 1, 0)
+		# Other winding and other material are kept
+		self.addFace(msh, 0, 1, 3)
+		self.addFace(msh, 0, 3, 1, 1)
+		self.assertEqual(msh.removeDegenerates(), (0, 2))
+		self.assertEqual(msh.getPolyCount(), 10)
+
+	def testThinFacesOnLargeMeshes(self):
+		msh = gridMesh(1)
+		for v in msh.verts: v.members[0] *= 1000.0
+		msh.verts[3].members[1] = 1e-4
+		self.assertEqual(msh.removeDegenerates(), (0, 0))
+
+	def testVertexDataCompacted(self):
+		msh = skinMesh(gridMesh(2), 2, lambda v: [(v % 2, 1.0)])
+		# Drop every face using vertex 0
+		msh.indices[0] = msh.indices[1]
+		msh.removeDegenerates()
+		self.assertEqual(len(msh.verts), 8)
+		self.assertEqual(len(msh.tverts), 8)
+		self.assertEqual(len(msh.enormals), 8)
+		self.assertEqual(msh.vertsPerFrame, 8)
+		for i in range(0, len(msh.vindex)):
+			x, y = msh.verts[msh.vindex[i]].members[0:2]
+			self.assertEqual(msh.bindex[i], (int(y) * 3 + int(x)) % 2)
+
+class BatchPrimitivesTests(TestCase):
+	def testGroupsByMaterial(self):
+		msh = gridMesh(2)
+		tris = msh.getTriangles()
+		# One primitive per face, alternating between two materials
+		msh.primitives = []
+		for t in range(0, len(tris)):
+			msh.primitives.append(Primitive(t * 3, 3, (t % 2) | Primitive.Triangles | Primitive.Indexed))
+		faces = faceSet(msh)
+		self.assertEqual(msh.batchPrimitives(), (8, 2))
+		self.assertEqual(faceSet(msh), faces)
+		self.assertEqual([p.matindex & Primitive.MaterialMask for p in msh.primitives], [0, 1])
+		self.assertEqual([(p.firstElement, p.numElements) for p in msh.primitives], [(0, 12), (12, 12)])
+		# Faces keep their order within a material
+		self.assertEqual(list(msh.indices[0:3]), tris[0][0:3])
+		self.assertEqual(list(msh.indices[3:6]), tris[2][0:3])
+
+	def testStripsUnwound(self):
+		msh = gridMesh(1)
+		msh.indices = array('H', [0, 2, 1, 3, 1, 2, 3])
+		msh.primitives = [Primitive(0, 4, Primitive.Strip | Primitive.Indexed), Primitive(4, 3, Primitive.Triangles | Primitive.Indexed)]
+		faces = faceSet(msh)
+		self.assertEqual(msh.batchPrimitives(), (2, 1))
+		self.assertEqual(faceSet(msh), faces)
+		self.assertEqual(msh.primitives[0].matindex & Primitive.TypeMask, Primitive.Triangles)
+
+	def testSortedMeshesLeftAlone(self):
+		msh = gridMesh(1, DtsMesh.T_Sorted)
+		msh.primitives = [Primitive(0, 3, Primitive.Triangles | Primitive.Indexed), Primitive(3, 3, Primitive.Triangles | Primitive.Indexed)]
+		self.assertEqual(msh.batchPrimitives(), (2, 2))
+
+if __name__ == "__main__":
+	unittest.main()
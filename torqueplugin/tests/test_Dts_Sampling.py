@@ -0,0 +1,101 @@
+'''
+test_Dts_Sampling.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest, math
+from dtstest import *
+import Dts_Sampling
+from Dts_Sampling import slerp, resampleTrack, trackError, chooseKeyCount
+
+def zRotation(degrees):
+	a = math.radians(degrees) / 2.0
+	return (0.0, 0.0, math.sin(a), math.cos(a))
+
+class SamplingTests(TestCase):
+	def testSlerp(self):
+		q = slerp(zRotation(0.0), zRotation(90.0), 0.5)
+		for i in range(0, 4): self.assertAlmostEqual(q[i], zRotation(45.0)[i])
+		# Takes the short way round
+		far = tuple([-c for c in zRotation(90.0)])
+		q = slerp(zRotation(0.0), far, 0.5)
+		self.assertAlmostEqual(abs(q[2]), zRotation(45.0)[2])
+
+	def testResampleKeepsEnds(self):
+		track = [(float(i), float(i * i), 0.0) for i in range(0, 11)]
+		keys = resampleTrack(track, 4)
+		self.assertEqual(len(keys), 4)
+		self.assertEqual(keys[0], track[0])
+		self.assertEqual(keys[-1], track[-1])
+		self.assertAlmostEqual(keys[1][0], 10.0 / 3.0)
+
+	def testLinearTracksNeedTwoKeys(self):
+		loc = [(i * 0.5, 1.0, -i * 0.25) for i in range(0, 30)]
+		rot = [zRotation(i * 3.0) for i in range(0, 30)]
+		numKeys, errors = chooseKeyCount([loc, rot], [0.001, 0.1])
+		self.assertEqual(numKeys, 2)
+		for err in errors: self.assertAlmostEqual(err, 0.0, 4)
+
+	def testErrorBound(self):
+		track = [(math.sin(i * 0.1), 0.0, 0.0) for i in range(0, 64)]
+		numKeys, errors = chooseKeyCount([track], [0.01])
+		self.failUnless(numKeys < 64)
+		self.failUnless(errors[0] <= 0.01)
+		self.assertAlmostEqual(errors[0], trackError(track, resampleTrack(track, numKeys)))
+		# One key fewer doesn't fit
+		self.failUnless(trackError(track, resampleTrack(track, numKeys - 1)) > 0.01)
+
+	def testLimitsPerTrack(self):
+		# A scale wobble of 0.0005 is fine with a 0.001 scale limit, even
+		# though a translation limit of 0.0001 is much tighter
+		loc = [(i * 0.1, 0.0, 0.0) for i in range(0, 40)]
+		scale = [(1.0 + 0.0005 * math.sin(i), 1.0, 1.0) for i in range(0, 40)]
+		self.assertEqual(chooseKeyCount([loc, scale], [0.0001, 0.001])[0], 2)
+		self.failUnless(chooseKeyCount([loc, scale], [0.0001, 0.0001])[0] > 2)
+
+	def testShortTracks(self):
+		self.assertEqual(chooseKeyCount([[(0.0, 0.0, 0.0), (1.0, 0.0, 0.0)]], [0.1]), (2, [0.0]))
+
+	def testNoFitUsesEverySample(self):
+		track = [((i % 2) * 1.0, 0.0, 0.0) for i in range(0, 20)]
+		self.assertEqual(chooseKeyCount([track], [0.001]), (20, [0.0]))
+
+	def testAliasing(self):
+		# 18 keys fit this sine wave and 17 don't, but 16 line up with it
+		# well enough to fit too
+		track = [(math.sin(2.0 * math.pi * 3.8 * i / 53.0), 0.0, 0.0) for i in range(0, 54)]
+		numKeys, errors = chooseKeyCount([track], [0.276])
+		self.assertEqual(numKeys, 16)
+		self.failUnless(errors[0] <= 0.276)
+		for count in range(2, 16):
+			self.failUnless(trackError(track, resampleTrack(track, count)) > 0.276)
+
+	def testSmallestCount(self):
+		# Matches trying every count in turn
+		for cycles, limit in ((4.05, 0.146), (9.18, 0.182), (2.5, 0.05), (7.2, 0.322)):
+			track = [(math.sin(2.0 * math.pi * cycles * i / 60.0), 0.0, 0.0) for i in range(0, 61)]
+			fits = [k for k in range(2, 61) if trackError(track, resampleTrack(track, k)) <= limit]
+			self.assertEqual(chooseKeyCount([track], [limit])[0], (fits + [61])[0])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,81 @@
+'''
+test_Dts_Shape.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest
+from dtstest import *
+from Dts_Shape import DtsShape
+
+class ShareMeshDataTests(TestCase):
+	def setUp(self):
+		self.shape = DtsShape()
+
+	def testIdenticalMeshes(self):
+		self.shape.meshes = [gridMesh(2), DtsMesh(DtsMesh.T_Null), gridMesh(2)]
+		numShared, bytesSaved = self.shape.shareMeshData()
+		self.assertEqual(numShared, 1)
+		self.assertEqual(self.shape.meshes[0].parent, -1)
+		self.assertEqual(self.shape.meshes[1].parent, -1)
+		self.assertEqual(self.shape.meshes[2].parent, 0)
+		self.assertEqual(bytesSaved, 9 * (12 + 8 + 13))
+
+	def testPrefix(self):
+		big, small = gridMesh(3), gridMesh(3)
+		for l in (small.verts, small.tverts, small.normals): del l[4:]
+		self.shape.meshes = [big, small]
+		self.assertEqual(self.shape.shareMeshData()[0], 1)
+		self.assertEqual(small.parent, 0)
+		# A longer mesh can't use a shorter one
+		big, small = gridMesh(3), gridMesh(3)
+		for l in (small.verts, small.tverts, small.normals): del l[4:]
+		self.shape.meshes = [small, big]
+		self.assertEqual(self.shape.shareMeshData()[0], 0)
+
+	def testDifferentData(self):
+		a, b, c = gridMesh(2), gridMesh(2), gridMesh(2)
+		b.verts[5] = Vector(0.0, 0.0, 1.0)
+		c.tverts[5] = Vector2(0.5, 0.25)
+		self.shape.meshes = [a, b, c]
+		self.assertEqual(self.shape.shareMeshData()[0], 0)
+		for msh in self.shape.meshes: self.assertEqual(msh.parent, -1)
+
+	def testSkinMustMatchExactly(self):
+		weights = lambda v: [(v % 2, 1.0)]
+		a = skinMesh(gridMesh(2), 2, weights)
+		b = skinMesh(gridMesh(2), 2, weights)
+		c = skinMesh(gridMesh(2), 2, lambda v: [(0, 1.0)])
+		d = skinMesh(gridMesh(2), 2, weights)
+		for l in (d.verts, d.tverts, d.normals): del l[4:]
+		self.shape.meshes = [a, b, c, d]
+		self.assertEqual(self.shape.shareMeshData()[0], 1)
+		self.assertEqual([msh.parent for msh in self.shape.meshes], [-1, 0, -1, -1])
+
+	def testSkinAndStandardKeptApart(self):
+		a = gridMesh(2)
+		b = skinMesh(gridMesh(2), 1, lambda v: [(0, 1.0)])
+		self.shape.meshes = [a, b]
+		self.assertEqual(self.shape.shareMeshData()[0], 0)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,147 @@
+'''
+test_Dts_Snapshot.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest, os, shutil, tempfile
+from dtstest import *
+import Dts_Snapshot
+from Dts_Stream import DtsStream
+from Dts_Shape import DtsShape, Node, dObject, DetailLevel, SubShape, ObjectState
+
+# Stands in for the Blender shape and mesh classes, which add data of their own
+class BlenderMesh(DtsMesh):
+	def __init__(self, msh):
+		DtsMesh.__init__(self)
+		self.__dict__.update(msh.__dict__)
+		self.blenderObject = object()
+
+class BlenderShape(DtsShape):
+	def __init__(self):
+		DtsShape.__init__(self)
+		self.blenderScene = object()
+
+def buildShape():
+	shape = BlenderShape()
+	shape.nodes.append(Node(shape.sTable.addString("Root"), -1))
+	shape.defaultTranslations.append(Vector(0.0, 0.0, 0.0))
+	shape.defaultRotations.append(Quaternion(0.0, 0.0, 0.0, 1.0))
+	shape.objects.append(dObject(shape.sTable.addString("Grid"), 1, 0, 0))
+	shape.meshes.append(BlenderMesh(gridMesh(3)))
+	shape.subshapes.append(SubShape(0, 0, 0, 1, 1, 0))
+	shape.detaillevels.append(DetailLevel(shape.sTable.addString("Detail32"), 0, 0, 32.0, -1, -1, 18))
+	shape.objectstates.append(ObjectState(1.0, 0, 0))
+	shape.calculateBounds()
+	shape.calculateCenter()
+	shape.calculateRadius()
+	return shape
+
+class SnapshotTests(TestCase):
+	def setUp(self):
+		self.folder = tempfile.mkdtemp()
+		self.prefs = {'exportBasepath' : self.folder, 'exportBasename' : "grid", 'WriteShapeScript' : False,
+			'TSEMaterial' : False, 'Sequences' : {}}
+
+	def tearDown(self):
+		shutil.rmtree(self.folder)
+
+	def path(self, name):
+		return os.path.join(self.folder, name)
+
+	def readFile(self, name):
+		fs = open(self.path(name), "rb")
+		data = fs.read()
+		fs.close()
+		return data
+
+	def writeShape(self, shape, name):
+		stream = DtsStream(self.path(name))
+		shape.write(stream)
+		stream.closeStream()
+		return self.readFile(name)
+
+	def saveAndLoad(self, snapshot):
+		Dts_Snapshot.saveSnapshot(snapshot, self.path("grid.dtssnap"))
+		return Dts_Snapshot.loadSnapshot(self.path("grid.dtssnap"))
+
+	def testRoundTrip(self):
+		shape = buildShape()
+		snapshot = Dts_Snapshot.snapshotShape(shape, self.prefs)
+		snapshot.externalSequences = ["run"]
+		snapshot.dsqFiles = [("run", "DSQ data")]
+		loaded = self.saveAndLoad(snapshot)
+		self.assertEqual(loaded.prefs, self.prefs)
+		self.assertEqual(loaded.version, 24)
+		self.assertEqual(loaded.externalSequences, ["run"])
+		self.assertEqual(loaded.dsqFiles, [("run", "DSQ data")])
+		blank = DtsShape()
+		self.assertEqual(sorted(loaded.shapeData.keys()), sorted(blank.__dict__.keys()))
+		# only the DtsShape and DtsMesh parts of the Blender classes are kept
+		self.assertFalse('blenderScene' in loaded.shapeData)
+		mesh = loaded.shapeData['meshes'][0]
+		self.assertEqual(mesh.__class__, DtsMesh)
+		self.assertFalse(hasattr(mesh, 'blenderObject'))
+		self.assertEqual(faceSet(mesh), faceSet(shape.meshes[0]))
+		self.assertEqual(loaded.getShape().sTable.get(loaded.shapeData['objects'][0].name), "Grid")
+		# the shape written from the snapshot is the shape written from Blender
+		expected = self.writeShape(shape, "expected.dts")
+		written = Dts_Snapshot.buildSnapshot(loaded)
+		self.assertEqual(written, [self.path("run.dsq"), self.path("grid.dts")])
+		self.assertEqual(self.readFile("grid.dts"), expected)
+		self.assertEqual(self.readFile("run.dsq"), "DSQ data")
+
+	def testBuildTwice(self):
+		snapshot = self.saveAndLoad(Dts_Snapshot.snapshotShape(buildShape(), self.prefs))
+		Dts_Snapshot.buildSnapshot(snapshot, basename="first")
+		Dts_Snapshot.buildSnapshot(snapshot, basename="second")
+		self.assertEqual(len(snapshot.shapeData['meshes']), 1)
+		self.assertEqual(self.readFile("first.dts"), self.readFile("second.dts"))
+
+	def testShapeScript(self):
+		self.prefs['WriteShapeScript'] = True
+		snapshot = Dts_Snapshot.snapshotShape(buildShape(), self.prefs)
+		snapshot.externalSequences = ["run"]
+		other = tempfile.mkdtemp()
+		try:
+			written = Dts_Snapshot.buildSnapshot(self.saveAndLoad(snapshot), other, "moved")
+			self.assertEqual(written, [os.path.join(other, "moved.cs"), os.path.join(other, "moved.dts")])
+			fs = open(os.path.join(other, "moved.cs"))
+			script = fs.read()
+			fs.close()
+			self.assertTrue("baseShape = \"./moved.dts\";" in script)
+			self.assertTrue("sequence0 = \"./run.dsq run\";" in script)
+		finally:
+			shutil.rmtree(other)
+
+	def testBadHeader(self):
+		fs = open(self.path("bad.dtssnap"), "wb")
+		fs.write("DTS 1\n")
+		fs.close()
+		self.assertRaises(ValueError, Dts_Snapshot.loadSnapshot, self.path("bad.dtssnap"))
+		fs = open(self.path("new.dtssnap"), "wb")
+		fs.write("%s %d\n" % (Dts_Snapshot.SNAPSHOT_MAGIC, Dts_Snapshot.SNAPSHOT_VERSION + 1))
+		fs.close()
+		self.assertRaises(ValueError, Dts_Snapshot.loadSnapshot, self.path("new.dtssnap"))
+
+if __name__ == "__main__":
+	unittest.main()
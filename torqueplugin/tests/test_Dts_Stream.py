@@ -0,0 +1,62 @@
+'''
+test_Dts_Stream.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest, os, shutil, tempfile
+from dtstest import *
+from Dts_Stream import DtsStream
+from Dts_Shape import ObjectState
+
+class ArrayWriterTests(TestCase):
+	# The bulk writers have to give the same words as writing each item
+	def setUp(self):
+		self.folder = tempfile.mkdtemp()
+		self.bulk = DtsStream(os.path.join(self.folder, "bulk.dts"))
+		self.single = DtsStream(os.path.join(self.folder, "single.dts"))
+
+	def tearDown(self):
+		# the streams close their files when they go
+		del self.bulk, self.single
+		shutil.rmtree(self.folder)
+
+	def testPoint3FArray(self):
+		points = [Vector(0.0, -1.5, 2.25), Vector(1e-8, 3.0e7, -0.1), Vector(1.0, 2.0, 3.0)]
+		self.bulk.writePoint3FArray(points)
+		for p in points: self.single.writePoint3F(p)
+		self.assertEqual(self.bulk.buffer32.tolist(), self.single.buffer32.tolist())
+		self.assertEqual(len(self.bulk.buffer32), 9)
+		self.bulk.writePoint3FArray([])
+		self.assertEqual(len(self.bulk.buffer32), 9)
+
+	def testObjectStateArray(self):
+		states = [ObjectState(1.0, 0, 0), ObjectState(0.25, 3, 7), ObjectState(0.0, -1, 2**31 - 1)]
+		self.bulk.writeObjectStateArray(states)
+		for state in states: self.single.writeObjectState(state)
+		self.assertEqual(self.bulk.buffer32.tolist(), self.single.buffer32.tolist())
+		self.assertEqual(len(self.bulk.buffer32), 9)
+		self.bulk.writeObjectStateArray([])
+		self.assertEqual(len(self.bulk.buffer32), 9)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,174 @@
+'''
+test_Torque_Math.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest, random, math
+from dtstest import *
+import Torque_Math
+from Torque_Math import calcBoundingSphere, quantizeQuats, Quat16
+
+# Smallest sphere over every sphere through 2, 3 or 4 of the points that
+# holds them all, for checking against on small sets
+def bruteForceSphere(pts):
+	best = None
+	n = len(pts)
+	candidates = []
+	for i in range(0, n):
+		for j in range(i+1, n):
+			candidates.append(Torque_Math._sphereFrom2(pts[i], pts[j]))
+			for k in range(j+1, n):
+				candidates.append(Torque_Math._sphereFrom3(pts[i], pts[j], pts[k]))
+				for l in range(k+1, n):
+					candidates.append(Torque_Math._sphereFrom4(pts[i], pts[j], pts[k], pts[l]))
+	for s in candidates:
+		ok = True
+		for p in pts:
+			if not Torque_Math._sphereContains(s, p):
+				ok = False
+				break
+		if ok and (best == None or s[1] < best[1]): best = s
+	return math.sqrt(best[1])
+
+class BoundingSphereTests(TestCase):
+	def assertEncloses(self, center, radius, pts):
+		for p in pts:
+			d = Vector(p[0], p[1], p[2]) - center
+			self.failUnless(d.length() <= radius + 1e-6)
+
+	def testEmptyAndSinglePoint(self):
+		center, radius = calcBoundingSphere([])
+		self.assertEqual(radius, 0.0)
+		center, radius = calcBoundingSphere([Vector(1.0, 2.0, 3.0)])
+		self.assertVectorAlmostEqual(center, Vector(1.0, 2.0, 3.0))
+		self.assertEqual(radius, 0.0)
+
+	def testTwoPoints(self):
+		center, radius = calcBoundingSphere([(0.0, 0.0, 0.0), (2.0, 0.0, 0.0)])
+		self.assertVectorAlmostEqual(center, Vector(1.0, 0.0, 0.0))
+		self.assertAlmostEqual(radius, 1.0)
+
+	def testCube(self):
+		pts = [(x, y, z) for x in (-1.0, 1.0) for y in (-1.0, 1.0) for z in (-1.0, 1.0)]
+		center, radius = calcBoundingSphere(pts)
+		self.assertVectorAlmostEqual(center, Vector(0.0, 0.0, 0.0))
+		self.assertAlmostEqual(radius, math.sqrt(3.0))
+
+	def testObtuseTriangle(self):
+		# The long edge spans the sphere, not the circumcircle
+		center, radius = calcBoundingSphere([(0.0, 0.0, 0.0), (4.0, 0.0, 0.0), (2.0, 0.5, 0.0)])
+		self.assertVectorAlmostEqual(center, Vector(2.0, 0.0, 0.0))
+		self.assertAlmostEqual(radius, 2.0)
+
+	def testColinearAndCoplanar(self):
+		pts = [(float(i), 2.0 * i, 0.0) for i in range(0, 10)]
+		center, radius = calcBoundingSphere(pts)
+		self.assertAlmostEqual(radius, math.sqrt(81.0 + 324.0) / 2.0)
+		pts = [(math.cos(a * 0.3), math.sin(a * 0.3), 0.0) for a in range(0, 20)]
+		center, radius = calcBoundingSphere(pts)
+		self.assertVectorAlmostEqual(center, Vector(0.0, 0.0, 0.0))
+		self.assertAlmostEqual(radius, 1.0)
+
+	def testMatchesBruteForce(self):
+		rnd = random.Random(7)
+		for n in range(3, 12):
+			pts = [(rnd.uniform(-5, 5), rnd.uniform(-2, 2), rnd.uniform(-1, 3)) for i in range(0, n)]
+			center, radius = calcBoundingSphere(pts)
+			self.assertEncloses(center, radius, pts)
+			self.assertAlmostEqual(radius, bruteForceSphere(pts), 6)
+
+	def testNoBiggerThanBoxSphere(self):
+		rnd = random.Random(3)
+		msh = gridMesh(4)
+		for v in msh.verts: v[2] = rnd.uniform(-1.0, 1.0)
+		msh.calculateBounds()
+		msh.calculateCenter()
+		msh.calculateRadius()
+		boxRadius = msh.radius
+		msh.calculateBoundingSphere()
+		self.assertEncloses(msh.center, msh.radius, msh.verts)
+		self.failUnless(msh.radius <= boxRadius + 1e-9)
+
+	def testReproducible(self):
+		rnd = random.Random(11)
+		pts = [(rnd.random(), rnd.random(), rnd.random()) for i in range(0, 200)]
+		a = calcBoundingSphere(pts)
+		b = calcBoundingSphere(pts)
+		self.assertEqual(a[0].members, b[0].members)
+		self.assertEqual(a[1], b[1])
+		# Point order only makes rounding differences
+		b = calcBoundingSphere(list(reversed(pts)))
+		self.assertVectorAlmostEqual(a[0], b[0], 9)
+		self.assertAlmostEqual(a[1], b[1], 9)
+
+class QuantizeQuatsTests(TestCase):
+	def setUp(self):
+		self.numpy = Torque_Math.numpy
+
+	def tearDown(self):
+		Torque_Math.numpy = self.numpy
+
+	# Runs quantizeQuats without NumPy, and checks it gives the same with NumPy if it's there
+	def quantize(self, quats, tracks=None):
+		Torque_Math.numpy = None
+		out = quantizeQuats(quats, tracks)
+		if self.numpy != None:
+			Torque_Math.numpy = self.numpy
+			self.assertEqual(quantizeQuats(quats, tracks).tolist(), out.tolist())
+		return out.tolist()
+
+	def testRoundingAndClamping(self):
+		out = self.quantize([Quaternion(0.5, -1.0, 1.0, 0.0), Quaternion(1.01, -1.01, 0.25 / 32767, -0.75 / 32767)])
+		self.assertEqual(out, [16384, -32767, 32767, 0, 32767, -32768, 0, -1])
+
+	def testEmpty(self):
+		self.assertEqual(self.quantize([]), [])
+
+	def testSameHemisphereInTrack(self):
+		q = Quaternion(0.0, 0.0, 0.6, 0.8)
+		near = Quaternion(0.0, 0.0, -0.62, -0.78)
+		out = self.quantize([q, near, q, near, q], [(0, 3), (3, 2)])
+		# Key 1 is flipped to follow key 0, key 2 then needs no flip.  Key 3
+		# starts the second track and is left alone, so key 4 is flipped.
+		self.assertEqual(out[4:8], [0, 0, 20316, 25558])
+		self.assertEqual(out[8:12], [0, 0, 19660, 26214])
+		self.assertEqual(out[12:16], [0, 0, -20316, -25558])
+		self.assertEqual(out[16:20], [0, 0, -19660, -26214])
+
+	def testNoTracks(self):
+		q = Quaternion(0.0, 0.6, 0.0, 0.8)
+		out = self.quantize([q, -q])
+		self.assertEqual(out[4:8], [0, -19660, 0, -26214])
+
+	def testMatchesQuat16(self):
+		rnd = random.Random(4)
+		quats = [Quaternion(rnd.uniform(-1, 1), rnd.uniform(-1, 1), rnd.uniform(-1, 1), rnd.uniform(-1, 1)).normalize() for i in range(0, 50)]
+		out = self.quantize(quats)
+		for i in range(0, 50):
+			q = Quat16(quats[i].members)
+			for c in range(0, 4):
+				# Quat16 truncates, quantizeQuats rounds
+				self.failUnless(abs(out[i*4+c] - q[c]) <= 1)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,116 @@
+'''
+test_dtsbuild.py
+
+Copyright (c) 2026 Torque Exporter contributors
+
+Permission is hereby granted, free of charge, to any person obtaining
+a copy of this software and associated documentation files (the
+"Software"), to deal in the Software without restriction, including
+without limitation the rights to use, copy, modify, merge, publish,
+distribute, sublicense, and/or sell copies of the Software, and to
+permit persons to whom the Software is furnished to do so, subject to
+the following conditions:
+
+The above copyright notice and this permission notice shall be
+included in all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+'''
+
+import unittest, sys, os, shutil, tempfile
+from StringIO import StringIO
+from dtstest import *
+import Dts_Snapshot
+from test_Dts_Snapshot import buildShape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import dtsbuild
+
+try: import json
+except ImportError:
+	try: import simplejson as json
+	except ImportError: json = None
+
+class MainTests(TestCase):
+	def setUp(self):
+		self.folder = tempfile.mkdtemp()
+		self.output = os.path.join(self.folder, "out")
+		self.logs = os.path.join(self.folder, "logs")
+		os.mkdir(self.output)
+		os.mkdir(self.logs)
+		self.stdout, self.stderr = sys.stdout, sys.stderr
+		sys.stdout, sys.stderr = StringIO(), StringIO()
+
+	def tearDown(self):
+		sys.stdout, sys.stderr = self.stdout, self.stderr
+		shutil.rmtree(self.folder)
+
+	def saveSnapshot(self, name):
+		prefs = {'exportBasepath' : self.folder, 'exportBasename' : name, 'WriteShapeScript' : False,
+			'TSEMaterial' : False, 'Sequences' : {}}
+		filename = os.path.join(self.folder, name + ".dtssnap")
+		Dts_Snapshot.saveSnapshot(Dts_Snapshot.snapshotShape(buildShape(), prefs), filename)
+		return filename
+
+	def testNoSnapshots(self):
+		try:
+			dtsbuild.main([])
+			self.fail("main did not exit")
+		except SystemExit, e:
+			self.assertEqual(e.code, 2)
+
+	def testMissingFolder(self):
+		try:
+			dtsbuild.main(["-o", os.path.join(self.folder, "nowhere"), self.saveSnapshot("a")])
+			self.fail("main did not exit")
+		except SystemExit, e:
+			self.assertEqual(e.code, 2)
+
+	def testBuild(self):
+		args = ["-o", self.output, "-l", self.logs, self.saveSnapshot("a"), self.saveSnapshot("b")]
+		self.assertEqual(dtsbuild.main(args), 0)
+		self.assertEqual(sorted(os.listdir(self.output)), ["a.dts", "b.dts"])
+		self.assertEqual(sorted(os.listdir(self.logs)), ["a.log", "b.log"])
+
+	def testWorkers(self):
+		filenames = [self.saveSnapshot(name) for name in ("a", "b", "c")]
+		self.assertEqual(dtsbuild.main(["-j", "2", "-o", self.output, "-l", self.logs] + filenames), 0)
+		self.assertEqual(sorted(os.listdir(self.output)), ["a.dts", "b.dts", "c.dts"])
+
+	def testFailure(self):
+		bad = os.path.join(self.folder, "bad.dtssnap")
+		fs = open(bad, "wb")
+		fs.write("not a snapshot\n")
+		fs.close()
+		args = ["-o", self.output, "-l", self.logs, self.saveSnapshot("a"), bad]
+		if json != None: args = ["-s", os.path.join(self.folder, "summary.json")] + args
+		self.assertEqual(dtsbuild.main(args), 1)
+		self.assertEqual(os.listdir(self.output), ["a.dts"])
+		if json != None:
+			fs = open(os.path.join(self.folder, "summary.json"))
+			summary = json.load(fs)
+			fs.close()
+			self.assertEqual((summary['built'], summary['failed']), (1, 1))
+			self.assertEqual([f['status'] for f in summary['files']], ["ok", "failed"])
+
+	def testConsoleSummary(self):
+		# with the summary on stdout, the build logs and status lines go to stderr
+		if json == None: return
+		bad = os.path.join(self.folder, "bad.dtssnap")
+		fs = open(bad, "wb")
+		fs.write("not a snapshot\n")
+		fs.close()
+		self.assertEqual(dtsbuild.main(["-s", "-", "-o", self.output, self.saveSnapshot("a"), bad]), 1)
+		summary = json.loads(sys.stdout.getvalue())
+		self.assertEqual((summary['built'], summary['failed']), (1, 1))
+		self.assertTrue("Built 1 of 2 snapshot(s)" in sys.stderr.getvalue())
+		self.assertTrue("could not build" in sys.stderr.getvalue())
+
+if __name__ == "__main__":
+	unittest.main()